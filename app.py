@@ -1,17 +1,37 @@
+import base64
+import csv
+import hashlib
+import hmac
+import json
+import multiprocessing
 import os
+import queue
+import re
+import shutil
+import signal
+import socket
 import sqlite3
+import threading
+import time
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from functools import wraps
-from io import BytesIO
+from functools import lru_cache, wraps
+from io import BytesIO, StringIO
+from types import MappingProxyType
+from xml.sax.saxutils import escape as xml_escape
 
+import click
 from dotenv import load_dotenv
-from flask import (Flask, flash, g, jsonify, make_response, redirect,
-                   render_template, request, send_file, session, url_for)
+from flask import (Flask, abort, flash, g, has_app_context, jsonify, make_response,
+                   redirect, render_template, request, send_file, session,
+                   stream_with_context, url_for)
 from flask_login import LoginManager, current_user, login_required, login_user, logout_user
 from flask_wtf import FlaskForm, CSRFProtect
 from flask_wtf.file import FileAllowed, FileField
 from fpdf import FPDF
-from PIL import Image
+from PIL import Image, ImageOps
 from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.utils import secure_filename
 from wtforms import (DateField, FloatField, IntegerField, PasswordField,
@@ -23,21 +43,15 @@ load_dotenv()
 
 app = Flask(__name__)
 
-# --- Database configuration inserted by assistant ---
-# Use DATABASE_URL (Railway Postgres) if provided; otherwise fallback to local SQLite.
-if os.environ.get("DATABASE_URL"):
-    # SQLAlchemy expects the scheme 'postgresql://' not 'postgres://'
-    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ["DATABASE_URL"].replace("postgres://", "postgresql://")
-else:
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///gaji.db"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-db = SQLAlchemy(app)
-# --- end assistant block ---
-
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'gaji-karyawan-secret-key-2024')
 app.config['DATABASE'] = os.path.join(app.root_path, 'instance', 'gaji_karyawan.db')
 app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'uploads', 'profile_photos')
+# Upload foto mentah yang menunggu diproses worker job
+app.config['UPLOAD_STAGING_DIR'] = os.path.join(app.root_path, 'instance', 'incoming')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['SLIP_CACHE_DIR'] = os.path.join(app.root_path, 'instance', 'slip_cache')
+app.config['SLIP_CACHE_MAX_BYTES'] = int(os.environ.get('SLIP_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+app.config['SLIP_RENDER_WORKERS'] = int(os.environ.get('SLIP_RENDER_WORKERS', os.cpu_count() or 1))
 
 csrf = CSRFProtect(app)
 login_manager = LoginManager()
@@ -51,38 +65,399 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 # ==================== DATABASE ====================
 
+# Use DATABASE_URL (Railway Postgres) if provided; otherwise fallback to local SQLite.
+# SQLAlchemy expects the scheme 'postgresql://' not 'postgres://'; driver psycopg2 dipilih eksplisit
+app.config['DATABASE_URL'] = re.sub(r'^postgres(ql)?://', 'postgresql+psycopg2://', os.environ.get('DATABASE_URL', ''))
+app.config['DB_BACKEND'] = 'postgresql' if app.config['DATABASE_URL'] else 'sqlite'
+app.config['SQLALCHEMY_DATABASE_URI'] = app.config['DATABASE_URL'] or 'sqlite:///' + app.config['DATABASE']
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 4))
+app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 10))  # Postgres
+app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # Postgres, detik
+app.config['DB_BUSY_TIMEOUT'] = int(os.environ.get('DB_BUSY_TIMEOUT', 5000))  # ms
+app.config['DB_CACHE_SIZE'] = int(os.environ.get('DB_CACHE_SIZE', 32768))  # KiB
+app.config['DB_MMAP_SIZE'] = int(os.environ.get('DB_MMAP_SIZE', 256 * 1024 * 1024))  # bytes
+app.config['DB_STATEMENT_CACHE'] = int(os.environ.get('DB_STATEMENT_CACHE', 256))
+app.config['DB_LOCK_RETRIES'] = int(os.environ.get('DB_LOCK_RETRIES', 3))
+
+if app.config['DB_BACKEND'] == 'postgresql':
+    import psycopg2
+    import psycopg2.extensions
+    import psycopg2.extras
+
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': app.config['DB_POOL_SIZE'],
+        'max_overflow': app.config['DB_MAX_OVERFLOW'],
+        'pool_pre_ping': True,
+        'pool_recycle': app.config['DB_POOL_RECYCLE'],
+    }
+    # Kembalikan DATE/TIMESTAMP sebagai string seperti sqlite3, template memakai created_at[:10]
+    psycopg2.extensions.register_type(psycopg2.extensions.new_type(
+        (1082, 1114, 1184), 'TEXT_DATETIME', lambda value, cursor: value))
+
+db = SQLAlchemy(app)
+
+db_stats = {'connections_opened': 0, 'lock_events': 0, 'lock_retries': 0}
+
+def is_locked_error(error):
+    return isinstance(error, sqlite3.OperationalError) and 'locked' in str(error)
+
+class PooledConnection(sqlite3.Connection):
+    """Koneksi SQLite yang mencoba ulang statement saat database terkunci.
+
+    busy_timeout sudah menunggu di level SQLite; retry di sini hanya untuk kasus
+    yang tetap gagal setelah timeout. Statement hanya diulang jika aman, yaitu saat
+    belum ada transaksi yang berjalan (atau saat commit)."""
+
+    def _retry(self, func, *args, is_commit=False):
+        attempt = 0
+        while True:
+            started_in_transaction = self.in_transaction
+            try:
+                return func(*args)
+            except sqlite3.OperationalError as e:
+                if not is_locked_error(e):
+                    raise
+                db_stats['lock_events'] += 1
+                safe = is_commit or not started_in_transaction
+                if not safe or attempt >= app.config['DB_LOCK_RETRIES']:
+                    raise
+                if not started_in_transaction and self.in_transaction:
+                    super().rollback()
+                attempt += 1
+                db_stats['lock_retries'] += 1
+                time.sleep(0.05 * 2 ** attempt)
+
+    def execute(self, *args):
+        started = time.perf_counter()
+        try:
+            return self._retry(super().execute, *args)
+        finally:
+            record_query(args[0], time.perf_counter() - started)
+
+    def executemany(self, *args):
+        started = time.perf_counter()
+        try:
+            return self._retry(super().executemany, *args)
+        finally:
+            record_query(args[0], time.perf_counter() - started)
+
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            self._retry(super().commit, is_commit=True)
+        finally:
+            record_query('COMMIT', time.perf_counter() - started)
+        apply_ranking_patch(self)
+
+    def rollback(self):
+        self.ranking_patch = None
+        super().rollback()
+
+class ConnectionPool:
+    """Pool koneksi SQLite per worker. Koneksi idle disimpan maksimal `size` buah;
+    jika pool kosong, koneksi baru dibuat."""
+
+    def __init__(self, path, size):
+        self.path = path
+        self.pid = os.getpid()
+        self.idle = queue.LifoQueue(maxsize=size)
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, factory=PooledConnection,
+                               timeout=app.config['DB_BUSY_TIMEOUT'] / 1000,
+                               cached_statements=app.config['DB_STATEMENT_CACHE'],
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute(f"PRAGMA busy_timeout = {app.config['DB_BUSY_TIMEOUT']:d}")
+        conn.execute(f"PRAGMA cache_size = -{app.config['DB_CACHE_SIZE']:d}")
+        conn.execute(f"PRAGMA mmap_size = {app.config['DB_MMAP_SIZE']:d}")
+        conn.execute('PRAGMA temp_store = MEMORY')
+        conn.ranking_patch = None
+        db_stats['connections_opened'] += 1
+        return conn
+
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            return self.connect()
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self.idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def idle_count(self):
+        return self.idle.qsize()
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+def is_postgres():
+    return app.config['DB_BACKEND'] == 'postgresql'
+
+def db_errors():
+    """Kelas exception database untuk backend aktif, dipakai di except"""
+    if is_postgres():
+        return (sqlite3.Error, psycopg2.Error)
+    return (sqlite3.Error,)
+
+def sql_month(column):
+    """Ekspresi SQL 'YYYY-MM' dari kolom tanggal"""
+    if is_postgres():
+        return f"to_char({column}::timestamp, 'YYYY-MM')"
+    return f"strftime('%Y-%m', {column})"
+
+def sql_date(column):
+    """Ekspresi SQL tanggal 'YYYY-MM-DD' dari kolom timestamp"""
+    if is_postgres():
+        return f'CAST({column} AS DATE)'
+    return f'DATE({column})'
+
+def sql_period(column, granularity):
+    """Ekspresi SQL awal periode dari kolom DATE: 'YYYY-MM-DD' untuk day dan week
+    (Senin), 'YYYY-MM' untuk month"""
+    if granularity == 'month':
+        return sql_month(column)
+    if granularity == 'week':
+        if is_postgres():
+            return f"to_char(date_trunc('week', {column}), 'YYYY-MM-DD')"
+        return f"DATE({column}, 'weekday 0', '-6 days')"
+    if is_postgres():
+        return f"to_char({column}, 'YYYY-MM-DD')"
+    return column
+
+class PostgresConnection:
+    """Koneksi psycopg2 dengan antarmuka yang sama seperti sqlite3 yang dipakai route:
+    placeholder '?', execute() mengembalikan cursor, dan baris bisa diakses lewat nama
+    kolom maupun index. LIKE diterjemahkan ke ILIKE agar pencarian tetap case-insensitive
+    seperti di SQLite."""
+
+    def __init__(self, raw):
+        self.raw = raw  # koneksi DBAPI dari pool SQLAlchemy
+        self.ranking_patch = None  # lihat bump_ranking
+
+    @staticmethod
+    def translate(sql, params):
+        if params:
+            sql = sql.replace('%', '%%').replace('?', '%s')
+        return re.sub(r'\bLIKE\b', 'ILIKE', sql)
+
+    def cursor(self):
+        return self.raw.cursor(cursor_factory=psycopg2.extras.DictCursor)
+
+    def execute(self, sql, params=()):
+        cursor = self.cursor()
+        started = time.perf_counter()
+        try:
+            if params:
+                cursor.execute(self.translate(sql, True), tuple(params))
+            else:
+                cursor.execute(self.translate(sql, False))
+        finally:
+            record_query(sql, time.perf_counter() - started)
+        return cursor
+
+    def executemany(self, sql, seq_of_params):
+        cursor = self.cursor()
+        started = time.perf_counter()
+        try:
+            psycopg2.extras.execute_batch(cursor, self.translate(sql, True), [tuple(p) for p in seq_of_params])
+        finally:
+            record_query(sql, time.perf_counter() - started)
+        return cursor
+
+    @property
+    def in_transaction(self):
+        return self.raw.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            self.raw.commit()
+        finally:
+            record_query('COMMIT', time.perf_counter() - started)
+        apply_ranking_patch(self)
+
+    def rollback(self):
+        self.ranking_patch = None
+        self.raw.rollback()
+
+    def close(self):
+        self.raw.close()
+
+class PostgresPool:
+    """Pool koneksi Postgres memakai engine Flask-SQLAlchemy
+    (DB_POOL_SIZE + DB_MAX_OVERFLOW koneksi, pre-ping, recycle)."""
+
+    def __init__(self, url):
+        self.path = url
+        self.pid = os.getpid()
+        # Setelah fork, koneksi warisan proses induk tidak boleh dipakai bersama
+        db.engine.dispose(close=False)
+
+    def acquire(self):
+        db_stats['connections_opened'] += 1
+        return PostgresConnection(db.engine.raw_connection())
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        conn.close()
+
+    def idle_count(self):
+        return db.engine.pool.checkedin()
+
+    def close(self):
+        with app.app_context():
+            db.engine.dispose()
+
+_pool = None
+
+def get_pool():
+    """Pool untuk proses ini. Dibuat ulang setelah fork (pid berubah) atau jika database berubah."""
+    global _pool
+    pool = _pool
+    target = app.config['DATABASE_URL'] if is_postgres() else app.config['DATABASE']
+    if pool is None or pool.pid != os.getpid() or pool.path != target:
+        if pool is not None and pool.pid == os.getpid():
+            pool.close()
+        if is_postgres():
+            pool = _pool = PostgresPool(target)
+        else:
+            pool = _pool = ConnectionPool(target, app.config['DB_POOL_SIZE'])
+    return pool
+
 def get_db():
     if 'db' not in g:
-        g.db = sqlite3.connect(app.config['DATABASE'])
-        g.db.row_factory = sqlite3.Row
+        g.db_pool = get_pool()
+        g.db = g.db_pool.acquire()
     return g.db
 
 @app.teardown_appcontext
 def close_db(error):
-    if 'db' in g:
-        g.db.close()
+    db = g.pop('db', None)
+    if db is not None:
+        g.pop('db_pool').release(db)
+
+MIGRATIONS_FOLDER = os.path.join(app.root_path, 'migrations')
+MIGRATION_LOCK_ID = 7391  # pg_advisory_xact_lock untuk migrasi
+
+def load_migrations():
+    """Daftar migrasi (version, name, sql) dari folder migrations/, urut berdasarkan versi.
+    Nama file: NNNN_nama.sql. Jika ada NNNN_nama.postgres.sql, file itu yang dipakai di Postgres."""
+    migrations = {}
+    for filename in sorted(os.listdir(MIGRATIONS_FOLDER)):
+        base, _, ext = filename.partition('.')
+        if ext not in ('sql', 'postgres.sql'):
+            continue
+        if ext == 'postgres.sql' and not is_postgres():
+            continue
+        version, name = base.split('_', 1)
+        if ext == 'sql' and int(version) in migrations:
+            continue
+        with open(os.path.join(MIGRATIONS_FOLDER, filename)) as f:
+            migrations[int(version)] = (int(version), name, f.read())
+    return [migrations[v] for v in sorted(migrations)]
+
+def table_exists(db, name):
+    if is_postgres():
+        query = 'SELECT 1 FROM information_schema.tables WHERE table_schema = current_schema() AND table_name = ?'
+    else:
+        query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+    return db.execute(query, (name,)).fetchone() is not None
+
+def run_sql_script(db, script):
+    """Jalankan script SQL per statement di dalam transaksi yang sedang berjalan.
+    (executescript() selalu commit lebih dulu, jadi tidak bisa dipakai di sini.)"""
+    if is_postgres():
+        db.execute(script)
+        return
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            db.execute(statement)
+            statement = ''
+    leftover = '\n'.join(l for l in statement.splitlines() if not l.strip().startswith('--'))
+    if leftover.strip():
+        raise ValueError(f'Statement SQL tidak lengkap: {leftover.strip()[:80]}')
+
+def get_schema_version(db):
+    row = db.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+def migrate_db(db):
+    """Bawa database ke versi skema terbaru.
+
+    Database kosong langsung dibuat dari schema.sql dan semua migrasi ditandai sudah
+    jalan. Database lama menjalankan migrasi yang belum tercatat di schema_version.
+    Semua berjalan dalam satu transaksi BEGIN IMMEDIATE (di Postgres: advisory lock),
+    sehingga beberapa worker yang start bersamaan tidak menjalankan migrasi yang sama dua kali.
+    Mengembalikan daftar versi yang baru dijalankan."""
+    migrations = load_migrations()
+    if is_postgres():
+        db.execute('SELECT pg_advisory_xact_lock(?)', (MIGRATION_LOCK_ID,))
+    else:
+        db.execute('BEGIN IMMEDIATE')
+    try:
+        db.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        fresh = not table_exists(db, 'users')
+        applied = {r[0] for r in db.execute('SELECT version FROM schema_version')}
+
+        if fresh:
+            with app.open_resource('schema.postgres.sql' if is_postgres() else 'schema.sql', mode='r') as f:
+                run_sql_script(db, f.read())
+            pending = []
+        else:
+            pending = [m for m in migrations if m[0] not in applied]
+            for version, name, sql in pending:
+                run_sql_script(db, sql)
+
+        db.executemany('INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?) '
+                       'ON CONFLICT (version) DO NOTHING',
+                       [(version, name, datetime.now()) for version, name, _ in migrations])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return [m[0] for m in pending]
 
 def init_db():
+    os.makedirs(os.path.dirname(app.config['DATABASE']), exist_ok=True)
     with app.app_context():
         db = get_db()
-        with app.open_resource('schema.sql', mode='r') as f:
-            db.cursor().executescript(f.read())
-        db.commit()
-        
+        for version in migrate_db(db):
+            print(f'Migrasi {version:04d} diterapkan.')
+
         # Create default BOS account
-        cursor = db.cursor()
-        cursor.execute('SELECT * FROM users WHERE username = ?', ('bos',))
-        if not cursor.fetchone():
-            cursor.execute('''
+        if not db.execute('SELECT * FROM users WHERE username = ?', ('bos',)).fetchone():
+            db.execute('''
                 INSERT INTO users (username, password_hash, role, nama_lengkap, created_at)
                 VALUES (?, ?, ?, ?, ?)
-            ''', ('bos', generate_password_hash('bos123'), 'bos', 'Bos Utama', datetime.now()))
+            ''', ('bos', hash_password('bos123'), 'bos', 'Bos Utama', datetime.now()))
             db.commit()
             print("Default BOS account created: username='bos', password='bos123'")
         
         # Insert default harga if empty
-        cursor.execute('SELECT COUNT(*) FROM harga')
-        if cursor.fetchone()[0] == 0:
+        if db.execute('SELECT COUNT(*) FROM harga').fetchone()[0] == 0:
             default_harga = [
                 ('besar', 'tipis', 33000),
                 ('besar', 'semi', 37000),
@@ -93,22 +468,88 @@ def init_db():
                 ('jumbo', 'tipis', 37000),
                 ('jumbo', 'semi', 40000),
             ]
-            cursor.executemany('''
+            db.executemany('''
                 INSERT INTO harga (ukuran, jenis, harga)
                 VALUES (?, ?, ?)
             ''', default_harga)
             db.commit()
 
+# ==================== PASSWORD HASHING ====================
+
+# Method Werkzeug beserta cost-nya: 'scrypt:N:r:p' atau 'pbkdf2:sha256:iterasi'.
+# Hash lama dengan method/cost lain diganti otomatis saat login berhasil.
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+app.config['PASSWORD_HASH_QUEUE'] = int(os.environ.get('PASSWORD_HASH_QUEUE', 4))
+
+class PasswordHashBusy(Exception):
+    """Antrian hash password penuh; request ditolak daripada menahan worker"""
+
+_hash_pool = None  # (pid, executor, slot)
+_hash_pool_lock = threading.Lock()
+
+def run_password_hash(fn, *args):
+    """Jalankan fn di thread pool hash password per proses (scrypt/pbkdf2 melepas GIL).
+    Paling banyak PASSWORD_HASH_WORKERS hash berjalan dan PASSWORD_HASH_QUEUE menunggu;
+    di atas itu PasswordHashBusy, sehingga lonjakan login tidak menghabiskan semua thread."""
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None or _hash_pool[0] != os.getpid():
+            workers = app.config['PASSWORD_HASH_WORKERS']
+            _hash_pool = (os.getpid(),
+                          ThreadPoolExecutor(workers, thread_name_prefix='password-hash'),
+                          threading.BoundedSemaphore(workers + app.config['PASSWORD_HASH_QUEUE']))
+        _, executor, slots = _hash_pool
+    if not slots.acquire(blocking=False):
+        raise PasswordHashBusy()
+    try:
+        return executor.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+def hash_password(password):
+    return run_password_hash(generate_password_hash, password, app.config['PASSWORD_HASH_METHOD'])
+
+def verify_password(password_hash, password):
+    return run_password_hash(check_password_hash, password_hash, password)
+
+@lru_cache(maxsize=None)
+def password_hash_prefix(method):
+    """Awalan hash untuk method, mis. 'scrypt' -> 'scrypt:32768:8:1' (parameter default diisi)"""
+    return generate_password_hash('', method).split('$', 1)[0]
+
+def password_needs_rehash(password_hash):
+    return password_hash.split('$', 1)[0] != password_hash_prefix(app.config['PASSWORD_HASH_METHOD'])
+
+def rehash_password(db, user, password):
+    """Simpan ulang hash dengan PASSWORD_HASH_METHOD setelah login berhasil.
+    Dilewati jika antrian hash penuh (dicoba lagi di login berikutnya)."""
+    try:
+        new_hash = hash_password(password)
+    except PasswordHashBusy:
+        return
+    # Password tidak berubah, jadi session_version tidak dinaikkan
+    db.execute('UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?',
+               (new_hash, user['id'], user['password_hash']))
+    db.commit()
+
 # ==================== USER MODEL ====================
 
 class User:
-    def __init__(self, id, username, role, nama_lengkap, whatsapp=None, foto_profil=None):
+    def __init__(self, id, username, role, nama_lengkap, whatsapp=None, foto_profil=None,
+                 session_version=1):
         self.id = id
         self.username = username
         self.role = role
         self.nama_lengkap = nama_lengkap
         self.whatsapp = whatsapp
         self.foto_profil = foto_profil
+        self.session_version = session_version
+    
+    @classmethod
+    def from_row(cls, row):
+        return cls(row['id'], row['username'], row['role'], row['nama_lengkap'],
+                   row['whatsapp'], row['foto_profil'], row['session_version'])
     
     def is_authenticated(self):
         return True
@@ -120,19 +561,61 @@ class User:
         return False
     
     def get_id(self):
-        return str(self.id)
+        # Versi ikut disimpan di sesi dan cookie remember, lihat load_user
+        return f'{self.id}:{self.session_version}'
     
     def is_bos(self):
         return self.role == 'bos'
 
+# Generasi cache 'users' hanya dinaikkan saat session_version berubah (ganti password), jadi
+# sesi lama langsung ditolak di semua worker. Perubahan tampilan (nama, foto) cukup
+# invalidate_user_cache: worker lain memuat ulang paling lambat setelah USER_CACHE_TTL.
+USER_CACHE_SIZE = 1000
+USER_CACHE_TTL = 30  # detik
+_user_cache = OrderedDict()  # user_id -> (User, waktu dimuat, generasi 'users')
+_user_cache_lock = threading.Lock()
+
+def invalidate_user_cache(user_id):
+    """Buang user dari cache worker ini"""
+    with _user_cache_lock:
+        _user_cache.pop(int(user_id), None)
+
 @login_manager.user_loader
 def load_user(user_id):
-    db = get_db()
-    user = db.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
-    if user:
-        return User(user['id'], user['username'], user['role'], 
-                   user['nama_lengkap'], user['whatsapp'], user['foto_profil'])
-    return None
+    """Ambil user dari cache LRU per worker; query ke users hanya saat miss atau kedaluwarsa.
+    ID sesi berbentuk 'id:session_version'. Jika password/role berubah, versi di users naik
+    sehingga sesi lama ditolak (sesi format lama tanpa versi dianggap versi 1). Entri cache
+    dari generasi 'users' sebelumnya dianggap basi; generasi ikut dibaca bersama generasi
+    cache lain (satu query per request), jadi cache hit tidak menambah query."""
+    user_id, _, version = user_id.partition(':')
+    try:
+        user_id, version = int(user_id), int(version or 1)
+    except ValueError:
+        return None
+    now = time.monotonic()
+    generation = get_cache_generation('users')
+    with _user_cache_lock:
+        cached = _user_cache.get(user_id)
+        if cached and cached[2] == generation and now - cached[1] < USER_CACHE_TTL:
+            _user_cache.move_to_end(user_id)
+        else:
+            cached = None
+    if cached and cached[0].session_version == version:
+        record_cache('user', True)
+        return cached[0]
+    record_cache('user', False)
+    
+    row = get_db().execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
+    if row is None:
+        invalidate_user_cache(user_id)
+        return None
+    user = User.from_row(row)
+    with _user_cache_lock:
+        _user_cache[user_id] = (user, now, generation)
+        _user_cache.move_to_end(user_id)
+        while len(_user_cache) > USER_CACHE_SIZE:
+            _user_cache.popitem(last=False)
+    return user if user.session_version == version else None
 
 # ==================== FORMS ====================
 
@@ -193,8 +676,158 @@ class BonusForm(FlaskForm):
 
 @app.route('/uploads/profile_photos/<filename>')
 def uploaded_file(filename):
-    """Serve uploaded profile photos"""
-    return send_file(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+    """Serve uploaded profile photos. Varian berhash tidak pernah berubah isinya,
+    jadi boleh di-cache browser selamanya."""
+    path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    if not PHOTO_VARIANT_RE.match(filename):
+        return send_file(path)
+    response = send_file(path, max_age=PHOTO_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+# ==================== METRICS ====================
+
+# Metrik disimpan di memori per proses dan diekspor di /metrics (format teks Prometheus).
+# Dengan beberapa worker gunicorn setiap worker melapor sendiri dengan label worker=<pid>,
+# jadi jumlahkan per label itu di Prometheus.
+app.config['SLOW_REQUEST_MS'] = int(os.environ.get('SLOW_REQUEST_MS', 500))
+# Tanpa METRICS_TOKEN, /metrics hanya melayani request dari localhost
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN', '')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SQL_SLOWEST_KEPT = 5  # statement terlambat yang disimpan per request dan per endpoint
+metrics_lock = threading.Lock()
+
+class Metric:
+    """Counter, gauge atau histogram berlabel yang dirender ke format teks Prometheus"""
+    def __init__(self, name, kind, description, labels=(), buckets=None):
+        self.name = name
+        self.kind = kind
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {}
+
+    def inc(self, *labels, value=1):
+        with metrics_lock:
+            self.values[labels] = self.values.get(labels, 0) + value
+
+    def set(self, *labels, value):
+        with metrics_lock:
+            self.values[labels] = value
+
+    def observe(self, *labels, value):
+        with metrics_lock:
+            counts = self.values.get(labels)
+            if counts is None:
+                # [jumlah per bucket..., +Inf, sum]
+                counts = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    def render(self, worker):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} {self.kind}']
+        with metrics_lock:
+            values = sorted(self.values.items())
+        for labels, value in values:
+            pairs = [('worker', worker)] + list(zip(self.labels, labels))
+            if self.kind != 'histogram':
+                lines.append(f'{self.name}{{{metric_labels(pairs)}}} {value}')
+                continue
+            for bound, count in zip(self.buckets + ('+Inf',), value[:-1]):
+                lines.append(f'{self.name}_bucket{{{metric_labels(pairs + [("le", bound)])}}} {count}')
+            lines.append(f'{self.name}_sum{{{metric_labels(pairs)}}} {value[-1]}')
+            lines.append(f'{self.name}_count{{{metric_labels(pairs)}}} {value[-2]}')
+        return lines
+
+def metric_labels(pairs):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{k}="{escape(v)}"' for k, v in pairs)
+
+REQUEST_LATENCY = Metric('gaji_http_request_duration_seconds', 'histogram',
+                         'Lama request per endpoint', ('endpoint', 'method'), LATENCY_BUCKETS)
+REQUESTS = Metric('gaji_http_requests_total', 'counter',
+                  'Jumlah request per endpoint dan status', ('endpoint', 'method', 'status'))
+SQL_QUERIES = Metric('gaji_sql_queries_total', 'counter',
+                     'Jumlah statement SQL per endpoint', ('endpoint',))
+SQL_TIME = Metric('gaji_sql_duration_seconds_total', 'counter',
+                  'Total waktu SQL per endpoint', ('endpoint',))
+SQL_SLOWEST = Metric('gaji_sql_slowest_statement_seconds', 'gauge',
+                     'Statement SQL terlambat yang pernah terlihat per endpoint', ('endpoint', 'statement'))
+PDF_RENDER = Metric('gaji_pdf_render_seconds', 'histogram',
+                    'Lama render PDF slip gaji', (), LATENCY_BUCKETS)
+CACHE_REQUESTS = Metric('gaji_cache_requests_total', 'counter',
+                        'Akses cache per nama cache dan hasil (hit/miss)', ('cache', 'result'))
+METRICS = (REQUEST_LATENCY, REQUESTS, SQL_QUERIES, SQL_TIME, SQL_SLOWEST, PDF_RENDER, CACHE_REQUESTS)
+
+def record_query(sql, elapsed):
+    """Catat satu statement ke statistik SQL request/app context yang sedang berjalan.
+    Di SQLite waktu diukur sampai baris pertama siap (agregasi dan sort sudah selesai di sana);
+    fetch baris berikutnya tidak ikut dihitung."""
+    if not has_app_context():
+        return
+    stats = g.get('sql_stats')
+    if stats is None:
+        stats = g.sql_stats = {'count': 0, 'time': 0.0, 'slowest': []}
+    stats['count'] += 1
+    stats['time'] += elapsed
+    slowest = stats['slowest']
+    if len(slowest) < SQL_SLOWEST_KEPT or elapsed > slowest[-1][0]:
+        slowest.append((elapsed, sql))
+        slowest.sort(key=lambda item: item[0], reverse=True)
+        del slowest[SQL_SLOWEST_KEPT:]
+
+def record_cache(name, hit):
+    CACHE_REQUESTS.inc(name, 'hit' if hit else 'miss')
+
+def short_sql(sql, limit=200):
+    """SQL satu baris untuk log dan label metrik"""
+    sql = ' '.join(sql.split())
+    return sql if len(sql) <= limit else sql[:limit - 3] + '...'
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Catat latensi dan statistik SQL per endpoint, dan log request yang lebih lambat
+    dari SLOW_REQUEST_MS beserta statement terlambatnya"""
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    endpoint = request.endpoint or 'unknown'
+    stats = g.get('sql_stats') or {'count': 0, 'time': 0.0, 'slowest': []}
+
+    REQUEST_LATENCY.observe(endpoint, request.method, value=elapsed)
+    REQUESTS.inc(endpoint, request.method, str(response.status_code))
+    SQL_QUERIES.inc(endpoint, value=stats['count'])
+    SQL_TIME.inc(endpoint, value=stats['time'])
+    if stats['slowest']:
+        with metrics_lock:
+            seen = {key[1]: value for key, value in SQL_SLOWEST.values.items() if key[0] == endpoint}
+            for duration, sql in stats['slowest']:
+                statement = short_sql(sql, 120)
+                seen[statement] = max(duration, seen.get(statement, 0))
+            for key in [key for key in SQL_SLOWEST.values if key[0] == endpoint]:
+                del SQL_SLOWEST.values[key]
+            for statement, duration in sorted(seen.items(), key=lambda item: item[1],
+                                              reverse=True)[:SQL_SLOWEST_KEPT]:
+                SQL_SLOWEST.values[(endpoint, statement)] = duration
+
+    if elapsed * 1000 > app.config['SLOW_REQUEST_MS']:
+        breakdown = ''.join(f'\n  {duration * 1000:8.1f} ms  {short_sql(sql)}'
+                            for duration, sql in stats['slowest'])
+        app.logger.warning('Request lambat %s %s (%s): %.0f ms, %d query, SQL %.0f ms%s',
+                           request.method, request.path, endpoint, elapsed * 1000,
+                           stats['count'], stats['time'] * 1000, breakdown)
+    return response
 
 # ==================== HELPER FUNCTIONS ====================
 
@@ -207,70 +840,741 @@ def bos_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def get_cache_generation(name):
+    """Nomor generasi cache dari database. Seluruh tabel cache_generation dibaca sekali per
+    request (satu query untuk harga, ranking, dashboard dan user sekaligus), agar semua
+    worker gunicorn tahu kapan cache lokalnya basi."""
+    if 'cache_generation' not in g:
+        rows = get_db().execute('SELECT name, generation FROM cache_generation').fetchall()
+        g.cache_generation = {row['name']: row['generation'] for row in rows}
+    return g.cache_generation.get(name, 0)
+
+def bump_cache_generation(db, name):
+    """Naikkan generasi cache dan kembalikan nilai barunya. Tidak melakukan commit, ikut transaksi pemanggil."""
+    generation = db.execute('''
+        INSERT INTO cache_generation (name, generation) VALUES (?, 1)
+        ON CONFLICT(name) DO UPDATE SET generation = cache_generation.generation + 1
+        RETURNING generation
+    ''', (name,)).fetchone()['generation']
+    g.pop('cache_generation', None)
+    return generation
+
+class HargaCatalog:
+    """Snapshot read-only tabel harga: daftar ukuran, jenis per ukuran,
+    dan (ukuran, jenis) -> (id, harga)"""
+    def __init__(self, generation, rows):
+        self.generation = generation
+        by_key = {}
+        jenis_by_ukuran = {}
+        for r in rows:
+            by_key[(r['ukuran'], r['jenis'])] = (r['id'], r['harga'])
+            jenis_by_ukuran.setdefault(r['ukuran'], set())
+            if r['jenis']:
+                jenis_by_ukuran[r['ukuran']].add(r['jenis'])
+        self.by_key = MappingProxyType(by_key)
+        self.ukuran = tuple(sorted(jenis_by_ukuran))
+        self.jenis_by_ukuran = MappingProxyType(
+            {u: tuple(sorted(j)) for u, j in jenis_by_ukuran.items()})
+        self.jenis = tuple(sorted(set().union(*jenis_by_ukuran.values())))
+
+    def lookup(self, ukuran, jenis):
+        """Kembalikan (harga_id, harga) atau None jika tidak ada"""
+        return self.by_key.get((ukuran, jenis or None))
+
+_harga_catalog = None
+
+def get_harga_catalog():
+    """Katalog harga per worker, dimuat ulang hanya jika generasi 'harga' berubah"""
+    global _harga_catalog
+    generation = get_cache_generation('harga')
+    catalog = _harga_catalog
+    record_cache('harga', catalog is not None and catalog.generation == generation)
+    if catalog is None or catalog.generation != generation:
+        rows = get_db().execute('SELECT id, ukuran, jenis, harga FROM harga').fetchall()
+        catalog = _harga_catalog = HargaCatalog(generation, rows)
+    return catalog
+
 def get_harga(ukuran, jenis):
-    db = get_db()
-    if jenis:
-        harga = db.execute('''
-            SELECT harga FROM harga WHERE ukuran = ? AND jenis = ?
-        ''', (ukuran, jenis)).fetchone()
-    else:
-        harga = db.execute('''
-            SELECT harga FROM harga WHERE ukuran = ? AND jenis IS NULL
-        ''', (ukuran,)).fetchone()
-    return harga['harga'] if harga else 0
+    item = get_harga_catalog().lookup(ukuran, jenis)
+    return item[1] if item else 0
 
-def get_total_gaji_kotor(user_id):
+def get_saldo(user_id):
+    """Ambil saldo berjalan (total kerja, bonus, hutang aktif) karyawan dalam satu query"""
     db = get_db()
     result = db.execute('''
-        SELECT COALESCE(SUM(total_harga), 0) as total 
-        FROM hasil_kerja 
-        WHERE user_id = ? AND status = 'approved'
+        SELECT total_kerja, total_bonus, total_hutang FROM saldo WHERE user_id = ?
     ''', (user_id,)).fetchone()
-    return result['total'] or 0
+    if not result:
+        return {'total_kerja': 0, 'total_bonus': 0, 'total_hutang': 0}
+    return {'total_kerja': result['total_kerja'] or 0,
+            'total_bonus': result['total_bonus'] or 0,
+            'total_hutang': result['total_hutang'] or 0}
+
+def update_saldo(db, user_id, kerja=0, bonus=0, hutang=0):
+    """Tambahkan selisih ke saldo karyawan. Tidak melakukan commit,
+    sehingga ikut dalam transaksi route yang memanggilnya."""
+    saldo = db.execute('''
+        INSERT INTO saldo (user_id, total_kerja, total_bonus, total_hutang, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET
+            total_kerja = saldo.total_kerja + excluded.total_kerja,
+            total_bonus = saldo.total_bonus + excluded.total_bonus,
+            total_hutang = saldo.total_hutang + excluded.total_hutang,
+            updated_at = excluded.updated_at
+        RETURNING total_kerja
+    ''', (user_id, kerja, bonus, hutang, datetime.now())).fetchone()
+    bump_cache_generation(db, 'dashboard')
+    if kerja:
+        bump_ranking(db, {user_id: saldo['total_kerja']})
+
+def update_rollup(db, rows, sign=1):
+    """Tambahkan (sign=1) atau kurangi (sign=-1) baris hasil_kerja approved ke rollup_harian.
+    rows perlu kolom user_id, harga_id, jumlah, total_harga dan created_at. Tidak melakukan commit."""
+    per_key = {}
+    for r in rows:
+        key = (str(r['created_at'])[:10], r['user_id'], r['harga_id'])
+        jumlah, total = per_key.get(key, (0, 0))
+        per_key[key] = (jumlah + r['jumlah'], total + r['total_harga'])
+    db.executemany('''
+        INSERT INTO rollup_harian (tanggal, user_id, harga_id, jumlah, total)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(tanggal, user_id, harga_id) DO UPDATE SET
+            jumlah = rollup_harian.jumlah + excluded.jumlah,
+            total = rollup_harian.total + excluded.total
+    ''', [key + (sign * jumlah, sign * total) for key, (jumlah, total) in per_key.items()])
+    if sign < 0:
+        # Baris yang kembali nol dihapus agar sama dengan rebuild_rollup dan tidak muncul di statistik
+        db.executemany('''
+            DELETE FROM rollup_harian WHERE tanggal = ? AND user_id = ? AND harga_id = ? AND jumlah = 0
+        ''', list(per_key))
+
+def rebuild_rollup(db):
+    """Hitung ulang rollup_harian dari semua hasil kerja approved (termasuk arsip). Tidak melakukan commit."""
+    db.execute('DELETE FROM rollup_harian')
+    db.execute(f'''
+        INSERT INTO rollup_harian (tanggal, user_id, harga_id, jumlah, total)
+        SELECT {sql_date('created_at')}, user_id, harga_id, SUM(jumlah), SUM(total_harga)
+        FROM hasil_kerja_semua
+        WHERE status = 'approved'
+        GROUP BY {sql_date('created_at')}, user_id, harga_id
+    ''')
+
+def set_kerja_status(db, kerja_id, status):
+    """Ubah status hasil kerja dan sesuaikan saldo serta rollup jika status approved berubah.
+    UPDATE hanya berlaku jika status masih sama dengan yang dibaca, jadi dua approve bersamaan
+    untuk baris yang sama hanya menambah saldo sekali."""
+    kerja = db.execute('''
+        SELECT user_id, harga_id, jumlah, total_harga, status, created_at FROM hasil_kerja WHERE id = ?
+    ''', (kerja_id,)).fetchone()
+    if not kerja or kerja['status'] == status:
+        return kerja
+    changed = db.execute('UPDATE hasil_kerja SET status = ? WHERE id = ? AND status = ?',
+                         (status, kerja_id, kerja['status'])).rowcount
+    if not changed:
+        return kerja  # sudah diubah request lain lebih dulu
+    bump_cache_generation(db, 'dashboard')
+    if kerja['status'] != 'approved' and status == 'approved':
+        update_saldo(db, kerja['user_id'], kerja=kerja['total_harga'])
+        update_rollup(db, [kerja])
+    elif kerja['status'] == 'approved' and status != 'approved':
+        update_saldo(db, kerja['user_id'], kerja=-kerja['total_harga'])
+        update_rollup(db, [kerja], -1)
+    return kerja
+
+def set_kerja_status_bulk(db, kerja_ids, status):
+    """Ubah status banyak hasil kerja pending sekaligus dan sesuaikan saldo.
+    Tidak melakukan commit. Mengembalikan hasil per ID:
+    'approved'/'rejected', 'skipped' (bukan pending) atau 'not_found'.
+    Saldo dihitung dari baris yang dikembalikan UPDATE ... RETURNING, jadi baris yang sudah
+    diubah request lain tidak ikut dihitung."""
+    results = {kerja_id: 'not_found' for kerja_id in kerja_ids}
+    changed = []
+    ids = list(results)
+    # SQLite membatasi jumlah parameter per statement
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        placeholders = ','.join('?' * len(chunk))
+        for r in db.execute(f'SELECT id FROM hasil_kerja WHERE id IN ({placeholders})', chunk).fetchall():
+            results[r['id']] = 'skipped'
+        changed.extend(db.execute(f'''
+            UPDATE hasil_kerja SET status = ?
+            WHERE id IN ({placeholders}) AND status = 'pending'
+            RETURNING id, user_id, harga_id, jumlah, total_harga, created_at
+        ''', [status] + chunk).fetchall())
+
+    for r in changed:
+        results[r['id']] = status
+    if changed:
+        bump_cache_generation(db, 'dashboard')
+
+    if status == 'approved':
+        per_user = {}
+        for r in changed:
+            per_user[r['user_id']] = per_user.get(r['user_id'], 0) + r['total_harga']
+        for user_id, total in per_user.items():
+            update_saldo(db, user_id, kerja=total)
+        update_rollup(db, changed)
+    return results
+
+SALDO_SQL = '''
+    SELECT u.id as user_id,
+           (SELECT COALESCE(SUM(total_harga), 0) FROM hasil_kerja
+            WHERE user_id = u.id AND status = 'approved') as total_kerja,
+           (SELECT COALESCE(SUM(nominal), 0) FROM bonus WHERE user_id = u.id) as total_bonus,
+           (SELECT COALESCE(SUM(nominal), 0) FROM hutang
+            WHERE user_id = u.id AND status = 'aktif') as total_hutang
+    FROM users u
+'''
+
+def rebuild_saldo(db):
+    """Hitung ulang seluruh tabel saldo dari hasil_kerja, bonus dan hutang"""
+    db.execute('DELETE FROM saldo')
+    db.execute(f'''
+        INSERT INTO saldo (user_id, total_kerja, total_bonus, total_hutang, updated_at)
+        SELECT user_id, total_kerja, total_bonus, total_hutang, ? FROM ({SALDO_SQL}) x
+    ''', (datetime.now(),))
+    bump_ranking(db)
+    db.commit()
+
+def verify_saldo(db):
+    """Bandingkan tabel saldo dengan hasil SUM sebenarnya, kembalikan baris yang selisih"""
+    rows = db.execute(f'''
+        SELECT x.user_id, x.total_kerja, x.total_bonus, x.total_hutang,
+               COALESCE(s.total_kerja, 0) as saldo_kerja,
+               COALESCE(s.total_bonus, 0) as saldo_bonus,
+               COALESCE(s.total_hutang, 0) as saldo_hutang
+        FROM ({SALDO_SQL}) x
+        LEFT JOIN saldo s ON s.user_id = x.user_id
+    ''').fetchall()
+    return [r for r in rows
+            if abs(r['total_kerja'] - r['saldo_kerja']) > 0.005
+            or abs(r['total_bonus'] - r['saldo_bonus']) > 0.005
+            or abs(r['total_hutang'] - r['saldo_hutang']) > 0.005]
+
+# Kolom tabel periode berjalan yang dipindahkan ke tabel *_arsip saat periode ditutup
+ARSIP_COLUMNS = {
+    'hasil_kerja': ('id, user_id, harga_id, jumlah, total_harga, status, created_at, updated_at, '
+                    'ukuran, jenis, harga_satuan'),
+    'hutang': 'id, user_id, nominal, keterangan, tanggal, status, created_at, updated_at',
+    'bonus': 'id, user_id, nominal, keterangan, created_at',
+}
+
+def reset_saldo(db, keterangan, user_id=None):
+    """Tutup periode gaji untuk satu karyawan atau (user_id=None) semua karyawan.
+    Total saat ini dicatat ke reset_gaji, hutang aktif dinonaktifkan, lalu hasil kerja,
+    hutang dan bonus dipindahkan ke tabel *_arsip dan saldo dinolkan; semuanya statement
+    set-based tanpa loop per karyawan. Tidak melakukan commit.
+    Mengembalikan jumlah karyawan yang direset."""
+    scope = "SELECT id FROM users WHERE role = 'karyawan'"
+    params = []
+    if user_id is not None:
+        scope += ' AND id = ?'
+        params.append(user_id)
+    now = datetime.now()
+    reset_ids = [row['id'] for row in db.execute(f'''
+        INSERT INTO reset_gaji (user_id, total_gaji_sebelumnya, total_hutang_sebelumnya, keterangan, created_at)
+        SELECT u.id, COALESCE(s.total_kerja, 0), COALESCE(s.total_hutang, 0), ?, ?
+        FROM users u
+        LEFT JOIN saldo s ON s.user_id = u.id
+        WHERE u.id IN ({scope})
+        RETURNING id
+    ''', [keterangan, now] + params).fetchall()]
+    if not reset_ids:
+        return 0
+    reset_placeholders = ', '.join('?' * len(reset_ids))
+    db.execute(f"UPDATE hutang SET status = 'nonaktif' WHERE status = 'aktif' AND user_id IN ({scope})",
+               params)
+    # Tabel aktif hanya berisi periode berjalan; riwayat tetap bisa dibaca lewat view *_semua
+    for table, columns in ARSIP_COLUMNS.items():
+        selected = ', '.join(f'x.{c.strip()}' for c in columns.split(','))
+        db.execute(f'''
+            INSERT INTO {table}_arsip ({columns}, reset_id, archived_at)
+            SELECT {selected}, rg.id, ?
+            FROM {table} x
+            JOIN reset_gaji rg ON rg.user_id = x.user_id AND rg.id IN ({reset_placeholders})
+            WHERE x.user_id IN ({scope})
+        ''', [now] + reset_ids + params)
+        db.execute(f'DELETE FROM {table} WHERE user_id IN ({scope})', params)
+    zeroed = db.execute(f'''
+        UPDATE saldo SET total_kerja = 0, total_bonus = 0, total_hutang = 0, updated_at = ?
+        WHERE user_id IN ({scope})
+        RETURNING user_id
+    ''', [now] + params).fetchall()
+    bump_ranking(db, {row['user_id']: 0 for row in zeroed})
+    return len(reset_ids)
+
+def get_total_gaji_kotor(user_id):
+    return get_saldo(user_id)['total_kerja']
 
 def get_total_hutang_aktif(user_id):
-    db = get_db()
-    result = db.execute('''
-        SELECT COALESCE(SUM(nominal), 0) as total 
-        FROM hutang 
-        WHERE user_id = ? AND status = 'aktif'
-    ''', (user_id,)).fetchone()
-    return result['total'] or 0
+    return get_saldo(user_id)['total_hutang']
 
 def get_total_bonus(user_id):
-    db = get_db()
-    result = db.execute('''
-        SELECT COALESCE(SUM(nominal), 0) as total 
-        FROM bonus 
-        WHERE user_id = ?
-    ''', (user_id,)).fetchone()
-    return result['total'] or 0
+    return get_saldo(user_id)['total_bonus']
 
 def get_gaji_bersih(user_id):
-    return get_total_gaji_kotor(user_id) + get_total_bonus(user_id) - get_total_hutang_aktif(user_id)
-
-def get_ukuran_choices():
+    saldo = get_saldo(user_id)
+    return saldo['total_kerja'] + saldo['total_bonus'] - saldo['total_hutang']
+
+class Ranking:
+    """Snapshot peringkat karyawan berdasarkan total kerja approved (saldo.total_kerja).
+    top() dan rank() tidak menyentuh database."""
+    def __init__(self, generation, rows):
+        self.generation = generation
+        self.items = tuple(
+            MappingProxyType({'id': r['id'], 'nama_lengkap': r['nama_lengkap'],
+                              'foto_profil': r['foto_profil'], 'total_gaji': r['total_gaji'],
+                              'rank': rank})
+            for rank, r in enumerate(rows, 1))
+        self.by_user = MappingProxyType({item['id']: item for item in self.items})
+
+    def top(self, n):
+        return self.items[:n]
+
+    def rank(self, user_id):
+        """Entri peringkat karyawan (id, nama_lengkap, foto_profil, total_gaji, rank) atau None"""
+        return self.by_user.get(user_id)
+
+    def patched(self, generation, totals):
+        """Snapshot baru dengan total_gaji karyawan di totals ({user_id: total}) diganti,
+        diurutkan ulang di memori. None jika ada karyawan yang belum ada di snapshot."""
+        if any(user_id not in self.by_user for user_id in totals):
+            return None
+        rows = [dict(item, total_gaji=totals.get(item['id'], item['total_gaji'])) for item in self.items]
+        rows.sort(key=lambda r: (-r['total_gaji'], r['id']))
+        return Ranking(generation, rows)
+
+_ranking = None
+
+def bump_ranking(db, totals=None):
+    """Naikkan generasi 'ranking' dan catat total_kerja baru per karyawan ({user_id: total})
+    di koneksi, agar setelah commit peringkat worker ini cukup ditambal (apply_ranking_patch)
+    tanpa query ulang. totals=None untuk perubahan lain (karyawan baru, nama, foto, rebuild)
+    yang tetap membangun ulang peringkat. Tidak melakukan commit."""
+    generation = bump_cache_generation(db, 'ranking')
+    start, known = generation - 1, {}
+    if db.ranking_patch is not None:
+        start, _, known = db.ranking_patch
+    if known is not None and totals is not None:
+        known = {**known, **totals}
+    else:
+        known = None
+    db.ranking_patch = (start, generation, known)
+
+def apply_ranking_patch(db):
+    """Dipanggil setelah commit. Generasi 'ranking' dikunci baris sampai commit, jadi jika cache
+    worker ini masih di generasi tepat sebelum transaksi, hasilnya sama dengan membangun ulang.
+    Selain itu cache dibiarkan basi dan get_ranking membangunnya ulang."""
+    global _ranking
+    patch, db.ranking_patch = db.ranking_patch, None
+    ranking = _ranking
+    if patch is None or ranking is None:
+        return
+    start, generation, totals = patch
+    if totals is None or ranking.generation != start:
+        return
+    patched = ranking.patched(generation, totals)
+    if patched is not None:
+        _ranking = patched
+
+def get_ranking():
+    """Peringkat per worker, dibangun ulang dari tabel saldo hanya jika generasi 'ranking' berubah.
+    Saldo sendiri sudah diperbarui per transaksi, jadi tidak perlu menjumlah ulang hasil_kerja."""
+    global _ranking
+    generation = get_cache_generation('ranking')
+    ranking = _ranking
+    record_cache('ranking', ranking is not None and ranking.generation == generation)
+    if ranking is None or ranking.generation != generation:
+        rows = get_db().execute('''
+            SELECT u.id, u.nama_lengkap, u.foto_profil, COALESCE(s.total_kerja, 0) as total_gaji
+            FROM users u
+            LEFT JOIN saldo s ON s.user_id = u.id
+            WHERE u.role = 'karyawan'
+            ORDER BY total_gaji DESC, u.id
+        ''').fetchall()
+        ranking = _ranking = Ranking(generation, rows)
+    return ranking
+
+DASHBOARD_CACHE_TTL = 15  # detik
+_dashboard_snapshot = None
+
+def get_dashboard_snapshot():
+    """KPI, grafik dan aktivitas terbaru dashboard BOS sebagai dict siap JSON.
+    Di-cache per worker sampai generasi 'ranking'/'dashboard' berubah atau DASHBOARD_CACHE_TTL lewat."""
+    global _dashboard_snapshot
+    key = (get_cache_generation('ranking'), get_cache_generation('dashboard'))
+    cached = _dashboard_snapshot
+    if cached and cached[0] == key and time.monotonic() - cached[1] < DASHBOARD_CACHE_TTL:
+        record_cache('dashboard', True)
+        return cached[2]
+    record_cache('dashboard', False)
+    
     db = get_db()
-    ukuran_list = db.execute('''
-        SELECT DISTINCT ukuran FROM harga ORDER BY ukuran
+    # Semua total dari saldo (satu baris per karyawan) dalam satu statement
+    kpi = db.execute('''
+        SELECT COUNT(*) as total_karyawan,
+               COALESCE(SUM(s.total_kerja), 0) as total_kerja,
+               COALESCE(SUM(s.total_bonus), 0) as total_bonus,
+               COALESCE(SUM(s.total_hutang), 0) as total_hutang,
+               (SELECT COUNT(*) FROM hasil_kerja WHERE status = 'pending') as pending_count
+        FROM users u
+        LEFT JOIN saldo s ON s.user_id = u.id
+        WHERE u.role = 'karyawan'
+    ''').fetchone()
+    recent_kerja = db.execute('''
+        SELECT hk.id, hk.created_at, hk.jumlah, hk.total_harga, hk.status,
+               u.nama_lengkap, hk.ukuran, hk.jenis
+        FROM hasil_kerja hk
+        JOIN users u ON hk.user_id = u.id
+        ORDER BY hk.created_at DESC
+        LIMIT 10
     ''').fetchall()
-    return [(u['ukuran'], u['ukuran'].replace('_', ' ').title()) for u in ukuran_list]
+    
+    total_gaji_semua = kpi['total_kerja'] + kpi['total_bonus']
+    snapshot = {
+        'total_karyawan': kpi['total_karyawan'],
+        'total_gaji_semua': total_gaji_semua,
+        'total_hutang_semua': kpi['total_hutang'],
+        'total_yang_harus_dibayar': total_gaji_semua - kpi['total_hutang'],
+        'pending_count': kpi['pending_count'],
+        'chart': [{'nama_lengkap': r['nama_lengkap'], 'total_gaji': r['total_gaji']}
+                  for r in get_ranking().top(10)],
+        'recent_kerja': [dict(r, created_at=str(r['created_at'])) for r in recent_kerja],
+    }
+    _dashboard_snapshot = (key, time.monotonic(), snapshot)
+    return snapshot
+
+def get_ukuran_choices():
+    return [(u, u.replace('_', ' ').title()) for u in get_harga_catalog().ukuran]
 
 def get_jenis_choices(ukuran=None):
-    db = get_db()
+    catalog = get_harga_catalog()
     if ukuran:
-        jenis_list = db.execute('''
-            SELECT DISTINCT jenis FROM harga WHERE ukuran = ? AND jenis IS NOT NULL ORDER BY jenis
-        ''', (ukuran,)).fetchall()
+        jenis_list = catalog.jenis_by_ukuran.get(ukuran, ())
     else:
-        jenis_list = db.execute('''
-            SELECT DISTINCT jenis FROM harga WHERE jenis IS NOT NULL ORDER BY jenis
-        ''').fetchall()
-    return [(j['jenis'], j['jenis'].title()) for j in jenis_list if j['jenis']]
+        jenis_list = catalog.jenis
+    return [(j, j.title()) for j in jenis_list]
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'png', 'jpg', 'jpeg'}
 
+# Foto profil disimpan sebagai varian per ukuran dan format: u<id>_<hash>_<ukuran>.<ext>.
+# Kolom users.foto_profil hanya menyimpan stem u<id>_<hash>; foto lama masih berupa nama file biasa.
+PHOTO_SIZES = (48, 128, 300)
+PHOTO_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+PHOTO_VARIANT_RE = re.compile(r'^u\d+_[0-9a-f]{16}_\d+\.(webp|jpg)$')
+PHOTO_MAX_AGE = 365 * 24 * 3600
+
+def save_profile_photo(user_id, file):
+    """Simpan semua varian foto profil dan kembalikan stem-nya untuk users.foto_profil.
+    Nama berdasarkan hash isi file, jadi upload ulang foto yang sama tidak menulis apa pun."""
+    data = file.read()
+    stem = f'u{user_id}_{hashlib.sha256(data).hexdigest()[:16]}'
+    if all(os.path.exists(photo_path(stem, size, ext)) for size in PHOTO_SIZES for ext in PHOTO_FORMATS):
+        return stem
+
+    img = Image.open(BytesIO(data))
+    # JPEG besar langsung di-decode pada skala yang cukup untuk varian terbesar
+    img.draft('RGB', (PHOTO_SIZES[-1] * 2, PHOTO_SIZES[-1] * 2))
+    img = ImageOps.exif_transpose(img)
+    if img.mode != 'RGB':
+        rgba = img.convert('RGBA')
+        img = Image.new('RGB', rgba.size, 'white')
+        img.paste(rgba, mask=rgba.getchannel('A'))
+
+    # Perkecil bertahap dari ukuran terbesar
+    for size in sorted(PHOTO_SIZES, reverse=True):
+        img.thumbnail((size, size), Image.LANCZOS)
+        for ext, (fmt, options) in PHOTO_FORMATS.items():
+            path = photo_path(stem, size, ext)
+            img.save(f'{path}.tmp', fmt, **options)
+            os.replace(f'{path}.tmp', path)
+    return stem
+
+def stage_profile_photo(user_id, file):
+    """Validasi singkat upload lalu simpan file mentahnya untuk job 'profile_photo'"""
+    data = file.read()
+    Image.open(BytesIO(data)).verify()
+    folder = app.config['UPLOAD_STAGING_DIR']
+    os.makedirs(folder, exist_ok=True)
+    name = f'u{user_id}_{hashlib.sha256(data).hexdigest()[:16]}'
+    with open(os.path.join(folder, name), 'wb') as f:
+        f.write(data)
+    return name
+
+def photo_path(stem, size, ext):
+    return os.path.join(app.config['UPLOAD_FOLDER'], f'{stem}_{size}.{ext}')
+
+def delete_profile_photo(foto_profil):
+    """Hapus semua varian foto (atau file foto lama)"""
+    if not foto_profil:
+        return
+    if '.' in foto_profil:
+        remove_file(os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(foto_profil)))
+        return
+    for size in PHOTO_SIZES:
+        for ext in PHOTO_FORMATS:
+            remove_file(photo_path(foto_profil, size, ext))
+
+@app.template_global()
+def avatar_url(foto_profil, size, ext='jpg'):
+    """URL varian foto profil terkecil yang >= size"""
+    if '.' in foto_profil:
+        return url_for('uploaded_file', filename=foto_profil)
+    size = min((s for s in PHOTO_SIZES if s >= size), default=PHOTO_SIZES[-1])
+    return url_for('uploaded_file', filename=f'{foto_profil}_{size}.{ext}')
+
+# ==================== PAGINATION ====================
+
+COUNT_CACHE_TTL = 30  # detik
+_count_cache = {}
+
+def cached_count(db, query, params=()):
+    """COUNT(*) yang di-cache per worker selama COUNT_CACHE_TTL detik.
+    Query sebaiknya hanya menyentuh satu tabel agar bisa dilayani index."""
+    key = (query, tuple(params))
+    now = time.monotonic()
+    cached = _count_cache.get(key)
+    if cached and now - cached[0] < COUNT_CACHE_TTL:
+        record_cache('count', True)
+        return cached[1]
+    record_cache('count', False)
+    total = db.execute(query, params).fetchone()[0]
+    if len(_count_cache) > 1000:
+        _count_cache.clear()
+    _count_cache[key] = (now, total)
+    return total
+
+def encode_cursor(value, row_id):
+    raw = json.dumps([value, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(token):
+    """Kembalikan (nilai kolom urut, id) dari cursor, atau None jika tidak valid.
+    Nilai harus skalar (teks/angka/null) karena langsung dipakai sebagai parameter query."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        value, row_id = json.loads(raw)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return None
+    if (value is not None and type(value) not in (str, int, float)) or type(row_id) is not int:
+        return None
+    return value, row_id
+
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+def keyset_paginate(db, query, params, alias, per_page, sort_column=None, descending=True):
+    """Pagination dengan cursor (kolom urut, id), default terbaru lebih dulu.
+
+    `query` adalah SELECT yang sudah memiliki klausa WHERE, tanpa ORDER BY/LIMIT.
+    `alias` adalah alias tabel pemilik kolom id; `sort_column` default `{alias}.created_at`
+    dan harus ikut ter-SELECT dengan nama yang sama. Kolom urut harus NOT NULL (baris NULL
+    tidak lolos perbandingan cursor, lihat migrasi 0012). Cursor dibaca dari parameter
+    ?after= (halaman berikutnya) atau ?before= (halaman sebelumnya).
+    """
+    params = list(params)
+    sort_column = sort_column or f'{alias}.created_at'
+    sort_key = sort_column.rsplit('.', 1)[-1]
+    before = decode_cursor(request.args.get('before', ''))
+    after = decode_cursor(request.args.get('after', ''))
+    key = f'({sort_column}, {alias}.id)'
+    forward, backward = ('DESC', 'ASC') if descending else ('ASC', 'DESC')
+    older, newer = ('<', '>') if descending else ('>', '<')
+
+    if before:
+        rows = db.execute(f'{query} AND {key} {newer} (?, ?) '
+                          f'ORDER BY {sort_column} {backward}, {alias}.id {backward} LIMIT ?',
+                          params + [*before, per_page + 1]).fetchall()
+        has_prev = len(rows) > per_page
+        items = rows[:per_page][::-1]
+        has_next = True
+    else:
+        if after:
+            query += f' AND {key} {older} (?, ?)'
+            params += list(after)
+        rows = db.execute(f'{query} ORDER BY {sort_column} {forward}, {alias}.id {forward} LIMIT ?',
+                          params + [per_page + 1]).fetchall()
+        has_next = len(rows) > per_page
+        items = rows[:per_page]
+        has_prev = after is not None
+
+    if not items:
+        return KeysetPage(items)
+    first, last = items[0], items[-1]
+    return KeysetPage(items,
+                      next_cursor=encode_cursor(last[sort_key], last['id']) if has_next else None,
+                      prev_cursor=encode_cursor(first[sort_key], first['id']) if has_prev else None)
+
+def month_range(bulan):
+    """Ubah 'YYYY-MM' menjadi rentang ('YYYY-MM-01', 'YYYY-MM+1-01') untuk filter berbasis index"""
+    try:
+        start = datetime.strptime(bulan, '%Y-%m')
+    except (TypeError, ValueError):
+        return None
+    end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+
+def sort_option(options):
+    """Baca ?sort= dan kembalikan (key, kolom, descending) dari daftar opsi yang diizinkan"""
+    sort = request.args.get('sort', '')
+    if sort not in options:
+        sort = next(iter(options))
+    return (sort,) + options[sort]
+
+SLIP_SORT = {
+    'terbaru': ('sg.created_at', True),
+    'terlama': ('sg.created_at', False),
+    'gaji_tertinggi': ('sg.gaji_bersih', True),
+}
+RESET_SORT = {
+    'terbaru': ('rg.created_at', True),
+    'terlama': ('rg.created_at', False),
+    'gaji_tertinggi': ('rg.total_gaji_sebelumnya', True),
+}
+HUTANG_SORT = {
+    'terbaru': ('h.created_at', True),
+    'terlama': ('h.created_at', False),
+    'nominal_tertinggi': ('h.nominal', True),
+}
+BOS_HASIL_KERJA_SQL = '''
+    SELECT hk.*, u.nama_lengkap
+    FROM hasil_kerja hk
+    JOIN users u ON hk.user_id = u.id
+    WHERE 1=1
+'''
+BOS_HUTANG_SQL = '''
+    SELECT h.*, u.nama_lengkap
+    FROM hutang h
+    JOIN users u ON h.user_id = u.id
+    WHERE 1=1
+'''
+BOS_BONUS_SQL = '''
+    SELECT b.*, u.nama_lengkap
+    FROM bonus b
+    JOIN users u ON b.user_id = u.id
+    WHERE 1=1
+'''
+BOS_SLIP_SQL = '''
+    SELECT sg.*, u.nama_lengkap
+    FROM slip_gaji sg
+    JOIN users u ON sg.user_id = u.id
+    WHERE 1=1
+'''
+BOS_RESET_SQL = '''
+    SELECT rg.*, u.nama_lengkap
+    FROM reset_gaji rg
+    JOIN users u ON rg.user_id = u.id
+    WHERE 1=1
+'''
+
+# Kolom teks yang bisa dicari per tabel. SQLite: tabel FTS5 <tabel>_fts (dijaga trigger),
+# Postgres: index GIN to_tsvector atas ekspresi yang sama. Lihat migrasi 0010.
+SEARCH_COLUMNS = {
+    'users': ('nama_lengkap', 'username'),
+    'hutang': ('keterangan',),
+    'bonus': ('keterangan',),
+    'reset_gaji': ('keterangan',),
+}
+SEARCH_MAX_TERMS = 8
+
+def search_ids(table, text):
+    """Subquery (sql, params) berisi id baris table yang memuat semua kata di text sebagai
+    awalan kata ('bud san' cocok dengan 'Budi Santoso'). None jika text tidak berisi kata."""
+    terms = re.findall(r'\w+', text.lower())[:SEARCH_MAX_TERMS]
+    if not terms:
+        return None
+    if is_postgres():
+        expr = " || ' ' || ".join(f"COALESCE({c}, '')" for c in SEARCH_COLUMNS[table])
+        return (f"SELECT id FROM {table} WHERE to_tsvector('simple', {expr}) @@ to_tsquery('simple', ?)",
+                [' & '.join(f'{t}:*' for t in terms)])
+    return (f'SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH ?',
+            [' '.join(f'"{t}"*' for t in terms)])
+
+def search_condition(text, user_column, table=None, id_column=None):
+    """Kondisi SQL: user_column milik karyawan yang namanya cocok, atau (jika table diisi)
+    id_column baris table yang keterangannya cocok"""
+    users = search_ids('users', text)
+    if users is None:
+        return '', []
+    conditions, params = f'{user_column} IN ({users[0]})', users[1]
+    if table:
+        rows = search_ids(table, text)
+        conditions = f'({conditions} OR {id_column} IN ({rows[0]}))'
+        params = params + rows[1]
+    return ' AND ' + conditions, params
+
+# Filter daftar bos dari query string. Dipakai halaman dan export agar hasilnya sama.
+# Masing-masing mengembalikan (kondisi SQL tambahan, params).
+
+def hasil_kerja_filter():
+    conditions, params = '', []
+    status_filter = request.args.get('status', '')
+    if status_filter:
+        conditions += ' AND hk.status = ?'
+        params.append(status_filter)
+    search_sql, search_params = search_condition(request.args.get('search', ''), 'hk.user_id')
+    return conditions + search_sql, params + search_params
+
+def hutang_filter():
+    conditions, params = '', []
+    status_filter = request.args.get('status', '')
+    if status_filter:
+        conditions += ' AND h.status = ?'
+        params.append(status_filter)
+    search_sql, search_params = search_condition(request.args.get('search', ''),
+                                                 'h.user_id', 'hutang', 'h.id')
+    return conditions + search_sql, params + search_params
+
+def bonus_filter():
+    return search_condition(request.args.get('search', ''), 'b.user_id', 'bonus', 'b.id')
+
+def slip_gaji_filter():
+    conditions, params = '', []
+    user_filter = request.args.get('user_id', type=int)
+    if user_filter:
+        conditions += ' AND sg.user_id = ?'
+        params.append(user_filter)
+    periode = request.args.get('periode', '')
+    if periode:
+        conditions += ' AND sg.periode = ?'
+        params.append(periode)
+    return conditions, params
+
+def riwayat_reset_filter():
+    conditions, params = '', []
+    user_filter = request.args.get('user_id', type=int)
+    if user_filter:
+        conditions += ' AND rg.user_id = ?'
+        params.append(user_filter)
+    rentang = month_range(request.args.get('bulan', ''))
+    if rentang:
+        conditions += ' AND rg.created_at >= ? AND rg.created_at < ?'
+        params.extend(rentang)
+    return conditions, params
+
+KARYAWAN_SORT = {
+    'nama': ('k.nama_lengkap', False),
+    'gaji_tertinggi': ('k.total_gaji', True),
+    'hutang_tertinggi': ('k.total_hutang', True),
+    'bonus_tertinggi': ('k.total_bonus', True),
+    'bersih_tertinggi': ('k.gaji_bersih', True),
+}
+
 # ==================== AUTH ROUTES ====================
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -283,9 +1587,10 @@ def auth_login():
         db = get_db()
         user = db.execute('SELECT * FROM users WHERE username = ?', (form.username.data,)).fetchone()
         
-        if user and check_password_hash(user['password_hash'], form.password.data):
-            user_obj = User(user['id'], user['username'], user['role'], 
-                          user['nama_lengkap'], user['whatsapp'], user['foto_profil'])
+        if user and verify_password(user['password_hash'], form.password.data):
+            if password_needs_rehash(user['password_hash']):
+                rehash_password(db, user, form.password.data)
+            user_obj = User.from_row(user)
             login_user(user_obj, remember=True, duration=timedelta(days=30))
             flash(f'Selamat datang, {user["nama_lengkap"]}!', 'success')
             next_page = request.args.get('next')
@@ -314,8 +1619,9 @@ def auth_register():
         db.execute('''
             INSERT INTO users (username, password_hash, role, nama_lengkap, whatsapp, created_at)
             VALUES (?, ?, ?, ?, ?, ?)
-        ''', (form.username.data, generate_password_hash(form.password.data), 
+        ''', (form.username.data, hash_password(form.password.data), 
               'karyawan', form.nama_lengkap.data, form.whatsapp.data, datetime.now()))
+        bump_ranking(db)
         db.commit()
         
         flash('Registrasi berhasil! Silakan login.', 'success')
@@ -342,30 +1648,22 @@ def dashboard():
     db = get_db()
     
     # Get statistics
-    total_gaji_kotor = get_total_gaji_kotor(current_user.id)
-    total_hutang = get_total_hutang_aktif(current_user.id)
-    total_bonus = get_total_bonus(current_user.id)
+    saldo = get_saldo(current_user.id)
+    total_gaji_kotor = saldo['total_kerja']
+    total_hutang = saldo['total_hutang']
+    total_bonus = saldo['total_bonus']
     gaji_bersih = total_gaji_kotor + total_bonus - total_hutang
     
     # Get leaderboard
-    leaderboard = db.execute('''
-        SELECT u.id, u.nama_lengkap, u.foto_profil,
-               COALESCE(SUM(h.total_harga), 0) as total_gaji
-        FROM users u
-        LEFT JOIN hasil_kerja h ON u.id = h.user_id AND h.status = 'approved'
-        WHERE u.role = 'karyawan'
-        GROUP BY u.id
-        ORDER BY total_gaji DESC
-        LIMIT 10
-    ''').fetchall()
+    ranking = get_ranking()
+    leaderboard = ranking.top(10)
+    my_rank = ranking.rank(current_user.id)
     
     # Get recent hasil kerja
     recent_kerja = db.execute('''
-        SELECT hk.*, h.ukuran as ukuran_nama, h.jenis as jenis_nama
-        FROM hasil_kerja hk
-        LEFT JOIN harga h ON hk.harga_id = h.id
-        WHERE hk.user_id = ?
-        ORDER BY hk.created_at DESC
+        SELECT * FROM hasil_kerja
+        WHERE user_id = ?
+        ORDER BY created_at DESC
         LIMIT 5
     ''', (current_user.id,)).fetchall()
     
@@ -375,6 +1673,8 @@ def dashboard():
                          total_bonus=total_bonus,
                          gaji_bersih=gaji_bersih,
                          leaderboard=leaderboard,
+                         my_rank=my_rank,
+                         total_karyawan=len(ranking.items),
                          recent_kerja=recent_kerja)
 
 # ==================== HASIL KERJA ROUTES ====================
@@ -397,21 +1697,18 @@ def hasil_kerja():
         jumlah = form.jumlah.data
         
         # Get harga_id
-        if jenis:
-            harga_row = db.execute('''
-                SELECT id, harga FROM harga WHERE ukuran = ? AND jenis = ?
-            ''', (ukuran, jenis)).fetchone()
-        else:
-            harga_row = db.execute('''
-                SELECT id, harga FROM harga WHERE ukuran = ? AND jenis IS NULL
-            ''', (ukuran,)).fetchone()
+        harga_row = get_harga_catalog().lookup(ukuran, jenis)
         
         if harga_row:
-            total_harga = jumlah * harga_row['harga']
+            harga_id, harga_satuan = harga_row
+            total_harga = jumlah * harga_satuan
             db.execute('''
-                INSERT INTO hasil_kerja (user_id, harga_id, jumlah, total_harga, status, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (current_user.id, harga_row['id'], jumlah, total_harga, 'pending', datetime.now()))
+                INSERT INTO hasil_kerja (user_id, harga_id, jumlah, total_harga, status, created_at,
+                                         ukuran, jenis, harga_satuan)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (current_user.id, harga_id, jumlah, total_harga, 'pending', datetime.now(),
+                  ukuran, jenis, harga_satuan))
+            bump_cache_generation(db, 'dashboard')
             db.commit()
             flash('Hasil kerja berhasil disimpan. Menunggu approval BOS.', 'success')
             return redirect(url_for('hasil_kerja'))
@@ -419,35 +1716,25 @@ def hasil_kerja():
             flash('Harga tidak ditemukan.', 'danger')
     
     # Get all hasil kerja for this user
-    page = request.args.get('page', 1, type=int)
     per_page = 10
     
-    total = db.execute('SELECT COUNT(*) FROM hasil_kerja WHERE user_id = ?', 
-                      (current_user.id,)).fetchone()[0]
+    total = cached_count(db, 'SELECT COUNT(*) FROM hasil_kerja WHERE user_id = ?',
+                         (current_user.id,))
     
-    hasil_kerja_list = db.execute('''
-        SELECT hk.*, h.ukuran, h.jenis, h.harga as harga_satuan
-        FROM hasil_kerja hk
-        JOIN harga h ON hk.harga_id = h.id
+    pagination = keyset_paginate(db, '''
+        SELECT hk.* FROM hasil_kerja hk
         WHERE hk.user_id = ?
-        ORDER BY hk.created_at DESC
-        LIMIT ? OFFSET ?
-    ''', (current_user.id, per_page, (page - 1) * per_page)).fetchall()
-    
-    total_pages = (total + per_page - 1) // per_page
+    ''', [current_user.id], 'hk', per_page)
     
     return render_template('dashboard/hasil_kerja.html', form=form, 
-                         hasil_kerja_list=hasil_kerja_list, 
-                         page=page, total_pages=total_pages, total=total)
+                         hasil_kerja_list=pagination.items, 
+                         pagination=pagination, total=total)
 
 @app.route('/api/get-jenis/<ukuran>')
 @login_required
 def api_get_jenis(ukuran):
-    db = get_db()
-    jenis_list = db.execute('''
-        SELECT jenis FROM harga WHERE ukuran = ? AND jenis IS NOT NULL
-    ''', (ukuran,)).fetchall()
-    return jsonify([{'jenis': j['jenis']} for j in jenis_list])
+    jenis_list = get_harga_catalog().jenis_by_ukuran.get(ukuran, ())
+    return jsonify([{'jenis': j} for j in jenis_list])
 
 # ==================== HUTANG ROUTES ====================
 
@@ -459,9 +1746,22 @@ def hutang_list():
     
     db = get_db()
     
-    hutang_list = db.execute('''
-        SELECT * FROM hutang WHERE user_id = ? ORDER BY created_at DESC
-    ''', (current_user.id,)).fetchall()
+    per_page = 10
+    bulan = request.args.get('bulan', '')
+    status_filter = request.args.get('status', '')
+    sort, sort_column, descending = sort_option(HUTANG_SORT)
+    
+    query = 'SELECT h.* FROM hutang h WHERE h.user_id = ?'
+    params = [current_user.id]
+    if status_filter:
+        query += ' AND h.status = ?'
+        params.append(status_filter)
+    rentang = month_range(bulan)
+    if rentang:
+        query += ' AND h.tanggal >= ? AND h.tanggal < ?'
+        params.extend(rentang)
+    
+    pagination = keyset_paginate(db, query, params, 'h', per_page, sort_column, descending)
     
     total_aktif = get_total_hutang_aktif(current_user.id)
     total_lunas = db.execute('''
@@ -470,9 +1770,11 @@ def hutang_list():
     ''', (current_user.id,)).fetchone()['total'] or 0
     
     return render_template('dashboard/hutang.html', 
-                         hutang_list=hutang_list, 
+                         hutang_list=pagination.items, 
+                         pagination=pagination,
                          total_aktif=total_aktif,
-                         total_lunas=total_lunas)
+                         total_lunas=total_lunas,
+                         bulan=bulan, status_filter=status_filter, sort=sort)
 
 # ==================== SLIP GAJI ROUTES ====================
 
@@ -484,11 +1786,25 @@ def slip_gaji():
     
     db = get_db()
     
-    slip_list = db.execute('''
-        SELECT * FROM slip_gaji WHERE user_id = ? ORDER BY created_at DESC
-    ''', (current_user.id,)).fetchall()
+    per_page = 10
+    periode = request.args.get('periode', '')
+    sort, sort_column, descending = sort_option(SLIP_SORT)
+    
+    query = 'SELECT sg.* FROM slip_gaji sg WHERE sg.user_id = ?'
+    params = [current_user.id]
+    if periode:
+        query += ' AND sg.periode = ?'
+        params.append(periode)
+    
+    pagination = keyset_paginate(db, query, params, 'sg', per_page, sort_column, descending)
     
-    return render_template('dashboard/slip_gaji.html', slip_list=slip_list)
+    periode_list = [r['periode'] for r in db.execute('''
+        SELECT DISTINCT periode FROM slip_gaji WHERE user_id = ? ORDER BY periode
+    ''', (current_user.id,)).fetchall()]
+    
+    return render_template('dashboard/slip_gaji.html', slip_list=pagination.items,
+                         pagination=pagination, periode_list=periode_list,
+                         periode=periode, sort=sort)
 
 @app.route('/slip-gaji/generate', methods=['POST'])
 @login_required
@@ -502,47 +1818,28 @@ def generate_slip():
     periode = request.form.get('periode', datetime.now().strftime('%B %Y'))
     
     # Calculate totals
-    total_kerja = get_total_gaji_kotor(current_user.id)
-    bonus = get_total_bonus(current_user.id)
-    hutang = get_total_hutang_aktif(current_user.id)
+    saldo = get_saldo(current_user.id)
+    total_kerja = saldo['total_kerja']
+    bonus = saldo['total_bonus']
+    hutang = saldo['total_hutang']
     gaji_bersih = total_kerja + bonus - hutang
     
     # Save slip to database
-    cursor = db.execute('''
+    slip_id = db.execute('''
         INSERT INTO slip_gaji (user_id, periode, total_kerja, bonus, hutang, gaji_bersih, created_at)
         VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (current_user.id, periode, total_kerja, bonus, hutang, gaji_bersih, datetime.now()))
+        RETURNING id
+    ''', (current_user.id, periode, total_kerja, bonus, hutang, gaji_bersih, datetime.now())).fetchone()[0]
     db.commit()
     
-    slip_id = cursor.lastrowid
     flash('Slip gaji berhasil dibuat!', 'success')
     return redirect(url_for('download_slip', slip_id=slip_id))
 
-@app.route('/slip-gaji/download/<int:slip_id>')
-@login_required
-def download_slip(slip_id):
-    db = get_db()
-    
-    slip = db.execute('''
-        SELECT sg.*, u.nama_lengkap, u.whatsapp
-        FROM slip_gaji sg
-        JOIN users u ON sg.user_id = u.id
-        WHERE sg.id = ? AND sg.user_id = ?
-    ''', (slip_id, current_user.id)).fetchone()
-    
-    if not slip and not current_user.is_bos():
-        flash('Slip gaji tidak ditemukan.', 'danger')
-        return redirect(url_for('slip_gaji'))
-    
-    if not slip:
-        slip = db.execute('''
-            SELECT sg.*, u.nama_lengkap, u.whatsapp
-            FROM slip_gaji sg
-            JOIN users u ON sg.user_id = u.id
-            WHERE sg.id = ?
-        ''', (slip_id,)).fetchone()
-    
-    # Generate PDF
+SLIP_PDF_FIELDS = ('id', 'nama_lengkap', 'periode', 'created_at', 'total_kerja', 'bonus', 'hutang', 'gaji_bersih')
+SLIP_PDF_LAYOUT = 1  # naikkan jika tampilan PDF diubah, agar cache lama tidak dipakai
+
+def render_slip_pdf(slip):
+    """Buat PDF slip gaji dan kembalikan bytes-nya"""
     pdf = FPDF()
     pdf.add_page()
     pdf.set_auto_page_break(auto=True, margin=15)
@@ -585,13 +1882,129 @@ def download_slip(slip_id):
     pdf.set_font('Arial', '', 10)
     pdf.cell(0, 8, 'Dicetak pada: ' + datetime.now().strftime('%d-%m-%Y %H:%M'), 0, 1, 'C')
     
-    # Output
     output = BytesIO()
     pdf.output(output)
-    output.seek(0)
+    return output.getvalue()
+
+def slip_pdf_etag(slip):
+    """Hash isi slip yang tercetak di PDF, dipakai sebagai nama file cache dan ETag"""
+    data = [SLIP_PDF_LAYOUT] + [slip[f] for f in SLIP_PDF_FIELDS]
+    return hashlib.sha256(json.dumps(data, default=str).encode()).hexdigest()[:32]
+
+def get_slip_pdf(slip):
+    """Path PDF slip di cache disk beserta ETag-nya. PDF hanya dibuat jika belum ada
+    (atau isi slip berubah, mis. nama karyawan diganti)."""
+    path, etag = slip_pdf_path(slip)
+    try:
+        # atime dipakai sebagai urutan LRU; mtime tetap = waktu render (Last-Modified)
+        os.utime(path, (time.time(), os.stat(path).st_mtime))
+        record_cache('slip_pdf', True)
+        return path, etag
+    except FileNotFoundError:
+        record_cache('slip_pdf', False)
+
+    remove_stale_slip_pdf(slip['id'])
+    PDF_RENDER.observe(value=write_slip_pdf(slip, path))
+    evict_slip_cache()
+    return path, etag
+
+def slip_pdf_path(slip):
+    """(path, etag) file cache untuk slip, tanpa memeriksa apakah file sudah ada"""
+    etag = slip_pdf_etag(slip)
+    return os.path.join(app.config['SLIP_CACHE_DIR'], f'slip_{slip["id"]}_{etag}.pdf'), etag
+
+def remove_stale_slip_pdf(slip_id):
+    cache_dir = app.config['SLIP_CACHE_DIR']
+    os.makedirs(cache_dir, exist_ok=True)
+    for name in os.listdir(cache_dir):
+        if name.startswith(f'slip_{slip_id}_'):
+            remove_file(os.path.join(cache_dir, name))
+
+def write_slip_pdf(slip, path):
+    """Render slip dan tulis ke path secara atomik. Dipanggil juga dari proses pool.
+    Mengembalikan lama render (detik) untuk metrik."""
+    started = time.perf_counter()
+    data = render_slip_pdf(slip)
+    elapsed = time.perf_counter() - started
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return elapsed
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def evict_slip_cache():
+    """Hapus PDF yang paling lama tidak diakses sampai total ukuran cache di bawah SLIP_CACHE_MAX_BYTES"""
+    cache_dir = app.config['SLIP_CACHE_DIR']
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith('.pdf'):
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_atime, st.st_size, entry.path))
+    total = sum(e[1] for e in entries)
+    limit = app.config['SLIP_CACHE_MAX_BYTES']
+    if total <= limit:
+        return
+    for atime, size, path in sorted(entries):
+        remove_file(path)
+        total -= size
+        if total <= limit * 0.9:
+            break
+
+@app.route('/slip-gaji/download/<int:slip_id>')
+@login_required
+def download_slip(slip_id):
+    db = get_db()
     
-    return send_file(output, mimetype='application/pdf', 
-                    as_attachment=True, download_name=f'slip_gaji_{slip_id}.pdf')
+    slip = db.execute('''
+        SELECT sg.*, u.nama_lengkap, u.whatsapp
+        FROM slip_gaji sg
+        JOIN users u ON sg.user_id = u.id
+        WHERE sg.id = ? AND sg.user_id = ?
+    ''', (slip_id, current_user.id)).fetchone()
+    
+    if not slip and not current_user.is_bos():
+        flash('Slip gaji tidak ditemukan.', 'danger')
+        return redirect(url_for('slip_gaji'))
+    
+    if not slip:
+        slip = db.execute('''
+            SELECT sg.*, u.nama_lengkap, u.whatsapp
+            FROM slip_gaji sg
+            JOIN users u ON sg.user_id = u.id
+            WHERE sg.id = ?
+        ''', (slip_id,)).fetchone()
+        if not slip:
+            abort(404)
+    
+    # ETag dihitung dari isi slip, jadi 304 bisa dijawab walau file cache sudah dibuang
+    path, etag = slip_pdf_path(slip)
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.max_age = 0
+        return response
+    # PDF yang belum ada di cache dirender oleh worker job
+    if not os.path.exists(path):
+        job_id = submit_job('slip_pdf', {'slip_id': slip['id']}, user_id=slip['user_id'],
+                            dedupe_key=f"{slip['id']}:{etag}")
+        if not os.path.exists(path):
+            return job_pending_response(job_id, request.url)
+    path, etag = get_slip_pdf(slip)
+    response = send_file(path, mimetype='application/pdf', as_attachment=True,
+                         download_name=f'slip_gaji_{slip_id}.pdf',
+                         etag=etag, conditional=True, max_age=0)
+    response.cache_control.private = True
+    return response
 
 # ==================== PROFILE ROUTES ====================
 
@@ -612,35 +2025,36 @@ def profile():
                 flash('Username sudah digunakan.', 'danger')
                 return redirect(url_for('profile'))
         
-        # Handle foto profil upload
-        foto_profil = current_user.foto_profil
+        # Foto profil divalidasi di sini, varian ukurannya dibuat oleh worker job
+        upload = None
         if form.foto_profil.data:
             file = form.foto_profil.data
             if file and allowed_file(file.filename):
-                filename = secure_filename(f'user_{current_user.id}_{file.filename}')
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                
-                # Resize image
-                img = Image.open(file)
-                img.thumbnail((300, 300))
-                img.save(filepath)
-                
-                foto_profil = filename
+                try:
+                    upload = stage_profile_photo(current_user.id, file)
+                except (OSError, ValueError, Image.DecompressionBombError):
+                    flash('File gambar tidak valid.', 'danger')
+                    return redirect(url_for('profile'))
         
         db.execute('''
-            UPDATE users SET username = ?, nama_lengkap = ?, whatsapp = ?, foto_profil = ?
+            UPDATE users SET username = ?, nama_lengkap = ?, whatsapp = ?
             WHERE id = ?
-        ''', (form.username.data, form.nama_lengkap.data, form.whatsapp.data, 
-              foto_profil, current_user.id))
+        ''', (form.username.data, form.nama_lengkap.data, form.whatsapp.data, current_user.id))
+        bump_ranking(db)
         db.commit()
+        invalidate_user_cache(current_user.id)
         
         # Update current user
         current_user.username = form.username.data
         current_user.nama_lengkap = form.nama_lengkap.data
         current_user.whatsapp = form.whatsapp.data
-        current_user.foto_profil = foto_profil
         
-        flash('Profil berhasil diperbarui.', 'success')
+        if upload:
+            submit_job('profile_photo', {'user_id': current_user.id, 'upload': upload},
+                       user_id=current_user.id, dedupe_key=upload)
+            flash('Profil berhasil diperbarui. Foto profil sedang diproses.', 'success')
+        else:
+            flash('Profil berhasil diperbarui.', 'success')
         return redirect(url_for('profile'))
     
     elif request.method == 'GET':
@@ -650,11 +2064,9 @@ def profile():
     
     # Get user's work history
     kerja_history = db.execute('''
-        SELECT hk.*, h.ukuran, h.jenis
-        FROM hasil_kerja hk
-        JOIN harga h ON hk.harga_id = h.id
-        WHERE hk.user_id = ?
-        ORDER BY hk.created_at DESC
+        SELECT * FROM hasil_kerja
+        WHERE user_id = ?
+        ORDER BY created_at DESC
         LIMIT 10
     ''', (current_user.id,)).fetchall()
     
@@ -675,15 +2087,23 @@ def change_password():
         db = get_db()
         user = db.execute('SELECT * FROM users WHERE id = ?', (current_user.id,)).fetchone()
         
-        if not check_password_hash(user['password_hash'], password_form.current_password.data):
+        if not verify_password(user['password_hash'], password_form.current_password.data):
             flash('Password saat ini salah.', 'danger')
             return redirect(url_for('profile'))
         
-        new_hash = generate_password_hash(password_form.new_password.data)
-        db.execute('UPDATE users SET password_hash = ? WHERE id = ?', 
-                  (new_hash, current_user.id))
+        new_hash = hash_password(password_form.new_password.data)
+        # Versi sesi naik, jadi sesi lain milik user ini (perangkat lain) ikut keluar
+        db.execute('''
+            UPDATE users SET password_hash = ?, session_version = session_version + 1
+            WHERE id = ?
+        ''', (new_hash, current_user.id))
+        bump_cache_generation(db, 'users')
         db.commit()
-        
+        invalidate_user_cache(current_user.id)
+        # Sesi ini tetap login dengan versi yang baru
+        login_user(load_user(f"{current_user.id}:{user['session_version'] + 1}"),
+                   remember=True, duration=timedelta(days=30))
+
         flash('Password berhasil diubah.', 'success')
     else:
         for error in password_form.errors.values():
@@ -697,67 +2117,8 @@ def change_password():
 @login_required
 @bos_required
 def bos_dashboard():
-    db = get_db()
-    
-    # Statistics
-    total_karyawan = db.execute('SELECT COUNT(*) FROM users WHERE role = ?', ('karyawan',)).fetchone()[0]
-    
-    total_gaji_semua = db.execute('''
-        SELECT COALESCE(SUM(total_harga), 0) FROM hasil_kerja WHERE status = 'approved'
-    ''').fetchone()[0] or 0
-    
-    total_hutang_semua = db.execute('''
-        SELECT COALESCE(SUM(nominal), 0) FROM hutang WHERE status = 'aktif'
-    ''').fetchone()[0] or 0
-    total_bonus_semua = db.execute('''
-    SELECT COALESCE(SUM(nominal), 0) FROM bonus
-''').fetchone()[0] or 0
-
-    total_yang_harus_dibayar = (total_gaji_semua + total_bonus_semua) - total_hutang_semua
-    total_gaji_semua_bonus = total_gaji_semua + total_bonus_semua
-
-    #total_yang_harus_dibayar = total_gaji_semua - total_hutang_semua
-    
-    # Pending approvals
-    pending_count = db.execute('''
-        SELECT COUNT(*) FROM hasil_kerja WHERE status = 'pending'
-    ''').fetchone()[0]
-    
-    # Chart data - Gaji per karyawan
-    chart_data = db.execute('''
-        SELECT u.nama_lengkap, COALESCE(SUM(hk.total_harga), 0) as total
-        FROM users u
-        LEFT JOIN hasil_kerja hk ON u.id = hk.user_id AND hk.status = 'approved'
-        WHERE u.role = 'karyawan'
-        GROUP BY u.id
-        ORDER BY total DESC
-        LIMIT 10
-    ''').fetchall()
-    
-    # Recent activities
-    recent_kerja = db.execute('''
-        SELECT hk.*, u.nama_lengkap, h.ukuran, h.jenis
-        FROM hasil_kerja hk
-        JOIN users u ON hk.user_id = u.id
-        JOIN harga h ON hk.harga_id = h.id
-        ORDER BY hk.created_at DESC
-        LIMIT 10
-    ''').fetchall()
-    
-    # Karyawan list for reset dropdown
-    karyawan_list = db.execute('''
-        SELECT id, nama_lengkap FROM users WHERE role = ? ORDER BY nama_lengkap
-    ''', ('karyawan',)).fetchall()
-    
-    return render_template('bos/dashboard.html',
-                         total_karyawan=total_karyawan,
-                         karyawan_list=karyawan_list,
-                         total_gaji_semua=total_gaji_semua_bonus,
-                         total_hutang_semua=total_hutang_semua,
-                         total_yang_harus_dibayar=total_yang_harus_dibayar,
-                         pending_count=pending_count,
-                         chart_data=chart_data,
-                         recent_kerja=recent_kerja)
+    # Grafik dimuat terpisah dari api_dashboard agar halaman langsung tampil
+    return render_template('bos/dashboard.html', **get_dashboard_snapshot())
 
 @app.route('/bos/hasil-kerja')
 @login_required
@@ -765,41 +2126,25 @@ def bos_dashboard():
 def bos_hasil_kerja():
     db = get_db()
     
-    page = request.args.get('page', 1, type=int)
     status_filter = request.args.get('status', '')
     search = request.args.get('search', '')
     per_page = 15
     
-    query = '''
-        SELECT hk.*, u.nama_lengkap, h.ukuran, h.jenis, h.harga as harga_satuan
-        FROM hasil_kerja hk
-        JOIN users u ON hk.user_id = u.id
-        JOIN harga h ON hk.harga_id = h.id
-        WHERE 1=1
-    '''
-    params = []
-    
-    if status_filter:
-        query += ' AND hk.status = ?'
-        params.append(status_filter)
-    
-    if search:
-        query += ' AND u.nama_lengkap LIKE ?'
-        params.append(f'%{search}%')
-    
-    query += ' ORDER BY hk.created_at DESC'
-    
-    total = db.execute(f'SELECT COUNT(*) FROM ({query})', params).fetchone()[0]
+    conditions, params = hasil_kerja_filter()
+    # Count hanya menyentuh hasil_kerja agar bisa dilayani index
+    total = cached_count(db, 'SELECT COUNT(*) FROM hasil_kerja hk WHERE 1=1' + conditions, params)
+    pagination = keyset_paginate(db, BOS_HASIL_KERJA_SQL + conditions, params, 'hk', per_page)
+    hasil_kerja_list = pagination.items
     
-    query += ' LIMIT ? OFFSET ?'
-    params.extend([per_page, (page - 1) * per_page])
-    
-    hasil_kerja_list = db.execute(query, params).fetchall()
-    total_pages = (total + per_page - 1) // per_page
+    # Karyawan list for bulk approve per karyawan
+    karyawan_list = db.execute('''
+        SELECT id, nama_lengkap FROM users WHERE role = ? ORDER BY nama_lengkap
+    ''', ('karyawan',)).fetchall()
     
     return render_template('bos/hasil_kerja.html',
                          hasil_kerja_list=hasil_kerja_list,
-                         page=page, total_pages=total_pages, total=total,
+                         karyawan_list=karyawan_list,
+                         pagination=pagination, total=total,
                          status_filter=status_filter, search=search)
 
 @app.route('/bos/hasil-kerja/approve/<int:kerja_id>', methods=['POST'])
@@ -807,7 +2152,7 @@ def bos_hasil_kerja():
 @bos_required
 def approve_kerja(kerja_id):
     db = get_db()
-    db.execute('UPDATE hasil_kerja SET status = ? WHERE id = ?', ('approved', kerja_id))
+    set_kerja_status(db, kerja_id, 'approved')
     db.commit()
     flash('Hasil kerja telah di-approve.', 'success')
     return redirect(url_for('bos_hasil_kerja'))
@@ -817,11 +2162,49 @@ def approve_kerja(kerja_id):
 @bos_required
 def reject_kerja(kerja_id):
     db = get_db()
-    db.execute('UPDATE hasil_kerja SET status = ? WHERE id = ?', ('rejected', kerja_id))
+    set_kerja_status(db, kerja_id, 'rejected')
     db.commit()
     flash('Hasil kerja telah di-reject.', 'info')
     return redirect(url_for('bos_hasil_kerja'))
 
+@app.route('/bos/hasil-kerja/bulk', methods=['POST'])
+@login_required
+@bos_required
+def bulk_kerja():
+    """Approve/reject banyak hasil kerja dalam satu transaksi.
+    Menerima daftar kerja_ids, atau user_id untuk semua pending milik karyawan tersebut."""
+    db = get_db()
+
+    action = request.form.get('action')
+    status = {'approve': 'approved', 'reject': 'rejected'}.get(action)
+    wants_json = request.accept_mimetypes.best == 'application/json'
+    if not status:
+        if wants_json:
+            return jsonify({'error': 'Aksi tidak valid'}), 400
+        flash('Aksi tidak valid.', 'danger')
+        return redirect(url_for('bos_hasil_kerja'))
+
+    kerja_ids = request.form.getlist('kerja_ids', type=int)
+    user_id = request.form.get('user_id', type=int)
+    if user_id:
+        kerja_ids += [r['id'] for r in db.execute('''
+            SELECT id FROM hasil_kerja WHERE user_id = ? AND status = 'pending'
+        ''', (user_id,)).fetchall()]
+
+    results = set_kerja_status_bulk(db, kerja_ids, status)
+    db.commit()
+
+    changed = sum(1 for r in results.values() if r == status)
+    if wants_json:
+        return jsonify({'status': status, 'changed': changed,
+                        'results': {str(k): v for k, v in results.items()}})
+
+    if changed:
+        flash(f'{changed} hasil kerja telah di-{action}.', 'success' if status == 'approved' else 'info')
+    else:
+        flash('Tidak ada hasil kerja pending yang dipilih.', 'warning')
+    return redirect(url_for('bos_hasil_kerja'))
+
 @app.route('/bos/harga', methods=['GET', 'POST'])
 @login_required
 @bos_required
@@ -848,6 +2231,7 @@ def bos_harga():
             ''', (ukuran, jenis, harga))
             flash('Harga berhasil ditambahkan.', 'success')
         
+        bump_cache_generation(db, 'harga')
         db.commit()
         return redirect(url_for('bos_harga'))
     
@@ -860,6 +2244,7 @@ def bos_harga():
 def delete_harga(harga_id):
     db = get_db()
     db.execute('DELETE FROM harga WHERE id = ?', (harga_id,))
+    bump_cache_generation(db, 'harga')
     db.commit()
     flash('Harga berhasil dihapus.', 'success')
     return redirect(url_for('bos_harga'))
@@ -881,45 +2266,35 @@ def bos_hutang():
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (form.user_id.data, form.nominal.data, form.keterangan.data,
               form.tanggal.data, 'aktif', datetime.now()))
+        update_saldo(db, form.user_id.data, hutang=form.nominal.data)
         db.commit()
         flash('Hutang berhasil ditambahkan.', 'success')
         return redirect(url_for('bos_hutang'))
     
-    page = request.args.get('page', 1, type=int)
     status_filter = request.args.get('status', '')
+    search = request.args.get('search', '')
     per_page = 15
     
-    query = '''
-        SELECT h.*, u.nama_lengkap
-        FROM hutang h
-        JOIN users u ON h.user_id = u.id
-        WHERE 1=1
-    '''
-    params = []
-    
-    if status_filter:
-        query += ' AND h.status = ?'
-        params.append(status_filter)
+    conditions, params = hutang_filter()
+    total = cached_count(db, 'SELECT COUNT(*) FROM hutang h WHERE 1=1' + conditions, params)
+    pagination = keyset_paginate(db, BOS_HUTANG_SQL + conditions, params, 'h', per_page)
     
-    query += ' ORDER BY h.created_at DESC'
-    
-    total = db.execute(f'SELECT COUNT(*) FROM ({query})', params).fetchone()[0]
-    query += ' LIMIT ? OFFSET ?'
-    params.extend([per_page, (page - 1) * per_page])
-    
-    hutang_list = db.execute(query, params).fetchall()
-    total_pages = (total + per_page - 1) // per_page
-    
-    return render_template('bos/hutang.html', form=form, hutang_list=hutang_list,
-                         page=page, total_pages=total_pages, total=total,
-                         status_filter=status_filter)
+    return render_template('bos/hutang.html', form=form, hutang_list=pagination.items,
+                         pagination=pagination, total=total,
+                         status_filter=status_filter, search=search)
 
 @app.route('/bos/hutang/lunasi/<int:hutang_id>', methods=['POST'])
 @login_required
 @bos_required
 def lunasi_hutang(hutang_id):
     db = get_db()
-    db.execute('UPDATE hutang SET status = ? WHERE id = ?', ('lunas', hutang_id))
+    # Saldo hanya dikurangi jika request ini yang benar-benar mengubah status aktif -> lunas
+    hutang = db.execute('''
+        UPDATE hutang SET status = 'lunas' WHERE id = ? AND status = 'aktif'
+        RETURNING user_id, nominal
+    ''', (hutang_id,)).fetchone()
+    if hutang:
+        update_saldo(db, hutang['user_id'], hutang=-hutang['nominal'])
     db.commit()
     flash('Hutang telah dilunasi.', 'success')
     return redirect(url_for('bos_hutang'))
@@ -930,26 +2305,33 @@ def lunasi_hutang(hutang_id):
 def bos_karyawan():
     db = get_db()
     
-    total_bonus = get_total_bonus(current_user.id)
-    karyawan_list = db.execute('''
-        SELECT u.*,
-               COALESCE(SUM(hk.total_harga), 0) +
-               (SELECT COALESCE(SUM(nominal), 0) FROM bonus WHERE user_id = u.id) as total_gaji,
-               (SELECT COALESCE(SUM(nominal), 0) FROM hutang WHERE user_id = u.id AND status = 'aktif') as total_hutang,
-               (SELECT COALESCE(SUM(nominal), 0) FROM bonus WHERE user_id = u.id) as total_bonus
-        FROM users u
-        LEFT JOIN hasil_kerja hk ON u.id = hk.user_id AND hk.status = 'approved'
-        WHERE u.role = 'karyawan'
-        GROUP BY u.id
-    ''').fetchall()
+    per_page = 12
+    sort, sort_column, descending = sort_option(KARYAWAN_SORT)
+    
+    # Total per karyawan diambil dari saldo (satu baris per user), bukan SUM per request
+    query = '''
+        SELECT * FROM (
+            SELECT u.id, u.username, u.nama_lengkap, u.whatsapp, u.foto_profil,
+                   COALESCE(s.total_kerja, 0) + COALESCE(s.total_bonus, 0) as total_gaji,
+                   COALESCE(s.total_bonus, 0) as total_bonus,
+                   COALESCE(s.total_hutang, 0) as total_hutang,
+                   COALESCE(s.total_kerja, 0) + COALESCE(s.total_bonus, 0)
+                       - COALESCE(s.total_hutang, 0) as gaji_bersih
+            FROM users u
+            LEFT JOIN saldo s ON s.user_id = u.id
+            WHERE u.role = 'karyawan'
+        ) k
+        WHERE 1=1
+    '''
+    pagination = keyset_paginate(db, query, [], 'k', per_page, sort_column, descending)
     
-    return render_template('bos/karyawan.html', karyawan_list=karyawan_list, total_bonus=total_bonus)
+    return render_template('bos/karyawan.html', karyawan_list=pagination.items,
+                         pagination=pagination, sort=sort)
 
 @app.route('/bos/reset_gaji/<int:user_id>', methods=['POST'])
 @login_required
 @bos_required
 def reset_gaji(user_id):
-  
     db = get_db()
 
     # Pastikan karyawan ada
@@ -958,78 +2340,47 @@ def reset_gaji(user_id):
         flash('Karyawan tidak ditemukan.', 'danger')
         return redirect(url_for('bos_dashboard'))
     
-    # Hapus hasil kerja
-    db.execute('DELETE FROM hasil_kerja WHERE user_id = ?', (user_id,))
-    
-    # Hapus bonus
-    db.execute('DELETE FROM bonus WHERE user_id = ?', (user_id,))
-    
-    # Nonaktifkan atau hapus hutang aktif
-    db.execute('UPDATE hutang SET status = "nonaktif" WHERE user_id = ?', (user_id,))
-    
+    # Total dicatat ke riwayat reset, lalu data finansial dikosongkan (lihat reset_saldo)
+    keterangan = request.form.get('keterangan') or 'Reset gaji periode baru'
+    reset_saldo(db, keterangan, user_id)
     db.commit()
     flash(f'Gaji dan data finansial {user["nama_lengkap"]} telah direset.', 'success')
     return redirect(url_for('bos_karyawan'))
 
-
-"""@app.route('/bos/reset-gaji', methods=['POST'])
+@app.route('/bos/reset-gaji', methods=['POST'])
 @login_required
 @bos_required
-def reset_gaji():
+def reset_gaji_all():
+    """Tutup periode: reset gaji semua karyawan dalam satu transaksi"""
     db = get_db()
-    
-    user_id = request.form.get('user_id')
-    keterangan = request.form.get('keterangan', 'Reset gaji periode baru')
-    
-    if user_id == 'all':
-        # Reset all karyawan
-        karyawan_list = db.execute('SELECT id FROM users WHERE role = ?', ('karyawan',)).fetchall()
-        for k in karyawan_list:
-            # Archive current data
-            total_gaji = get_total_gaji_kotor(k['id'])
-            total_hutang = get_total_hutang_aktif(k['id'])
-            
-            db.execute('''
-                INSERT INTO reset_gaji (user_id, total_gaji_sebelumnya, total_hutang_sebelumnya, keterangan, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (k['id'], total_gaji, total_hutang, keterangan, datetime.now()))
-            
-            # Delete hasil kerja and bonus
-            db.execute('DELETE FROM hasil_kerja WHERE user_id = ?', (k['id'],))
-            db.execute('DELETE FROM bonus WHERE user_id = ?', (k['id'],))
-        
-        flash('Gaji semua karyawan telah direset.', 'success')
-    else:
-        user_id = int(user_id)
-        total_gaji = get_total_gaji_kotor(user_id)
-        total_hutang = get_total_hutang_aktif(user_id)
-        
-        db.execute('''
-            INSERT INTO reset_gaji (user_id, total_gaji_sebelumnya, total_hutang_sebelumnya, keterangan, created_at)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (user_id, total_gaji, total_hutang, keterangan, datetime.now()))
-        
-        db.execute('DELETE FROM hasil_kerja WHERE user_id = ?', (user_id,))
-        db.execute('DELETE FROM bonus WHERE user_id = ?', (user_id,))
-        flash('Gaji karyawan telah direset.', 'success')
-    
+    keterangan = request.form.get('keterangan') or 'Reset gaji periode baru'
+    count = reset_saldo(db, keterangan)
     db.commit()
-    return redirect(url_for('bos_dashboard'))
-"""
+    flash(f'Gaji {count} karyawan telah direset.', 'success')
+    return redirect(url_for('bos_karyawan'))
+
 @app.route('/bos/riwayat-reset')
 @login_required
 @bos_required
 def bos_riwayat_reset():
     db = get_db()
     
-    riwayat = db.execute('''
-        SELECT rg.*, u.nama_lengkap
-        FROM reset_gaji rg
-        JOIN users u ON rg.user_id = u.id
-        ORDER BY rg.created_at DESC
-    ''').fetchall()
+    per_page = 15
+    user_filter = request.args.get('user_id', type=int)
+    bulan = request.args.get('bulan', '')
+    sort, sort_column, descending = sort_option(RESET_SORT)
+    
+    conditions, params = riwayat_reset_filter()
+    pagination = keyset_paginate(db, BOS_RESET_SQL + conditions, params, 'rg', per_page,
+                                 sort_column, descending)
+    
+    karyawan_list = db.execute('''
+        SELECT id, nama_lengkap FROM users WHERE role = ? ORDER BY nama_lengkap
+    ''', ('karyawan',)).fetchall()
     
-    return render_template('bos/riwayat_reset.html', riwayat=riwayat)
+    return render_template('bos/riwayat_reset.html', riwayat=pagination.items,
+                         pagination=pagination, karyawan_list=karyawan_list,
+                         user_filter=user_filter, bulan=bulan, sort=sort)
 
 @app.route('/bos/slip-gaji')
 @login_required
@@ -1037,14 +2388,144 @@ def bos_riwayat_reset():
 def bos_slip_gaji():
     db = get_db()
     
-    slip_list = db.execute('''
-        SELECT sg.*, u.nama_lengkap
+    per_page = 15
+    user_filter = request.args.get('user_id', type=int)
+    periode = request.args.get('periode', '')
+    sort, sort_column, descending = sort_option(SLIP_SORT)
+    
+    conditions, params = slip_gaji_filter()
+    pagination = keyset_paginate(db, BOS_SLIP_SQL + conditions, params, 'sg', per_page,
+                                 sort_column, descending)
+    
+    karyawan_list = db.execute('''
+        SELECT id, nama_lengkap FROM users WHERE role = ? ORDER BY nama_lengkap
+    ''', ('karyawan',)).fetchall()
+    periode_list = [r['periode'] for r in db.execute(
+        'SELECT DISTINCT periode FROM slip_gaji ORDER BY periode').fetchall()]
+    
+    return render_template('bos/slip_gaji.html', slip_list=pagination.items,
+                         pagination=pagination, karyawan_list=karyawan_list,
+                         periode_list=periode_list, user_filter=user_filter,
+                         periode=periode, sort=sort)
+
+class ZipStream:
+    """File-like tujuan ZipFile yang tidak bisa di-seek; isi yang sudah ditulis
+    diambil dengan drain() agar arsip bisa dikirim sepotong-sepotong."""
+    def __init__(self):
+        self.buffer = bytearray()
+        self.offset = 0
+
+    def write(self, data):
+        self.buffer += data
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+def render_slip_pdfs(slips):
+    """Pastikan PDF semua slip ada di cache. Yang belum ada dirender paralel di process pool.
+    Menghasilkan (slip, path) sesuai urutan `slips`, begitu file siap."""
+    jobs = []
+    for slip in slips:
+        path, _ = slip_pdf_path(slip)
+        if os.path.exists(path):
+            jobs.append((slip, path, None))
+        else:
+            remove_stale_slip_pdf(slip['id'])
+            jobs.append((slip, path, dict(slip)))
+
+    missing = sum(1 for job in jobs if job[2] is not None)
+    workers = min(app.config['SLIP_RENDER_WORKERS'], missing)
+    if workers <= 1:
+        for slip, path, data in jobs:
+            if data is not None:
+                PDF_RENDER.observe(value=write_slip_pdf(data, path))
+            yield slip, path
+        return
+
+    # Proses render dibuat dengan spawn, bukan fork: worker gthread punya thread lain (pool hash
+    # password, lock pool database) yang lock-nya bisa ikut tersalin terkunci ke proses anak.
+    # Batasi jumlah task yang berjalan agar hasil tidak menumpuk di memori
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        pending = deque()
+        for job in jobs:
+            slip, path, data = job
+            future = executor.submit(write_slip_pdf, data, path) if data is not None else None
+            pending.append((slip, path, future))
+            while len(pending) > workers * 2:
+                yield finish_render(pending.popleft())
+        while pending:
+            yield finish_render(pending.popleft())
+
+def finish_render(job):
+    slip, path, future = job
+    if future is not None:
+        PDF_RENDER.observe(value=future.result())
+    return slip, path
+
+@app.route('/bos/slip-gaji/generate-all', methods=['POST'])
+@login_required
+@bos_required
+def generate_slip_all():
+    """Payroll run: buat slip untuk semua karyawan dalam satu transaksi,
+    lalu kirim semua PDF periode tersebut sebagai ZIP yang di-stream"""
+    periode = (request.form.get('periode') or '').strip()
+    if not periode:
+        flash('Periode wajib diisi.', 'danger')
+        return redirect(url_for('bos_slip_gaji'))
+
+    db = get_db()
+    # Satu INSERT ... SELECT dari saldo; karyawan yang sudah punya slip periode ini dilewati
+    created = db.execute('''
+        INSERT INTO slip_gaji (user_id, periode, total_kerja, bonus, hutang, gaji_bersih, created_at)
+        SELECT u.id, ?,
+               COALESCE(s.total_kerja, 0), COALESCE(s.total_bonus, 0), COALESCE(s.total_hutang, 0),
+               COALESCE(s.total_kerja, 0) + COALESCE(s.total_bonus, 0) - COALESCE(s.total_hutang, 0),
+               ?
+        FROM users u
+        LEFT JOIN saldo s ON s.user_id = u.id
+        WHERE u.role = 'karyawan'
+          AND NOT EXISTS (SELECT 1 FROM slip_gaji sg WHERE sg.user_id = u.id AND sg.periode = ?)
+    ''', (periode, datetime.now(), periode)).rowcount
+    db.commit()
+
+    slips = db.execute('''
+        SELECT sg.*, u.nama_lengkap, u.whatsapp
         FROM slip_gaji sg
         JOIN users u ON sg.user_id = u.id
-        ORDER BY sg.created_at DESC
-    ''').fetchall()
-    
-    return render_template('bos/slip_gaji.html', slip_list=slip_list)
+        WHERE sg.periode = ? AND u.role = 'karyawan'
+        ORDER BY u.nama_lengkap, sg.id
+    ''', (periode,)).fetchall()
+    if not slips:
+        flash('Belum ada karyawan untuk dibuatkan slip.', 'warning')
+        return redirect(url_for('bos_slip_gaji'))
+
+    def generate():
+        stream = ZipStream()
+        with zipfile.ZipFile(stream, 'w', zipfile.ZIP_STORED) as archive:
+            for slip, path in render_slip_pdfs(slips):
+                name = secure_filename(f'slip_gaji_{slip["id"]}_{slip["nama_lengkap"]}.pdf')
+                with open(path, 'rb') as src, archive.open(name, 'w') as dst:
+                    shutil.copyfileobj(src, dst, 64 * 1024)
+                yield stream.drain()
+        yield stream.drain()
+        evict_slip_cache()
+
+    response = app.response_class(stream_with_context(generate()), mimetype='application/zip')
+    filename = secure_filename(f'slip_gaji_{periode}.zip')
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.headers['X-Slip-Created'] = str(created)
+    return response
 
 # ==================== BONUS ROUTES ====================
 
@@ -1064,64 +2545,621 @@ def bos_bonus():
             INSERT INTO bonus (user_id, nominal, keterangan, created_at)
             VALUES (?, ?, ?, ?)
         ''', (form.user_id.data, form.nominal.data, form.keterangan.data, datetime.now()))
+        update_saldo(db, form.user_id.data, bonus=form.nominal.data)
         db.commit()
         flash('Bonus berhasil ditambahkan!', 'success')
         return redirect(url_for('bos_bonus'))
     
     # Get all bonus with karyawan info
-    page = request.args.get('page', 1, type=int)
+    search = request.args.get('search', '')
     per_page = 15
     
-    total = db.execute('SELECT COUNT(*) FROM bonus').fetchone()[0]
+    conditions, params = bonus_filter()
+    total = cached_count(db, 'SELECT COUNT(*) FROM bonus b WHERE 1=1' + conditions, params)
     
-    bonus_list = db.execute('''
-        SELECT b.*, u.nama_lengkap
-        FROM bonus b
-        JOIN users u ON b.user_id = u.id
-        ORDER BY b.created_at DESC
-        LIMIT ? OFFSET ?
-    ''', (per_page, (page - 1) * per_page)).fetchall()
+    pagination = keyset_paginate(db, BOS_BONUS_SQL + conditions, params, 'b', per_page)
     
-    total_pages = (total + per_page - 1) // per_page
-    
-    return render_template('bos/bonus.html', form=form, bonus_list=bonus_list,
-                         page=page, total_pages=total_pages, total=total)
+    return render_template('bos/bonus.html', form=form, bonus_list=pagination.items,
+                         pagination=pagination, total=total, search=search)
 
 @app.route('/bos/bonus/delete/<int:bonus_id>', methods=['POST'])
 @login_required
 @bos_required
 def delete_bonus(bonus_id):
     db = get_db()
-    db.execute('DELETE FROM bonus WHERE id = ?', (bonus_id,))
+    bonus = db.execute('DELETE FROM bonus WHERE id = ? RETURNING user_id, nominal',
+                       (bonus_id,)).fetchone()
+    if bonus:
+        update_saldo(db, bonus['user_id'], bonus=-bonus['nominal'])
     db.commit()
     flash('Bonus berhasil dihapus.', 'success')
     return redirect(url_for('bos_bonus'))
 
+# ==================== SEARCH ROUTES ====================
+
+SEARCH_RESULT_LIMIT = 10
+# hasil -> (query daftar bos, alias, tabel di SEARCH_COLUMNS)
+SEARCH_SOURCES = {
+    'hutang': (BOS_HUTANG_SQL, 'h', 'hutang'),
+    'bonus': (BOS_BONUS_SQL, 'b', 'bonus'),
+    'reset_gaji': (BOS_RESET_SQL, 'rg', 'reset_gaji'),
+}
+
+def search_all(db, text, limit=SEARCH_RESULT_LIMIT):
+    """Cari nama karyawan dan keterangan hutang, bonus, reset gaji sekaligus.
+    Hutang dan bonus hanya dari periode berjalan (yang sudah diarsipkan tidak diindeks)."""
+    results = {'karyawan': []}
+    results.update((key, []) for key in SEARCH_SOURCES)
+    users = search_ids('users', text)
+    if users is None:
+        return results
+    results['karyawan'] = [dict(r) for r in db.execute(f'''
+        SELECT id, username, nama_lengkap, whatsapp FROM users
+        WHERE role = 'karyawan' AND id IN ({users[0]})
+        ORDER BY nama_lengkap
+        LIMIT ?
+    ''', users[1] + [limit]).fetchall()]
+    for key, (query, alias, table) in SEARCH_SOURCES.items():
+        sql, params = search_ids(table, text)
+        results[key] = [dict(r) for r in db.execute(
+            f'{query} AND {alias}.id IN ({sql}) ORDER BY {alias}.id DESC LIMIT ?',
+            params + [limit]).fetchall()]
+    return results
+
+@app.route('/bos/cari')
+@login_required
+@bos_required
+def bos_cari():
+    q = request.args.get('q', '').strip()
+    hasil = search_all(get_db(), q) if q else None
+    return render_template('bos/cari.html', q=q, hasil=hasil)
+
+@app.route('/api/search')
+@login_required
+def api_search():
+    """Pencarian gabungan untuk BOS. Parameter: q, limit (maks 50)."""
+    if not current_user.is_bos():
+        return jsonify({'error': 'Unauthorized'}), 403
+    q = request.args.get('q', '').strip()
+    limit = max(1, min(request.args.get('limit', SEARCH_RESULT_LIMIT, type=int), 50))
+    return jsonify({'q': q, **search_all(get_db(), q, limit)})
+
+# ==================== EXPORT ROUTES ====================
+
+# dataset -> (query, filter, alias, opsi sort, kolom [(judul, key)])
+EXPORTS = {
+    'hasil-kerja': (BOS_HASIL_KERJA_SQL, hasil_kerja_filter, 'hk', None, [
+        ('Tanggal', 'created_at'), ('Karyawan', 'nama_lengkap'), ('Ukuran', 'ukuran'),
+        ('Jenis', 'jenis'), ('Jumlah', 'jumlah'), ('Harga Satuan', 'harga_satuan'),
+        ('Total', 'total_harga'), ('Status', 'status')]),
+    'hutang': (BOS_HUTANG_SQL, hutang_filter, 'h', None, [
+        ('Tanggal', 'tanggal'), ('Karyawan', 'nama_lengkap'), ('Keterangan', 'keterangan'),
+        ('Nominal', 'nominal'), ('Status', 'status'), ('Dibuat', 'created_at')]),
+    'bonus': (BOS_BONUS_SQL, bonus_filter, 'b', None, [
+        ('Tanggal', 'created_at'), ('Karyawan', 'nama_lengkap'), ('Keterangan', 'keterangan'),
+        ('Nominal', 'nominal')]),
+    'slip-gaji': (BOS_SLIP_SQL, slip_gaji_filter, 'sg', SLIP_SORT, [
+        ('Tanggal', 'created_at'), ('Karyawan', 'nama_lengkap'), ('Periode', 'periode'),
+        ('Total Kerja', 'total_kerja'), ('Bonus', 'bonus'), ('Hutang', 'hutang'),
+        ('Gaji Bersih', 'gaji_bersih')]),
+    'riwayat-reset': (BOS_RESET_SQL, riwayat_reset_filter, 'rg', RESET_SORT, [
+        ('Tanggal', 'created_at'), ('Karyawan', 'nama_lengkap'),
+        ('Total Gaji Sebelumnya', 'total_gaji_sebelumnya'),
+        ('Total Hutang Sebelumnya', 'total_hutang_sebelumnya'), ('Keterangan', 'keterangan')]),
+}
+# ?arsip=1: baca dari view *_semua agar periode yang sudah ditutup ikut diexport
+EXPORT_ARSIP = {
+    'hasil-kerja': ('FROM hasil_kerja hk', 'FROM hasil_kerja_semua hk'),
+    'hutang': ('FROM hutang h', 'FROM hutang_semua h'),
+    'bonus': ('FROM bonus b', 'FROM bonus_semua b'),
+}
+EXPORT_BATCH_SIZE = 500
+
+def iter_query(db, query, params=(), batch_size=EXPORT_BATCH_SIZE):
+    """Iterasi hasil query per batch tanpa fetchall. Di Postgres memakai server-side cursor
+    agar baris tidak dimuat seluruhnya ke memori client."""
+    if is_postgres():
+        cursor = db.raw.cursor(name='export_stream', cursor_factory=psycopg2.extras.DictCursor)
+        cursor.itersize = batch_size
+        cursor.execute(PostgresConnection.translate(query, params), tuple(params) or None)
+    else:
+        cursor = db.execute(query, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+def stream_csv(columns, batches):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([title for title, _ in columns])
+    yield '\ufeff' + buffer.getvalue()  # BOM agar Excel membaca UTF-8
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([[row[key] for _, key in columns] for row in rows])
+        yield buffer.getvalue()
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Data" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'),
+}
+XML_INVALID_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+def xlsx_row(values):
+    cells = []
+    for value in values:
+        if value is None:
+            cells.append('<c/>')
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f'<c><v>{value}</v></c>')
+        else:
+            text = xml_escape(XML_INVALID_CHARS.sub('', str(value)))
+            cells.append(f'<c t="inlineStr"><is><t>{text}</t></is></c>')
+    return '<row>' + ''.join(cells) + '</row>'
+
+def stream_xlsx(columns, batches):
+    """Tulis workbook XLSX satu sheet secara streaming (tanpa library tambahan).
+    Sheet ditulis ke ZipFile per batch baris dan langsung dikirim."""
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                        b'<sheetData>')
+            sheet.write(xlsx_row([title for title, _ in columns]).encode())
+            yield stream.drain()
+            for rows in batches:
+                sheet.write(''.join(xlsx_row([row[key] for _, key in columns]) for row in rows).encode())
+                yield stream.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield stream.drain()
+
+@app.route('/bos/export/<dataset>')
+@login_required
+@bos_required
+def bos_export(dataset):
+    """Export daftar bos ke CSV/XLSX dengan filter yang sama seperti halamannya.
+    Baris dibaca dari cursor per batch dan langsung di-stream ke client."""
+    if dataset not in EXPORTS:
+        abort(404)
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'xlsx'):
+        abort(400)
+    query, filter_func, alias, sort_options, columns = EXPORTS[dataset]
+    if request.args.get('arsip') == '1' and dataset in EXPORT_ARSIP:
+        query = query.replace(*EXPORT_ARSIP[dataset])
+        dataset += '-semua-periode'
+
+    conditions, params = filter_func()
+    sort_column, descending = f'{alias}.created_at', True
+    if sort_options:
+        _, sort_column, descending = sort_option(sort_options)
+    direction = 'DESC' if descending else 'ASC'
+    query += f'{conditions} ORDER BY {sort_column} {direction}, {alias}.id {direction}'
+
+    batches = iter_query(get_db(), query, params)
+    if fmt == 'csv':
+        body, mimetype = stream_csv(columns, batches), 'text/csv; charset=utf-8'
+    else:
+        body = stream_xlsx(columns, batches)
+        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    response = app.response_class(stream_with_context(body), mimetype=mimetype)
+    filename = f'{dataset}_{datetime.now():%Y%m%d_%H%M}.{fmt}'
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.headers['X-Accel-Buffering'] = 'no'  # jangan di-buffer oleh nginx
+    return response
+
 # ==================== API ROUTES ====================
 
+@app.route('/api/dashboard')
+@login_required
+def api_dashboard():
+    """Snapshot dashboard BOS (KPI, grafik, aktivitas terbaru)"""
+    if not current_user.is_bos():
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify(get_dashboard_snapshot())
+
+STATISTIK_GRANULARITY = ('day', 'week', 'month')
+# breakdown -> (kolom rollup, JOIN dan kolom nama)
+STATISTIK_BREAKDOWN = {
+    'karyawan': ('user_id', 'JOIN users u ON u.id = x.user_id', 'u.nama_lengkap'),
+    'harga': ('harga_id', 'LEFT JOIN harga h ON h.id = x.harga_id', 'h.ukuran, h.jenis'),
+}
+
 @app.route('/api/statistics')
 @login_required
 def api_statistics():
+    """Total hasil kerja approved per periode dari rollup_harian.
+    Parameter: from/to (YYYY-MM-DD), granularity (day/week/month),
+    breakdown (karyawan/harga, opsional), user_id (opsional)."""
     if not current_user.is_bos():
         return jsonify({'error': 'Unauthorized'}), 403
     
-    db = get_db()
-    
-    # Monthly data for chart
-    monthly_data = db.execute('''
-        SELECT strftime('%Y-%m', created_at) as bulan,
-               SUM(total_harga) as total
-        FROM hasil_kerja
-        WHERE status = 'approved'
-        GROUP BY bulan
-        ORDER BY bulan DESC
-        LIMIT 12
-    ''').fetchall()
+    # Default: 12 bulan terakhir per bulan
+    today = datetime.now().date()
+    month, year = today.month - 11, today.year
+    if month < 1:
+        month, year = month + 12, year - 1
+    try:
+        start = datetime.strptime(request.args['from'], '%Y-%m-%d').date() \
+            if request.args.get('from') else today.replace(year=year, month=month, day=1)
+        end = datetime.strptime(request.args['to'], '%Y-%m-%d').date() \
+            if request.args.get('to') else today
+    except ValueError:
+        return jsonify({'error': 'Format tanggal harus YYYY-MM-DD'}), 400
+    granularity = request.args.get('granularity', 'month')
+    breakdown = request.args.get('breakdown', '')
+    user_id = request.args.get('user_id', type=int)
+    if start > end or granularity not in STATISTIK_GRANULARITY or \
+            (breakdown and breakdown not in STATISTIK_BREAKDOWN):
+        return jsonify({'error': 'Parameter tidak valid'}), 400
+    
+    group_column, join, names = STATISTIK_BREAKDOWN.get(breakdown, (None, '', None))
+    conditions = 'tanggal >= ? AND tanggal <= ?'
+    params = [start.isoformat(), end.isoformat()]
+    if user_id:
+        conditions += ' AND user_id = ?'
+        params.append(user_id)
+    group = f', {group_column}' if group_column else ''
+    
+    # Rollup hanya berisi satu baris per (tanggal, karyawan, harga), jadi biayanya
+    # bergantung pada panjang rentang, bukan jumlah baris hasil_kerja
+    rows = get_db().execute(f'''
+        SELECT x.*{', ' + names if names else ''}
+        FROM (
+            SELECT {sql_period('tanggal', granularity)} as periode{group},
+                   SUM(jumlah) as jumlah, SUM(total) as total
+            FROM rollup_harian
+            WHERE {conditions}
+            GROUP BY periode{group}
+        ) x
+        {join}
+        ORDER BY x.periode, x.total DESC
+    ''', params).fetchall()
     
     return jsonify({
-        'monthly': [{'bulan': m['bulan'], 'total': m['total']} for m in monthly_data]
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'granularity': granularity,
+        'breakdown': breakdown or None,
+        'data': [dict(r) for r in rows],
+    })
+
+# ==================== BACKGROUND JOBS ====================
+
+# Antrian job di tabel jobs, tanpa broker eksternal. Default-nya (JOBS_INLINE=1) job langsung
+# dijalankan di request. JOBS_INLINE=0 hanya jika worker berjalan sebagai proses sendiri
+# ("flask jobs worker", proses worker di Procfile); tanpa worker job tidak akan selesai.
+app.config['JOBS_INLINE'] = os.environ.get('JOBS_INLINE', '1') == '1'
+app.config['JOB_POLL_INTERVAL'] = float(os.environ.get('JOB_POLL_INTERVAL', 1.0))  # detik
+app.config['JOB_TIMEOUT'] = int(os.environ.get('JOB_TIMEOUT', 300))  # detik
+app.config['JOB_RETRY_DELAY'] = int(os.environ.get('JOB_RETRY_DELAY', 5))  # detik, dikali 2 tiap percobaan
+app.config['JOB_RETENTION_DAYS'] = int(os.environ.get('JOB_RETENTION_DAYS', 7))
+
+JOB_HANDLERS = {}
+
+def job_handler(kind):
+    """Daftarkan fungsi handler(db, payload) untuk jenis job `kind`.
+    Handler tidak perlu commit; run_job meng-commit hasilnya bersama status job."""
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+def enqueue_job(db, kind, payload, user_id=None, dedupe_key=None, max_attempts=3):
+    """Masukkan job ke antrian tanpa commit dan kembalikan id-nya. Job dengan kind dan
+    dedupe_key sama yang masih menunggu/berjalan dipakai ulang, bukan dibuat lagi."""
+    if dedupe_key is not None:
+        existing = db.execute('''
+            SELECT id FROM jobs WHERE kind = ? AND dedupe_key = ? AND status IN ('queued', 'running')
+        ''', (kind, dedupe_key)).fetchone()
+        if existing:
+            return existing['id']
+    now = datetime.now()
+    return db.execute('''
+        INSERT INTO jobs (kind, payload, dedupe_key, user_id, max_attempts, run_after, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        RETURNING id
+    ''', (kind, json.dumps(payload), dedupe_key, user_id, max_attempts, now, now, now)).fetchone()[0]
+
+def submit_job(kind, payload, user_id=None, dedupe_key=None):
+    """enqueue_job lalu commit. Dengan JOBS_INLINE job langsung dijalankan."""
+    db = get_db()
+    job_id = enqueue_job(db, kind, payload, user_id, dedupe_key)
+    db.commit()
+    if app.config['JOBS_INLINE']:
+        job = claim_job(db, 'inline', job_id)
+        if job is not None:
+            run_job(db, job)
+    return job_id
+
+def get_job(db, job_id):
+    return db.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+
+def claim_job(db, worker_id, job_id=None):
+    """Ambil satu job yang siap dan tandai 'running'. Mengembalikan baris job atau None."""
+    now = datetime.now()
+    pick = "SELECT id FROM jobs WHERE status = 'queued' AND run_after <= ?"
+    params = [now]
+    if job_id is not None:
+        pick += ' AND id = ?'
+        params.append(job_id)
+    pick += ' ORDER BY run_after, id LIMIT 1'
+    # Cek dulu tanpa lock tulis agar worker yang idle tidak terus mengunci database
+    if not db.execute(pick, params).fetchone():
+        return None
+    if is_postgres():
+        pick += ' FOR UPDATE SKIP LOCKED'
+    job = db.execute(f'''
+        UPDATE jobs SET status = 'running', attempts = attempts + 1,
+                        locked_by = ?, locked_at = ?, updated_at = ?
+        WHERE id = ({pick}) AND status = 'queued'
+        RETURNING *
+    ''', [worker_id, now, now] + params).fetchone()
+    db.commit()
+    return job
+
+def run_job(db, job):
+    """Jalankan handler job dan catat hasilnya. Jika gagal, job diantrikan lagi dengan
+    jeda JOB_RETRY_DELAY * 2^(percobaan-1) sampai max_attempts, lalu ditandai 'failed'."""
+    handler = JOB_HANDLERS.get(job['kind'])
+    try:
+        if handler is None:
+            raise LookupError(f"Jenis job tidak dikenal: {job['kind']}")
+        result = handler(db, json.loads(job['payload']))
+    except Exception as e:
+        db.rollback()
+        app.logger.exception('Job %s (%s) gagal', job['id'], job['kind'])
+        now = datetime.now()
+        retry = job['attempts'] < job['max_attempts']
+        delay = app.config['JOB_RETRY_DELAY'] * 2 ** (job['attempts'] - 1)
+        db.execute('''
+            UPDATE jobs SET status = ?, error = ?, run_after = ?, locked_by = NULL, updated_at = ?
+            WHERE id = ?
+        ''', ('queued' if retry else 'failed', f'{type(e).__name__}: {e}',
+              now + timedelta(seconds=delay), now, job['id']))
+        db.commit()
+        return False
+    db.execute('''
+        UPDATE jobs SET status = 'done', result = ?, error = NULL, locked_by = NULL, updated_at = ?
+        WHERE id = ?
+    ''', (json.dumps(result), datetime.now(), job['id']))
+    db.commit()
+    return True
+
+def requeue_stale_jobs(db):
+    """Job 'running' yang melewati JOB_TIMEOUT (worker mati) diantrikan lagi atau digagalkan"""
+    now = datetime.now()
+    db.execute('''
+        UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+                        error = 'Timeout', locked_by = NULL, updated_at = ?
+        WHERE status = 'running' AND locked_at < ?
+    ''', (now, now - timedelta(seconds=app.config['JOB_TIMEOUT'])))
+    db.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+               (now - timedelta(days=app.config['JOB_RETENTION_DAYS']),))
+    db.commit()
+
+def run_worker(burst=False):
+    """Loop worker job. burst=True berhenti begitu antrian kosong.
+    SIGTERM/SIGINT menghentikan loop setelah job yang sedang berjalan selesai."""
+    worker_id = f'{socket.gethostname()}:{os.getpid()}'
+    stop = threading.Event()
+    # Handler sinyal hanya bisa dipasang dari thread utama (server development memakai thread)
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stop.set())
+    last_maintenance = 0
+    while not stop.is_set():
+        with app.app_context():
+            db = get_db()
+            if time.monotonic() - last_maintenance > 60:
+                requeue_stale_jobs(db)
+                last_maintenance = time.monotonic()
+            job = claim_job(db, worker_id)
+            if job is not None:
+                run_job(db, job)
+        if job is None:
+            if burst:
+                return
+            stop.wait(app.config['JOB_POLL_INTERVAL'])
+
+def job_pending_response(job_id, next_url):
+    """Respons 202 untuk pekerjaan yang sedang diproses: JSON untuk API, halaman tunggu untuk browser"""
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({'job_id': job_id, 'status_url': url_for('job_status', job_id=job_id),
+                        'next_url': next_url}), 202
+    return render_template('dashboard/job_status.html', job_id=job_id, next_url=next_url), 202
+
+@job_handler('slip_pdf')
+def process_slip_pdf(db, payload):
+    slip = db.execute('''
+        SELECT sg.*, u.nama_lengkap, u.whatsapp
+        FROM slip_gaji sg
+        JOIN users u ON sg.user_id = u.id
+        WHERE sg.id = ?
+    ''', (payload['slip_id'],)).fetchone()
+    if slip:
+        get_slip_pdf(slip)
+    return {'slip_id': payload['slip_id']}
+
+@job_handler('profile_photo')
+def process_profile_photo(db, payload):
+    path = os.path.join(app.config['UPLOAD_STAGING_DIR'], payload['upload'])
+    if not os.path.exists(path):
+        return None  # sudah diproses oleh percobaan sebelumnya
+    with open(path, 'rb') as f:
+        stem = save_profile_photo(payload['user_id'], f)
+    old = db.execute('SELECT foto_profil FROM users WHERE id = ?', (payload['user_id'],)).fetchone()
+    db.execute('UPDATE users SET foto_profil = ? WHERE id = ?', (stem, payload['user_id']))
+    bump_ranking(db)
+    # File lama baru dihapus setelah users menunjuk ke foto baru
+    db.commit()
+    invalidate_user_cache(payload['user_id'])
+    if old and old['foto_profil'] != stem:
+        delete_profile_photo(old['foto_profil'])
+    remove_file(path)
+    return {'foto_profil': stem}
+
+@app.route('/jobs/<int:job_id>')
+@login_required
+def job_status(job_id):
+    """Status job untuk polling (pemilik job atau bos)"""
+    job = get_job(get_db(), job_id)
+    if not job or (job['user_id'] != current_user.id and not current_user.is_bos()):
+        return jsonify({'error': 'Job tidak ditemukan'}), 404
+    return jsonify({
+        'id': job['id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'attempts': job['attempts'],
+        'max_attempts': job['max_attempts'],
+        'result': json.loads(job['result']) if job['result'] else None,
+        'error': job['error'],
     })
 
+# ==================== CLI COMMANDS ====================
+
+@app.cli.group('db')
+def db_cli():
+    """Kelola skema database"""
+
+@db_cli.command('upgrade')
+def db_upgrade():
+    """Jalankan migrasi yang belum diterapkan"""
+    init_db()
+    with app.app_context():
+        print(f'Versi skema: {get_schema_version(get_db())}')
+
+@db_cli.command('version')
+def db_version():
+    """Tampilkan versi skema database dan migrasi yang belum diterapkan"""
+    with app.app_context():
+        db = get_db()
+        applied = {r['version'] for r in db.execute('SELECT version FROM schema_version')}
+        print(f'Versi skema: {get_schema_version(db)}')
+        for version, name, _ in load_migrations():
+            if version not in applied:
+                print(f'Belum diterapkan: {version:04d}_{name}')
+
+@app.cli.group()
+def jobs():
+    """Kelola antrian job latar belakang"""
+
+@jobs.command('worker')
+@click.option('--burst', is_flag=True, help='Berhenti setelah antrian kosong')
+def jobs_worker(burst):
+    """Jalankan worker job"""
+    run_worker(burst=burst)
+
+@jobs.command('status')
+def jobs_status():
+    """Tampilkan jumlah job per status"""
+    with app.app_context():
+        for row in get_db().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status ORDER BY status'):
+            print(f'{row[0]}: {row[1]}')
+
+@app.cli.group()
+def saldo():
+    """Kelola tabel saldo karyawan"""
+
+@saldo.command('rebuild')
+def saldo_rebuild():
+    """Hitung ulang tabel saldo dan rollup_harian dari data hasil kerja, bonus dan hutang"""
+    init_db()
+    with app.app_context():
+        db = get_db()
+        rebuild_rollup(db)
+        rebuild_saldo(db)
+    print('Saldo dan rollup harian berhasil dihitung ulang.')
+
+@saldo.command('verify')
+def saldo_verify():
+    """Cek apakah tabel saldo sesuai dengan data sebenarnya"""
+    with app.app_context():
+        selisih = verify_saldo(get_db())
+    for r in selisih:
+        print(f"user_id={r['user_id']}: kerja {r['saldo_kerja']} != {r['total_kerja']}, "
+              f"bonus {r['saldo_bonus']} != {r['total_bonus']}, "
+              f"hutang {r['saldo_hutang']} != {r['total_hutang']}")
+    if selisih:
+        raise SystemExit(f'{len(selisih)} saldo tidak sesuai. Jalankan "flask saldo rebuild".')
+    print('Semua saldo sesuai.')
+
+# ==================== HEALTH CHECK ====================
+
+@app.route('/health')
+def health_check():
+    """Cek koneksi database dan statistik pool untuk load balancer/monitoring"""
+    try:
+        conn = get_db()
+        conn.execute('SELECT 1').fetchone()
+        journal_mode = None if is_postgres() else conn.execute('PRAGMA journal_mode').fetchone()[0]
+        pool_idle = get_pool().idle_count()
+    except db_errors() as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 503
+    return jsonify({
+        'status': 'ok',
+        'backend': app.config['DB_BACKEND'],
+        'journal_mode': journal_mode,
+        'pool_idle': pool_idle,
+        'pool_size': app.config['DB_POOL_SIZE'],
+        **db_stats,
+    })
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Metrik proses ini dalam format teks Prometheus. Berisi teks SQL dan nama route, jadi
+    scraper harus mengirim header Authorization: Bearer <METRICS_TOKEN>; jika token tidak
+    diisi hanya request dari localhost yang dilayani."""
+    token = app.config['METRICS_TOKEN']
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(403)
+    elif request.remote_addr not in ('127.0.0.1', '::1'):
+        abort(403)
+    worker = str(os.getpid())
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render(worker))
+    for name, value in db_stats.items():
+        lines.append(f'# TYPE gaji_db_{name}_total counter')
+        lines.append(f'gaji_db_{name}_total{{{metric_labels([("worker", worker)])}}} {value}')
+    lines.append('')
+    return app.response_class('\n'.join(lines), mimetype='text/plain; version=0.0.4')
+
 # ==================== ERROR HANDLERS ====================
 
 @app.errorhandler(404)
@@ -1132,9 +3170,16 @@ def not_found(error):
 def internal_error(error):
     return render_template('errors/500.html'), 500
 
+@app.errorhandler(PasswordHashBusy)
+def password_hash_busy(error):
+    flash('Server sedang sibuk. Silakan coba lagi beberapa detik lagi.', 'warning')
+    return redirect(request.referrer or url_for('auth_login'))
+
 # ==================== MAIN ====================
 
 if __name__ == '__main__':
-    if not os.path.exists(app.config['DATABASE']):
-        init_db()
+    init_db()
+    # Worker job di thread proses server development (proses reloader tidak ikut)
+    if not app.config['JOBS_INLINE'] and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        threading.Thread(target=run_worker, name='job-worker', daemon=True).start()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
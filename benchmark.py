@@ -0,0 +1,207 @@
+"""Benchmark route-route utama dengan Flask test client terhadap database hasil seed.py.
+
+    python seed.py --database instance/bench.db --karyawan 500 --hari 365 --per-hari 11
+    python benchmark.py --database instance/bench.db --output benchmarks/$(git rev-parse --short HEAD).json
+    python benchmark.py --database instance/bench.db --compare benchmarks/abc1234.json
+
+Latensi (p50/p95/max, ms) dan rata-rata jumlah query per request diukur per route lalu
+disimpan sebagai JSON, bersama commit git dan ukuran data, agar bisa dibandingkan antar commit.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from app import SQL_QUERIES, app, get_db, is_postgres
+
+PASSWORD = 'rahasia123'
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark route utama aplikasi')
+    parser.add_argument('--database',
+                        help='Database SQLite hasil seed.py (tidak dipakai jika DATABASE_URL diisi)')
+    parser.add_argument('--requests', type=int, default=50, help='Jumlah request per route')
+    parser.add_argument('--login-threads', type=int, default=8,
+                        help='Jumlah thread paralel untuk benchmark login')
+    parser.add_argument('--seed', type=int, default=42, help='Seed random pemilihan karyawan/slip')
+    parser.add_argument('--output', help='Simpan hasil ke file JSON ini')
+    parser.add_argument('--compare', help='File JSON hasil sebelumnya untuk dibandingkan')
+    return parser.parse_args()
+
+def login(username, password):
+    client = app.test_client()
+    response = client.post('/login', data={'username': username, 'password': password})
+    if response.status_code != 302:
+        sys.exit(f'Login {username} gagal; apakah database sudah diisi dengan seed.py?')
+    return client
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def measure(client, endpoint, urls):
+    """Jalankan semua URL dan kembalikan ringkasan latensi (ms) dan jumlah query"""
+    latencies, queries, statuses = [], [], set()
+    for url in urls:
+        before = SQL_QUERIES.values.get((endpoint,), 0)
+        started = time.perf_counter()
+        response = client.get(url)
+        response.get_data()
+        latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(SQL_QUERIES.values.get((endpoint,), 0) - before)
+        statuses.add(response.status_code)
+    return {
+        'requests': len(urls),
+        'status': sorted(statuses),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'max_ms': round(max(latencies), 2),
+        'mean_ms': round(statistics.mean(latencies), 2),
+        'queries': round(statistics.mean(queries), 2),
+    }
+
+def measure_login(usernames, threads):
+    """POST /login paralel dari beberapa thread (seperti lonjakan login saat ganti shift).
+    Mengembalikan ringkasan latensi plus throughput login per detik dan jumlah yang ditolak."""
+    latencies, rejected = [], []
+    lock = threading.Lock()
+    pending = list(usernames)
+
+    def worker():
+        client = app.test_client()
+        while True:
+            with lock:
+                if not pending:
+                    return
+                username = pending.pop()
+            started = time.perf_counter()
+            response = client.post('/login', data={'username': username, 'password': PASSWORD})
+            elapsed = (time.perf_counter() - started) * 1000
+            client.get('/logout')
+            with lock:
+                latencies.append(elapsed)
+                # Sukses diarahkan ke dashboard; antrian hash penuh/gagal kembali ke /login
+                if '/login' in response.headers.get('Location', '/login'):
+                    rejected.append(username)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    wall = time.perf_counter() - started
+    return {
+        'requests': len(latencies),
+        'threads': threads,
+        'rejected': len(rejected),
+        'per_second': round((len(latencies) - len(rejected)) / wall, 2),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'max_ms': round(max(latencies), 2),
+        'mean_ms': round(statistics.mean(latencies), 2),
+    }
+
+def dataset_size():
+    with app.app_context():
+        db = get_db()
+        return {table: db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                for table in ('users', 'hasil_kerja', 'hutang', 'bonus', 'slip_gaji')}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True, cwd=app.root_path).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, previous):
+    print(f"\nDibandingkan dengan {previous.get('commit')} ({previous.get('created_at')}):")
+    for name, current in results['routes'].items():
+        old = previous.get('routes', {}).get(name)
+        if not old:
+            continue
+        change = (current['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 if old['p95_ms'] else 0
+        if 'per_second' in current:
+            detail = f"login/detik {old.get('per_second', 0):g} -> {current['per_second']:g}"
+        else:
+            detail = f"query {old['queries']:g} -> {current['queries']:g}"
+        print(f"  {name:28} p95 {old['p95_ms']:8.2f} -> {current['p95_ms']:8.2f} ms ({change:+.0f}%)   {detail}")
+
+def main():
+    args = parse_args()
+    if not is_postgres():
+        if not args.database or not os.path.exists(args.database):
+            sys.exit('--database harus menunjuk database SQLite hasil seed.py.')
+        app.config['DATABASE'] = os.path.abspath(args.database)
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['JOBS_INLINE'] = True  # download_slip langsung merender PDF, bukan 202
+    app.config['SLOW_REQUEST_MS'] = 10 ** 9
+    # Cache PDF kosong agar request pertama tiap slip ikut mengukur render
+    app.config['SLIP_CACHE_DIR'] = tempfile.mkdtemp(prefix='slip_cache_')
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        db = get_db()
+        karyawan = [r['username'] for r in db.execute(
+            "SELECT username FROM users WHERE role = 'karyawan' ORDER BY id").fetchall()]
+        slip_ids = [r['id'] for r in db.execute('SELECT id FROM slip_gaji ORDER BY id').fetchall()]
+    if not karyawan or not slip_ids:
+        sys.exit('Database belum berisi karyawan dan slip gaji; jalankan seed.py dulu.')
+
+    bos = login('bos', 'bos123')
+    karyawan_client = login(rng.choice(karyawan), PASSWORD)
+    n = args.requests
+    slips = [rng.choice(slip_ids) for _ in range(n)]
+    routes = [
+        ('dashboard', karyawan_client, 'dashboard', ['/dashboard'] * n),
+        ('bos_dashboard', bos, 'bos_dashboard', ['/bos/dashboard'] * n),
+        ('bos_karyawan', bos, 'bos_karyawan',
+         [f"/bos/karyawan?sort={rng.choice(['nama', 'gaji_tertinggi', 'bersih_tertinggi'])}"
+          for _ in range(n)]),
+        ('bos_hasil_kerja', bos, 'bos_hasil_kerja',
+         [f"/bos/hasil-kerja?status={rng.choice(['', 'pending', 'approved'])}" for _ in range(n)]),
+        ('download_slip', bos, 'download_slip', [f'/slip-gaji/download/{i}' for i in slips]),
+        ('api_statistics', bos, 'api_statistics', ['/api/statistics'] * n),
+        ('api_statistics_harian', bos, 'api_statistics',
+         ['/api/statistics?granularity=day&breakdown=karyawan'] * n),
+    ]
+
+    results = {
+        'commit': git_commit(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'backend': app.config['DB_BACKEND'],
+        'dataset': dataset_size(),
+        'routes': {},
+    }
+    print(f"Data: {results['dataset']}")
+    print(f"{'route':28} {'p50':>9} {'p95':>9} {'max':>9} {'query':>7}")
+    for name, client, endpoint, urls in routes:
+        summary = results['routes'][name] = measure(client, endpoint, urls)
+        print(f"{name:28} {summary['p50_ms']:9.2f} {summary['p95_ms']:9.2f} "
+              f"{summary['max_ms']:9.2f} {summary['queries']:7g}  status {summary['status']}")
+    summary = results['routes']['login'] = measure_login(
+        [rng.choice(karyawan) for _ in range(n)], args.login_threads)
+    print(f"{'login':28} {summary['p50_ms']:9.2f} {summary['p95_ms']:9.2f} {summary['max_ms']:9.2f} "
+          f"        {summary['per_second']:g} login/detik, {summary['rejected']} ditolak "
+          f"({summary['threads']} thread)")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Hasil disimpan ke {args.output}')
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+if __name__ == '__main__':
+    main()
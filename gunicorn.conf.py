@@ -0,0 +1,17 @@
+# Konfigurasi gunicorn (dibaca otomatis dari direktori kerja)
+import os
+
+# Worker gthread: tiap proses melayani beberapa request sekaligus, sehingga hash password yang
+# lambat berjalan di pool terbatas (PASSWORD_HASH_WORKERS/QUEUE) dan thread lain tetap melayani
+# halaman biasa. Dengan worker sync pool itu tidak berpengaruh. Jumlah proses: WEB_CONCURRENCY.
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+
+def on_starting(server):
+    """Jalankan migrasi database sekali di proses master sebelum worker dibuat"""
+    from app import get_pool, init_db
+    init_db()
+    # Koneksi SQLite tidak boleh dibawa melewati fork ke worker
+    get_pool().close()
+
@@ -0,0 +1,21 @@
+-- 0002: Tabel saldo (running totals per karyawan)
+
+CREATE TABLE IF NOT EXISTS saldo (
+    user_id INTEGER PRIMARY KEY,
+    total_kerja REAL NOT NULL DEFAULT 0,
+    total_bonus REAL NOT NULL DEFAULT 0,
+    total_hutang REAL NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Isi saldo dari data yang sudah ada
+DELETE FROM saldo;
+INSERT INTO saldo (user_id, total_kerja, total_bonus, total_hutang)
+SELECT u.id,
+       (SELECT COALESCE(SUM(total_harga), 0) FROM hasil_kerja
+        WHERE user_id = u.id AND status = 'approved'),
+       (SELECT COALESCE(SUM(nominal), 0) FROM bonus WHERE user_id = u.id),
+       (SELECT COALESCE(SUM(nominal), 0) FROM hutang
+        WHERE user_id = u.id AND status = 'aktif')
+FROM users u;
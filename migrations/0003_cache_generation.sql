@@ -0,0 +1,6 @@
+-- 0003: Generasi cache per worker
+
+CREATE TABLE IF NOT EXISTS cache_generation (
+    name TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL DEFAULT 0
+);
@@ -0,0 +1,10 @@
+-- 0004: Index untuk filter dan urutan halaman riwayat (slip, reset, hutang)
+
+CREATE INDEX IF NOT EXISTS idx_hutang_user_created ON hutang(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_hutang_user_tanggal ON hutang(user_id, tanggal);
+CREATE INDEX IF NOT EXISTS idx_slip_gaji_created ON slip_gaji(created_at);
+CREATE INDEX IF NOT EXISTS idx_slip_gaji_user_created ON slip_gaji(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_slip_gaji_periode ON slip_gaji(periode);
+CREATE INDEX IF NOT EXISTS idx_slip_gaji_user_periode ON slip_gaji(user_id, periode);
+CREATE INDEX IF NOT EXISTS idx_reset_gaji_created ON reset_gaji(created_at);
+CREATE INDEX IF NOT EXISTS idx_reset_gaji_user_created ON reset_gaji(user_id, created_at);
@@ -0,0 +1,29 @@
+-- 0005: Index komposit untuk pasangan WHERE/ORDER BY di app.py
+-- (rowid otomatis ikut di akhir setiap index, jadi (x, created_at) juga melayani
+-- ORDER BY created_at, id pada keyset pagination)
+
+-- users: dropdown karyawan (WHERE role = ? ORDER BY nama_lengkap)
+CREATE INDEX IF NOT EXISTS idx_users_role_nama ON users(role, nama_lengkap);
+
+-- hasil_kerja: SUM approved per karyawan (covering), riwayat per karyawan,
+-- daftar BOS per status dan tanpa filter
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_user_status ON hasil_kerja(user_id, status, total_harga);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_user_created ON hasil_kerja(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_status_created ON hasil_kerja(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_created ON hasil_kerja(created_at);
+
+-- hutang: SUM per karyawan dan status (covering), daftar BOS per status dan tanpa filter
+CREATE INDEX IF NOT EXISTS idx_hutang_user_status ON hutang(user_id, status, nominal);
+CREATE INDEX IF NOT EXISTS idx_hutang_status_created ON hutang(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_hutang_created ON hutang(created_at);
+
+-- bonus: SUM per karyawan (covering), daftar BOS
+CREATE INDEX IF NOT EXISTS idx_bonus_user ON bonus(user_id, nominal);
+CREATE INDEX IF NOT EXISTS idx_bonus_created ON bonus(created_at);
+
+-- Index satu kolom yang sudah tercakup oleh index komposit di atas
+DROP INDEX IF EXISTS idx_hasil_kerja_user_id;
+DROP INDEX IF EXISTS idx_hasil_kerja_status;
+DROP INDEX IF EXISTS idx_hutang_user_id;
+DROP INDEX IF EXISTS idx_hutang_status;
+DROP INDEX IF EXISTS idx_slip_gaji_user_id;
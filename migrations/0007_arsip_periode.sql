@@ -0,0 +1,75 @@
+-- 0007: Arsip periode gaji. Baris periode yang ditutup dipindahkan dari tabel aktif
+-- (hasil_kerja, hutang, bonus) ke tabel *_arsip; view *_semua menggabungkan keduanya.
+
+-- Arsip periode yang sudah ditutup (dipindahkan oleh reset_saldo; reset_id = baris reset_gaji)
+CREATE TABLE IF NOT EXISTS hasil_kerja_arsip (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    harga_id INTEGER NOT NULL,
+    jumlah INTEGER NOT NULL,
+    total_harga INTEGER NOT NULL,
+    status TEXT,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    reset_id INTEGER NOT NULL,
+    archived_at TIMESTAMP NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS hutang_arsip (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    nominal REAL NOT NULL,
+    keterangan TEXT NOT NULL,
+    tanggal DATE NOT NULL,
+    status TEXT,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    reset_id INTEGER NOT NULL,
+    archived_at TIMESTAMP NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS bonus_arsip (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    nominal REAL NOT NULL,
+    keterangan TEXT,
+    created_at TIMESTAMP,
+    reset_id INTEGER NOT NULL,
+    archived_at TIMESTAMP NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_arsip_user_created ON hasil_kerja_arsip(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_arsip_status_created ON hasil_kerja_arsip(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_arsip_reset ON hasil_kerja_arsip(reset_id);
+CREATE INDEX IF NOT EXISTS idx_hutang_arsip_user_created ON hutang_arsip(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_hutang_arsip_reset ON hutang_arsip(reset_id);
+CREATE INDEX IF NOT EXISTS idx_bonus_arsip_user_created ON bonus_arsip(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_bonus_arsip_reset ON bonus_arsip(reset_id);
+
+-- Periode berjalan + arsip, untuk laporan lintas periode (reset_id NULL = periode berjalan)
+DROP VIEW IF EXISTS hasil_kerja_semua;
+CREATE VIEW hasil_kerja_semua AS
+    SELECT id, user_id, harga_id, jumlah, total_harga, status, created_at, updated_at, NULL AS reset_id
+    FROM hasil_kerja
+    UNION ALL
+    SELECT id, user_id, harga_id, jumlah, total_harga, status, created_at, updated_at, reset_id
+    FROM hasil_kerja_arsip;
+
+DROP VIEW IF EXISTS hutang_semua;
+CREATE VIEW hutang_semua AS
+    SELECT id, user_id, nominal, keterangan, tanggal, status, created_at, updated_at, NULL AS reset_id
+    FROM hutang
+    UNION ALL
+    SELECT id, user_id, nominal, keterangan, tanggal, status, created_at, updated_at, reset_id
+    FROM hutang_arsip;
+
+DROP VIEW IF EXISTS bonus_semua;
+CREATE VIEW bonus_semua AS
+    SELECT id, user_id, nominal, keterangan, created_at, NULL AS reset_id
+    FROM bonus
+    UNION ALL
+    SELECT id, user_id, nominal, keterangan, created_at, reset_id
+    FROM bonus_arsip;
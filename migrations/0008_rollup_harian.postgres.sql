@@ -0,0 +1,23 @@
+-- 0008: Rollup harian hasil kerja approved untuk grafik dan /api/statistics
+
+-- Rollup harian hasil kerja approved per karyawan dan harga (dijaga oleh update_rollup,
+-- mencakup periode berjalan dan arsip), sumber data /api/statistics
+CREATE TABLE IF NOT EXISTS rollup_harian (
+    tanggal DATE NOT NULL,
+    user_id INTEGER NOT NULL,
+    harga_id INTEGER NOT NULL,
+    jumlah INTEGER NOT NULL DEFAULT 0,
+    total DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (tanggal, user_id, harga_id),
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_rollup_harian_user_tanggal ON rollup_harian(user_id, tanggal);
+
+-- Isi dari data yang sudah ada
+DELETE FROM rollup_harian;
+INSERT INTO rollup_harian (tanggal, user_id, harga_id, jumlah, total)
+SELECT CAST(created_at AS DATE), user_id, harga_id, SUM(jumlah), SUM(total_harga)
+FROM hasil_kerja_semua
+WHERE status = 'approved'
+GROUP BY CAST(created_at AS DATE), user_id, harga_id;
@@ -0,0 +1,5 @@
+-- 0009: Versi sesi per user untuk cache user di worker
+
+-- Dinaikkan setiap password atau role berubah; sesi dan cookie remember yang
+-- membawa versi lama tidak lagi diterima oleh load_user
+ALTER TABLE users ADD COLUMN session_version INTEGER NOT NULL DEFAULT 1;
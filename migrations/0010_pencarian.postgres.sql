@@ -0,0 +1,13 @@
+-- 0010: Index pencarian teks untuk karyawan, hutang, bonus dan reset gaji
+
+-- Postgres tidak punya FTS5: index GIN atas to_tsvector. Ekspresi harus sama persis
+-- dengan search_ids() di app.py agar index dipakai.
+
+CREATE INDEX IF NOT EXISTS idx_users_pencarian ON users
+    USING GIN (to_tsvector('simple', COALESCE(nama_lengkap, '') || ' ' || COALESCE(username, '')));
+CREATE INDEX IF NOT EXISTS idx_hutang_pencarian ON hutang
+    USING GIN (to_tsvector('simple', COALESCE(keterangan, '')));
+CREATE INDEX IF NOT EXISTS idx_bonus_pencarian ON bonus
+    USING GIN (to_tsvector('simple', COALESCE(keterangan, '')));
+CREATE INDEX IF NOT EXISTS idx_reset_gaji_pencarian ON reset_gaji
+    USING GIN (to_tsvector('simple', COALESCE(keterangan, '')));
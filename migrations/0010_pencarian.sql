@@ -0,0 +1,66 @@
+-- 0010: Index pencarian teks (FTS5) untuk karyawan, hutang, bonus dan reset gaji
+
+-- Tabel FTS memakai external content (teks tidak disalin) dan dijaga trigger.
+-- Hutang/bonus yang diarsipkan saat reset gaji ikut keluar dari index.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+    nama_lengkap, username, content='users', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN
+    INSERT INTO users_fts (rowid, nama_lengkap, username) VALUES (new.id, new.nama_lengkap, new.username);
+END;
+CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN
+    INSERT INTO users_fts (users_fts, rowid, nama_lengkap, username) VALUES ('delete', old.id, old.nama_lengkap, old.username);
+END;
+CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF nama_lengkap, username ON users BEGIN
+    INSERT INTO users_fts (users_fts, rowid, nama_lengkap, username) VALUES ('delete', old.id, old.nama_lengkap, old.username);
+    INSERT INTO users_fts (rowid, nama_lengkap, username) VALUES (new.id, new.nama_lengkap, new.username);
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS hutang_fts USING fts5(
+    keterangan, content='hutang', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS hutang_fts_insert AFTER INSERT ON hutang BEGIN
+    INSERT INTO hutang_fts (rowid, keterangan) VALUES (new.id, new.keterangan);
+END;
+CREATE TRIGGER IF NOT EXISTS hutang_fts_delete AFTER DELETE ON hutang BEGIN
+    INSERT INTO hutang_fts (hutang_fts, rowid, keterangan) VALUES ('delete', old.id, old.keterangan);
+END;
+CREATE TRIGGER IF NOT EXISTS hutang_fts_update AFTER UPDATE OF keterangan ON hutang BEGIN
+    INSERT INTO hutang_fts (hutang_fts, rowid, keterangan) VALUES ('delete', old.id, old.keterangan);
+    INSERT INTO hutang_fts (rowid, keterangan) VALUES (new.id, new.keterangan);
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS bonus_fts USING fts5(
+    keterangan, content='bonus', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS bonus_fts_insert AFTER INSERT ON bonus BEGIN
+    INSERT INTO bonus_fts (rowid, keterangan) VALUES (new.id, new.keterangan);
+END;
+CREATE TRIGGER IF NOT EXISTS bonus_fts_delete AFTER DELETE ON bonus BEGIN
+    INSERT INTO bonus_fts (bonus_fts, rowid, keterangan) VALUES ('delete', old.id, old.keterangan);
+END;
+CREATE TRIGGER IF NOT EXISTS bonus_fts_update AFTER UPDATE OF keterangan ON bonus BEGIN
+    INSERT INTO bonus_fts (bonus_fts, rowid, keterangan) VALUES ('delete', old.id, old.keterangan);
+    INSERT INTO bonus_fts (rowid, keterangan) VALUES (new.id, new.keterangan);
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS reset_gaji_fts USING fts5(
+    keterangan, content='reset_gaji', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS reset_gaji_fts_insert AFTER INSERT ON reset_gaji BEGIN
+    INSERT INTO reset_gaji_fts (rowid, keterangan) VALUES (new.id, new.keterangan);
+END;
+CREATE TRIGGER IF NOT EXISTS reset_gaji_fts_delete AFTER DELETE ON reset_gaji BEGIN
+    INSERT INTO reset_gaji_fts (reset_gaji_fts, rowid, keterangan) VALUES ('delete', old.id, old.keterangan);
+END;
+CREATE TRIGGER IF NOT EXISTS reset_gaji_fts_update AFTER UPDATE OF keterangan ON reset_gaji BEGIN
+    INSERT INTO reset_gaji_fts (reset_gaji_fts, rowid, keterangan) VALUES ('delete', old.id, old.keterangan);
+    INSERT INTO reset_gaji_fts (rowid, keterangan) VALUES (new.id, new.keterangan);
+END;
+
+-- Isi index dari data yang sudah ada
+INSERT INTO users_fts (users_fts) VALUES ('rebuild');
+INSERT INTO hutang_fts (hutang_fts) VALUES ('rebuild');
+INSERT INTO bonus_fts (bonus_fts) VALUES ('rebuild');
+INSERT INTO reset_gaji_fts (reset_gaji_fts) VALUES ('rebuild');
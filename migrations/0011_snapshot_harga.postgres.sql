@@ -0,0 +1,33 @@
+-- 0011: Snapshot ukuran, jenis dan harga satuan di hasil_kerja
+
+-- Disalin dari harga saat hasil kerja diinput, sehingga daftar hasil kerja tidak perlu JOIN
+-- ke harga dan riwayat tetap benar walau harga kemudian diubah atau dihapus
+ALTER TABLE hasil_kerja ADD COLUMN ukuran TEXT;
+ALTER TABLE hasil_kerja ADD COLUMN jenis TEXT;
+ALTER TABLE hasil_kerja ADD COLUMN harga_satuan DOUBLE PRECISION;
+ALTER TABLE hasil_kerja_arsip ADD COLUMN ukuran TEXT;
+ALTER TABLE hasil_kerja_arsip ADD COLUMN jenis TEXT;
+ALTER TABLE hasil_kerja_arsip ADD COLUMN harga_satuan DOUBLE PRECISION;
+
+-- Isi baris lama: label dari harga (NULL jika harganya sudah dihapus), harga satuan dari
+-- total_harga / jumlah, yaitu harga yang benar-benar dipakai saat input
+UPDATE hasil_kerja SET
+    ukuran = (SELECT h.ukuran FROM harga h WHERE h.id = hasil_kerja.harga_id),
+    jenis = (SELECT h.jenis FROM harga h WHERE h.id = hasil_kerja.harga_id),
+    harga_satuan = CASE WHEN jumlah > 0 THEN CAST(total_harga AS DOUBLE PRECISION) / jumlah
+                        ELSE COALESCE((SELECT h.harga FROM harga h WHERE h.id = hasil_kerja.harga_id), 0) END;
+UPDATE hasil_kerja_arsip SET
+    ukuran = (SELECT h.ukuran FROM harga h WHERE h.id = hasil_kerja_arsip.harga_id),
+    jenis = (SELECT h.jenis FROM harga h WHERE h.id = hasil_kerja_arsip.harga_id),
+    harga_satuan = CASE WHEN jumlah > 0 THEN CAST(total_harga AS DOUBLE PRECISION) / jumlah
+                        ELSE COALESCE((SELECT h.harga FROM harga h WHERE h.id = hasil_kerja_arsip.harga_id), 0) END;
+
+DROP VIEW IF EXISTS hasil_kerja_semua;
+CREATE VIEW hasil_kerja_semua AS
+    SELECT id, user_id, harga_id, jumlah, total_harga, status, created_at, updated_at,
+           ukuran, jenis, harga_satuan, NULL AS reset_id
+    FROM hasil_kerja
+    UNION ALL
+    SELECT id, user_id, harga_id, jumlah, total_harga, status, created_at, updated_at,
+           ukuran, jenis, harga_satuan, reset_id
+    FROM hasil_kerja_arsip;
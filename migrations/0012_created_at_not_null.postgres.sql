@@ -0,0 +1,16 @@
+-- 0012: created_at wajib diisi di tabel yang dipaginasi dengan cursor (created_at, id)
+
+-- Perbandingan (created_at, id) < (?, ?) bernilai NULL untuk baris lama tanpa created_at,
+-- sehingga baris itu tidak pernah muncul di halaman mana pun. Isi dari updated_at (hutang:
+-- tanggal) jika ada, selain itu 1970-01-01 agar ikut terurut paling lama.
+UPDATE hasil_kerja SET created_at = COALESCE(updated_at, TIMESTAMP '1970-01-01 00:00:00') WHERE created_at IS NULL;
+UPDATE hutang SET created_at = COALESCE(updated_at, tanggal, TIMESTAMP '1970-01-01 00:00:00') WHERE created_at IS NULL;
+UPDATE bonus SET created_at = TIMESTAMP '1970-01-01 00:00:00' WHERE created_at IS NULL;
+UPDATE slip_gaji SET created_at = TIMESTAMP '1970-01-01 00:00:00' WHERE created_at IS NULL;
+UPDATE reset_gaji SET created_at = TIMESTAMP '1970-01-01 00:00:00' WHERE created_at IS NULL;
+
+ALTER TABLE hasil_kerja ALTER COLUMN created_at SET NOT NULL;
+ALTER TABLE hutang ALTER COLUMN created_at SET NOT NULL;
+ALTER TABLE bonus ALTER COLUMN created_at SET NOT NULL;
+ALTER TABLE slip_gaji ALTER COLUMN created_at SET NOT NULL;
+ALTER TABLE reset_gaji ALTER COLUMN created_at SET NOT NULL;
@@ -0,0 +1,53 @@
+-- 0012: created_at wajib diisi di tabel yang dipaginasi dengan cursor (created_at, id)
+
+-- Perbandingan (created_at, id) < (?, ?) bernilai NULL untuk baris lama tanpa created_at,
+-- sehingga baris itu tidak pernah muncul di halaman mana pun. Isi dari updated_at (hutang:
+-- tanggal) jika ada, selain itu 1970-01-01 agar ikut terurut paling lama.
+UPDATE hasil_kerja SET created_at = COALESCE(updated_at, '1970-01-01 00:00:00') WHERE created_at IS NULL;
+UPDATE hutang SET created_at = COALESCE(updated_at, tanggal, '1970-01-01 00:00:00') WHERE created_at IS NULL;
+UPDATE bonus SET created_at = '1970-01-01 00:00:00' WHERE created_at IS NULL;
+UPDATE slip_gaji SET created_at = '1970-01-01 00:00:00' WHERE created_at IS NULL;
+UPDATE reset_gaji SET created_at = '1970-01-01 00:00:00' WHERE created_at IS NULL;
+
+-- SQLite tidak bisa menambah NOT NULL tanpa membuat ulang tabel, jadi ditolak lewat trigger
+-- (database baru dari schema.sql sudah memakai NOT NULL)
+CREATE TRIGGER IF NOT EXISTS hasil_kerja_created_at_insert BEFORE INSERT ON hasil_kerja
+WHEN NEW.created_at IS NULL BEGIN
+    SELECT RAISE(ABORT, 'hasil_kerja.created_at tidak boleh NULL');
+END;
+CREATE TRIGGER IF NOT EXISTS hasil_kerja_created_at_update BEFORE UPDATE OF created_at ON hasil_kerja
+WHEN NEW.created_at IS NULL BEGIN
+    SELECT RAISE(ABORT, 'hasil_kerja.created_at tidak boleh NULL');
+END;
+CREATE TRIGGER IF NOT EXISTS hutang_created_at_insert BEFORE INSERT ON hutang
+WHEN NEW.created_at IS NULL BEGIN
+    SELECT RAISE(ABORT, 'hutang.created_at tidak boleh NULL');
+END;
+CREATE TRIGGER IF NOT EXISTS hutang_created_at_update BEFORE UPDATE OF created_at ON hutang
+WHEN NEW.created_at IS NULL BEGIN
+    SELECT RAISE(ABORT, 'hutang.created_at tidak boleh NULL');
+END;
+CREATE TRIGGER IF NOT EXISTS bonus_created_at_insert BEFORE INSERT ON bonus
+WHEN NEW.created_at IS NULL BEGIN
+    SELECT RAISE(ABORT, 'bonus.created_at tidak boleh NULL');
+END;
+CREATE TRIGGER IF NOT EXISTS bonus_created_at_update BEFORE UPDATE OF created_at ON bonus
+WHEN NEW.created_at IS NULL BEGIN
+    SELECT RAISE(ABORT, 'bonus.created_at tidak boleh NULL');
+END;
+CREATE TRIGGER IF NOT EXISTS slip_gaji_created_at_insert BEFORE INSERT ON slip_gaji
+WHEN NEW.created_at IS NULL BEGIN
+    SELECT RAISE(ABORT, 'slip_gaji.created_at tidak boleh NULL');
+END;
+CREATE TRIGGER IF NOT EXISTS slip_gaji_created_at_update BEFORE UPDATE OF created_at ON slip_gaji
+WHEN NEW.created_at IS NULL BEGIN
+    SELECT RAISE(ABORT, 'slip_gaji.created_at tidak boleh NULL');
+END;
+CREATE TRIGGER IF NOT EXISTS reset_gaji_created_at_insert BEFORE INSERT ON reset_gaji
+WHEN NEW.created_at IS NULL BEGIN
+    SELECT RAISE(ABORT, 'reset_gaji.created_at tidak boleh NULL');
+END;
+CREATE TRIGGER IF NOT EXISTS reset_gaji_created_at_update BEFORE UPDATE OF created_at ON reset_gaji
+WHEN NEW.created_at IS NULL BEGIN
+    SELECT RAISE(ABORT, 'reset_gaji.created_at tidak boleh NULL');
+END;
@@ -0,0 +1,255 @@
+-- Sistem Manajemen Gaji Karyawan - Database Schema (PostgreSQL)
+-- Harus selalu sama dengan schema.sql; hanya tipe data yang berbeda.
+
+-- Users table
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    username TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    role TEXT NOT NULL DEFAULT 'karyawan', -- 'bos' or 'karyawan'
+    nama_lengkap TEXT NOT NULL,
+    whatsapp TEXT,
+    foto_profil TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    session_version INTEGER NOT NULL DEFAULT 1 -- naik saat password/role berubah
+);
+
+-- Harga table (ukuran dan jenis dengan harga)
+CREATE TABLE IF NOT EXISTS harga (
+    id SERIAL PRIMARY KEY,
+    ukuran TEXT NOT NULL, -- 'besar', 'kecil', 'sepeda', 'sepeda_mini', 'jumbo'
+    jenis TEXT, -- 'tipis', 'semi', NULL untuk sepeda dan sepeda_mini
+    harga INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(ukuran, jenis)
+);
+
+-- Hasil kerja table
+CREATE TABLE IF NOT EXISTS hasil_kerja (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    harga_id INTEGER NOT NULL,
+    jumlah INTEGER NOT NULL,
+    total_harga INTEGER NOT NULL,
+    status TEXT DEFAULT 'pending', -- 'pending', 'approved', 'rejected'
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Snapshot dari harga saat input, riwayat tidak berubah walau harga diubah/dihapus
+    ukuran TEXT,
+    jenis TEXT,
+    harga_satuan DOUBLE PRECISION,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+    -- harga_id tanpa FOREIGN KEY: harga boleh dihapus walau pernah dipakai (sama seperti di SQLite)
+);
+
+-- Hutang/Bon table
+CREATE TABLE IF NOT EXISTS hutang (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    nominal DOUBLE PRECISION NOT NULL,
+    keterangan TEXT NOT NULL,
+    tanggal DATE NOT NULL,
+    status TEXT DEFAULT 'aktif', -- 'aktif', 'lunas'
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Bonus table
+CREATE TABLE IF NOT EXISTS bonus (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    nominal DOUBLE PRECISION NOT NULL,
+    keterangan TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Slip gaji table
+CREATE TABLE IF NOT EXISTS slip_gaji (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    periode TEXT NOT NULL,
+    total_kerja DOUBLE PRECISION NOT NULL DEFAULT 0,
+    bonus DOUBLE PRECISION NOT NULL DEFAULT 0,
+    hutang DOUBLE PRECISION NOT NULL DEFAULT 0,
+    gaji_bersih DOUBLE PRECISION NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Reset gaji history
+CREATE TABLE IF NOT EXISTS reset_gaji (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    total_gaji_sebelumnya DOUBLE PRECISION NOT NULL,
+    total_hutang_sebelumnya DOUBLE PRECISION NOT NULL,
+    keterangan TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Saldo table (running totals per karyawan, dijaga oleh route yang mengubah data)
+CREATE TABLE IF NOT EXISTS saldo (
+    user_id INTEGER PRIMARY KEY,
+    total_kerja DOUBLE PRECISION NOT NULL DEFAULT 0,
+    total_bonus DOUBLE PRECISION NOT NULL DEFAULT 0,
+    total_hutang DOUBLE PRECISION NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Generasi cache per worker (dinaikkan setiap kali data sumber cache berubah)
+CREATE TABLE IF NOT EXISTS cache_generation (
+    name TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL DEFAULT 0
+);
+
+-- Antrian job latar belakang (dijalankan oleh "flask jobs worker")
+CREATE TABLE IF NOT EXISTS jobs (
+    id SERIAL PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL DEFAULT '{}',
+    dedupe_key TEXT,
+    user_id INTEGER,
+    status TEXT NOT NULL DEFAULT 'queued', -- 'queued', 'running', 'done', 'failed'
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    result TEXT,
+    error TEXT,
+    run_after TIMESTAMP NOT NULL,
+    locked_by TEXT,
+    locked_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Arsip periode yang sudah ditutup (dipindahkan oleh reset_saldo; reset_id = baris reset_gaji)
+CREATE TABLE IF NOT EXISTS hasil_kerja_arsip (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    harga_id INTEGER NOT NULL,
+    jumlah INTEGER NOT NULL,
+    total_harga INTEGER NOT NULL,
+    status TEXT,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    reset_id INTEGER NOT NULL,
+    archived_at TIMESTAMP NOT NULL,
+    ukuran TEXT,
+    jenis TEXT,
+    harga_satuan DOUBLE PRECISION,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS hutang_arsip (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    nominal DOUBLE PRECISION NOT NULL,
+    keterangan TEXT NOT NULL,
+    tanggal DATE NOT NULL,
+    status TEXT,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    reset_id INTEGER NOT NULL,
+    archived_at TIMESTAMP NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS bonus_arsip (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    nominal DOUBLE PRECISION NOT NULL,
+    keterangan TEXT,
+    created_at TIMESTAMP,
+    reset_id INTEGER NOT NULL,
+    archived_at TIMESTAMP NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Rollup harian hasil kerja approved per karyawan dan harga (dijaga oleh update_rollup,
+-- mencakup periode berjalan dan arsip), sumber data /api/statistics
+CREATE TABLE IF NOT EXISTS rollup_harian (
+    tanggal DATE NOT NULL,
+    user_id INTEGER NOT NULL,
+    harga_id INTEGER NOT NULL,
+    jumlah INTEGER NOT NULL DEFAULT 0,
+    total DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (tanggal, user_id, harga_id),
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Versi skema (diisi oleh migrate_db, lihat folder migrations/)
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Indexes for better performance
+CREATE INDEX IF NOT EXISTS idx_users_role_nama ON users(role, nama_lengkap);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_user_status ON hasil_kerja(user_id, status, total_harga);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_user_created ON hasil_kerja(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_status_created ON hasil_kerja(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_created ON hasil_kerja(created_at);
+CREATE INDEX IF NOT EXISTS idx_hutang_user_status ON hutang(user_id, status, nominal);
+CREATE INDEX IF NOT EXISTS idx_hutang_status_created ON hutang(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_hutang_created ON hutang(created_at);
+CREATE INDEX IF NOT EXISTS idx_hutang_user_created ON hutang(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_hutang_user_tanggal ON hutang(user_id, tanggal);
+CREATE INDEX IF NOT EXISTS idx_bonus_user ON bonus(user_id, nominal);
+CREATE INDEX IF NOT EXISTS idx_bonus_created ON bonus(created_at);
+CREATE INDEX IF NOT EXISTS idx_slip_gaji_created ON slip_gaji(created_at);
+CREATE INDEX IF NOT EXISTS idx_slip_gaji_user_created ON slip_gaji(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_slip_gaji_periode ON slip_gaji(periode);
+CREATE INDEX IF NOT EXISTS idx_slip_gaji_user_periode ON slip_gaji(user_id, periode);
+CREATE INDEX IF NOT EXISTS idx_reset_gaji_created ON reset_gaji(created_at);
+CREATE INDEX IF NOT EXISTS idx_reset_gaji_user_created ON reset_gaji(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_run_after ON jobs(status, run_after);
+CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs(kind, dedupe_key, status);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_arsip_user_created ON hasil_kerja_arsip(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_arsip_status_created ON hasil_kerja_arsip(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_arsip_reset ON hasil_kerja_arsip(reset_id);
+CREATE INDEX IF NOT EXISTS idx_hutang_arsip_user_created ON hutang_arsip(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_hutang_arsip_reset ON hutang_arsip(reset_id);
+CREATE INDEX IF NOT EXISTS idx_bonus_arsip_user_created ON bonus_arsip(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_bonus_arsip_reset ON bonus_arsip(reset_id);
+CREATE INDEX IF NOT EXISTS idx_rollup_harian_user_tanggal ON rollup_harian(user_id, tanggal);
+
+-- Periode berjalan + arsip, untuk laporan lintas periode (reset_id NULL = periode berjalan)
+DROP VIEW IF EXISTS hasil_kerja_semua;
+CREATE VIEW hasil_kerja_semua AS
+    SELECT id, user_id, harga_id, jumlah, total_harga, status, created_at, updated_at,
+           ukuran, jenis, harga_satuan, NULL AS reset_id
+    FROM hasil_kerja
+    UNION ALL
+    SELECT id, user_id, harga_id, jumlah, total_harga, status, created_at, updated_at,
+           ukuran, jenis, harga_satuan, reset_id
+    FROM hasil_kerja_arsip;
+
+DROP VIEW IF EXISTS hutang_semua;
+CREATE VIEW hutang_semua AS
+    SELECT id, user_id, nominal, keterangan, tanggal, status, created_at, updated_at, NULL AS reset_id
+    FROM hutang
+    UNION ALL
+    SELECT id, user_id, nominal, keterangan, tanggal, status, created_at, updated_at, reset_id
+    FROM hutang_arsip;
+
+DROP VIEW IF EXISTS bonus_semua;
+CREATE VIEW bonus_semua AS
+    SELECT id, user_id, nominal, keterangan, created_at, NULL AS reset_id
+    FROM bonus
+    UNION ALL
+    SELECT id, user_id, nominal, keterangan, created_at, reset_id
+    FROM bonus_arsip;
+
+-- Index pencarian teks; ekspresi harus sama dengan search_ids() di app.py
+CREATE INDEX IF NOT EXISTS idx_users_pencarian ON users
+    USING GIN (to_tsvector('simple', COALESCE(nama_lengkap, '') || ' ' || COALESCE(username, '')));
+CREATE INDEX IF NOT EXISTS idx_hutang_pencarian ON hutang
+    USING GIN (to_tsvector('simple', COALESCE(keterangan, '')));
+CREATE INDEX IF NOT EXISTS idx_bonus_pencarian ON bonus
+    USING GIN (to_tsvector('simple', COALESCE(keterangan, '')));
+CREATE INDEX IF NOT EXISTS idx_reset_gaji_pencarian ON reset_gaji
+    USING GIN (to_tsvector('simple', COALESCE(keterangan, '')));
@@ -10,7 +10,8 @@ CREATE TABLE IF NOT EXISTS users (
     whatsapp TEXT,
     foto_profil TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    session_version INTEGER NOT NULL DEFAULT 1 -- naik saat password/role berubah
 );
 
 -- Harga table (ukuran dan jenis dengan harga)
@@ -31,8 +32,12 @@ CREATE TABLE IF NOT EXISTS hasil_kerja (
     jumlah INTEGER NOT NULL,
     total_harga INTEGER NOT NULL,
     status TEXT DEFAULT 'pending', -- 'pending', 'approved', 'rejected'
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Snapshot dari harga saat input, riwayat tidak berubah walau harga diubah/dihapus
+    ukuran TEXT,
+    jenis TEXT,
+    harga_satuan REAL,
     FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
     FOREIGN KEY (harga_id) REFERENCES harga (id)
 );
@@ -45,7 +50,7 @@ CREATE TABLE IF NOT EXISTS hutang (
     keterangan TEXT NOT NULL,
     tanggal DATE NOT NULL,
     status TEXT DEFAULT 'aktif', -- 'aktif', 'lunas'
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
 );
@@ -56,7 +61,7 @@ CREATE TABLE IF NOT EXISTS bonus (
     user_id INTEGER NOT NULL,
     nominal REAL NOT NULL,
     keterangan TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
 );
 
@@ -69,7 +74,7 @@ CREATE TABLE IF NOT EXISTS slip_gaji (
     bonus REAL NOT NULL DEFAULT 0,
     hutang REAL NOT NULL DEFAULT 0,
     gaji_bersih REAL NOT NULL DEFAULT 0,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
 );
 
@@ -80,13 +85,217 @@ CREATE TABLE IF NOT EXISTS reset_gaji (
     total_gaji_sebelumnya REAL NOT NULL,
     total_hutang_sebelumnya REAL NOT NULL,
     keterangan TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Saldo table (running totals per karyawan, dijaga oleh route yang mengubah data)
+CREATE TABLE IF NOT EXISTS saldo (
+    user_id INTEGER PRIMARY KEY,
+    total_kerja REAL NOT NULL DEFAULT 0,
+    total_bonus REAL NOT NULL DEFAULT 0,
+    total_hutang REAL NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Generasi cache per worker (dinaikkan setiap kali data sumber cache berubah)
+CREATE TABLE IF NOT EXISTS cache_generation (
+    name TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL DEFAULT 0
+);
+
+-- Antrian job latar belakang (dijalankan oleh "flask jobs worker")
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL DEFAULT '{}',
+    dedupe_key TEXT,
+    user_id INTEGER,
+    status TEXT NOT NULL DEFAULT 'queued', -- 'queued', 'running', 'done', 'failed'
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    result TEXT,
+    error TEXT,
+    run_after TIMESTAMP NOT NULL,
+    locked_by TEXT,
+    locked_at TIMESTAMP,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Arsip periode yang sudah ditutup (dipindahkan oleh reset_saldo; reset_id = baris reset_gaji)
+CREATE TABLE IF NOT EXISTS hasil_kerja_arsip (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    harga_id INTEGER NOT NULL,
+    jumlah INTEGER NOT NULL,
+    total_harga INTEGER NOT NULL,
+    status TEXT,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    reset_id INTEGER NOT NULL,
+    archived_at TIMESTAMP NOT NULL,
+    ukuran TEXT,
+    jenis TEXT,
+    harga_satuan REAL,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS hutang_arsip (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    nominal REAL NOT NULL,
+    keterangan TEXT NOT NULL,
+    tanggal DATE NOT NULL,
+    status TEXT,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    reset_id INTEGER NOT NULL,
+    archived_at TIMESTAMP NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS bonus_arsip (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    nominal REAL NOT NULL,
+    keterangan TEXT,
+    created_at TIMESTAMP,
+    reset_id INTEGER NOT NULL,
+    archived_at TIMESTAMP NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Rollup harian hasil kerja approved per karyawan dan harga (dijaga oleh update_rollup,
+-- mencakup periode berjalan dan arsip), sumber data /api/statistics
+CREATE TABLE IF NOT EXISTS rollup_harian (
+    tanggal DATE NOT NULL,
+    user_id INTEGER NOT NULL,
+    harga_id INTEGER NOT NULL,
+    jumlah INTEGER NOT NULL DEFAULT 0,
+    total REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (tanggal, user_id, harga_id),
     FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
 );
 
+-- Versi skema (diisi oleh migrate_db, lihat folder migrations/)
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Indexes for better performance
-CREATE INDEX IF NOT EXISTS idx_hasil_kerja_user_id ON hasil_kerja(user_id);
-CREATE INDEX IF NOT EXISTS idx_hasil_kerja_status ON hasil_kerja(status);
-CREATE INDEX IF NOT EXISTS idx_hutang_user_id ON hutang(user_id);
-CREATE INDEX IF NOT EXISTS idx_hutang_status ON hutang(status);
-CREATE INDEX IF NOT EXISTS idx_slip_gaji_user_id ON slip_gaji(user_id);
+CREATE INDEX IF NOT EXISTS idx_users_role_nama ON users(role, nama_lengkap);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_user_status ON hasil_kerja(user_id, status, total_harga);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_user_created ON hasil_kerja(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_status_created ON hasil_kerja(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_created ON hasil_kerja(created_at);
+CREATE INDEX IF NOT EXISTS idx_hutang_user_status ON hutang(user_id, status, nominal);
+CREATE INDEX IF NOT EXISTS idx_hutang_status_created ON hutang(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_hutang_created ON hutang(created_at);
+CREATE INDEX IF NOT EXISTS idx_hutang_user_created ON hutang(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_hutang_user_tanggal ON hutang(user_id, tanggal);
+CREATE INDEX IF NOT EXISTS idx_bonus_user ON bonus(user_id, nominal);
+CREATE INDEX IF NOT EXISTS idx_bonus_created ON bonus(created_at);
+CREATE INDEX IF NOT EXISTS idx_slip_gaji_created ON slip_gaji(created_at);
+CREATE INDEX IF NOT EXISTS idx_slip_gaji_user_created ON slip_gaji(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_slip_gaji_periode ON slip_gaji(periode);
+CREATE INDEX IF NOT EXISTS idx_slip_gaji_user_periode ON slip_gaji(user_id, periode);
+CREATE INDEX IF NOT EXISTS idx_reset_gaji_created ON reset_gaji(created_at);
+CREATE INDEX IF NOT EXISTS idx_reset_gaji_user_created ON reset_gaji(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_run_after ON jobs(status, run_after);
+CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs(kind, dedupe_key, status);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_arsip_user_created ON hasil_kerja_arsip(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_arsip_status_created ON hasil_kerja_arsip(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_hasil_kerja_arsip_reset ON hasil_kerja_arsip(reset_id);
+CREATE INDEX IF NOT EXISTS idx_hutang_arsip_user_created ON hutang_arsip(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_hutang_arsip_reset ON hutang_arsip(reset_id);
+CREATE INDEX IF NOT EXISTS idx_bonus_arsip_user_created ON bonus_arsip(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_bonus_arsip_reset ON bonus_arsip(reset_id);
+CREATE INDEX IF NOT EXISTS idx_rollup_harian_user_tanggal ON rollup_harian(user_id, tanggal);
+
+-- Periode berjalan + arsip, untuk laporan lintas periode (reset_id NULL = periode berjalan)
+DROP VIEW IF EXISTS hasil_kerja_semua;
+CREATE VIEW hasil_kerja_semua AS
+    SELECT id, user_id, harga_id, jumlah, total_harga, status, created_at, updated_at,
+           ukuran, jenis, harga_satuan, NULL AS reset_id
+    FROM hasil_kerja
+    UNION ALL
+    SELECT id, user_id, harga_id, jumlah, total_harga, status, created_at, updated_at,
+           ukuran, jenis, harga_satuan, reset_id
+    FROM hasil_kerja_arsip;
+
+DROP VIEW IF EXISTS hutang_semua;
+CREATE VIEW hutang_semua AS
+    SELECT id, user_id, nominal, keterangan, tanggal, status, created_at, updated_at, NULL AS reset_id
+    FROM hutang
+    UNION ALL
+    SELECT id, user_id, nominal, keterangan, tanggal, status, created_at, updated_at, reset_id
+    FROM hutang_arsip;
+
+DROP VIEW IF EXISTS bonus_semua;
+CREATE VIEW bonus_semua AS
+    SELECT id, user_id, nominal, keterangan, created_at, NULL AS reset_id
+    FROM bonus
+    UNION ALL
+    SELECT id, user_id, nominal, keterangan, created_at, reset_id
+    FROM bonus_arsip;
+
+-- Index pencarian teks (FTS5, external content) dijaga trigger; lihat search_ids() di app.py
+CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+    nama_lengkap, username, content='users', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN
+    INSERT INTO users_fts (rowid, nama_lengkap, username) VALUES (new.id, new.nama_lengkap, new.username);
+END;
+CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN
+    INSERT INTO users_fts (users_fts, rowid, nama_lengkap, username) VALUES ('delete', old.id, old.nama_lengkap, old.username);
+END;
+CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF nama_lengkap, username ON users BEGIN
+    INSERT INTO users_fts (users_fts, rowid, nama_lengkap, username) VALUES ('delete', old.id, old.nama_lengkap, old.username);
+    INSERT INTO users_fts (rowid, nama_lengkap, username) VALUES (new.id, new.nama_lengkap, new.username);
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS hutang_fts USING fts5(
+    keterangan, content='hutang', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS hutang_fts_insert AFTER INSERT ON hutang BEGIN
+    INSERT INTO hutang_fts (rowid, keterangan) VALUES (new.id, new.keterangan);
+END;
+CREATE TRIGGER IF NOT EXISTS hutang_fts_delete AFTER DELETE ON hutang BEGIN
+    INSERT INTO hutang_fts (hutang_fts, rowid, keterangan) VALUES ('delete', old.id, old.keterangan);
+END;
+CREATE TRIGGER IF NOT EXISTS hutang_fts_update AFTER UPDATE OF keterangan ON hutang BEGIN
+    INSERT INTO hutang_fts (hutang_fts, rowid, keterangan) VALUES ('delete', old.id, old.keterangan);
+    INSERT INTO hutang_fts (rowid, keterangan) VALUES (new.id, new.keterangan);
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS bonus_fts USING fts5(
+    keterangan, content='bonus', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS bonus_fts_insert AFTER INSERT ON bonus BEGIN
+    INSERT INTO bonus_fts (rowid, keterangan) VALUES (new.id, new.keterangan);
+END;
+CREATE TRIGGER IF NOT EXISTS bonus_fts_delete AFTER DELETE ON bonus BEGIN
+    INSERT INTO bonus_fts (bonus_fts, rowid, keterangan) VALUES ('delete', old.id, old.keterangan);
+END;
+CREATE TRIGGER IF NOT EXISTS bonus_fts_update AFTER UPDATE OF keterangan ON bonus BEGIN
+    INSERT INTO bonus_fts (bonus_fts, rowid, keterangan) VALUES ('delete', old.id, old.keterangan);
+    INSERT INTO bonus_fts (rowid, keterangan) VALUES (new.id, new.keterangan);
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS reset_gaji_fts USING fts5(
+    keterangan, content='reset_gaji', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS reset_gaji_fts_insert AFTER INSERT ON reset_gaji BEGIN
+    INSERT INTO reset_gaji_fts (rowid, keterangan) VALUES (new.id, new.keterangan);
+END;
+CREATE TRIGGER IF NOT EXISTS reset_gaji_fts_delete AFTER DELETE ON reset_gaji BEGIN
+    INSERT INTO reset_gaji_fts (reset_gaji_fts, rowid, keterangan) VALUES ('delete', old.id, old.keterangan);
+END;
+CREATE TRIGGER IF NOT EXISTS reset_gaji_fts_update AFTER UPDATE OF keterangan ON reset_gaji BEGIN
+    INSERT INTO reset_gaji_fts (reset_gaji_fts, rowid, keterangan) VALUES ('delete', old.id, old.keterangan);
+    INSERT INTO reset_gaji_fts (rowid, keterangan) VALUES (new.id, new.keterangan);
+END;
@@ -0,0 +1,143 @@
+"""Isi database dengan data sintetis untuk uji beban dan benchmark.
+
+Database dibuat lewat init_db() (schema.sql + migrasi), lalu karyawan, hasil kerja,
+hutang, bonus dan slip gaji dimasukkan per batch dalam satu transaksi. Saldo dan
+rollup_harian dihitung ulang di akhir.
+
+    python seed.py --database instance/bench.db --karyawan 500 --hari 365 --per-hari 11
+
+Semua karyawan memakai password 'rahasia123' (username karyawan0001, karyawan0002, ...).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app import app, get_db, hash_password, init_db, is_postgres, rebuild_rollup, rebuild_saldo
+
+NAMA_DEPAN = ['Agus', 'Budi', 'Citra', 'Dewi', 'Eko', 'Fitri', 'Gilang', 'Hendra', 'Indah', 'Joko',
+              'Kartika', 'Lestari', 'Made', 'Nur', 'Putri', 'Rizki', 'Sari', 'Teguh', 'Wahyu', 'Yuni']
+NAMA_BELAKANG = ['Saputra', 'Wijaya', 'Santoso', 'Hidayat', 'Kurniawan', 'Lestari', 'Pratama',
+                 'Siregar', 'Nasution', 'Gunawan', 'Setiawan', 'Rahmawati', 'Susanto', 'Purnomo']
+STATUS_KERJA = (['approved'] * 85) + (['pending'] * 10) + (['rejected'] * 5)
+PASSWORD = 'rahasia123'
+BATCH_SIZE = 50000
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Isi database dengan data sintetis')
+    parser.add_argument('--database',
+                        help='Path file SQLite yang akan dibuat (tidak dipakai jika DATABASE_URL diisi)')
+    parser.add_argument('--karyawan', type=int, default=500, help='Jumlah karyawan')
+    parser.add_argument('--hari', type=int, default=90, help='Rentang hari ke belakang')
+    parser.add_argument('--per-hari', type=float, default=2,
+                        help='Rata-rata input hasil kerja per karyawan per hari')
+    parser.add_argument('--hutang', type=int, default=3, help='Jumlah hutang per karyawan')
+    parser.add_argument('--bonus', type=int, default=2, help='Jumlah bonus per karyawan')
+    parser.add_argument('--seed', type=int, default=42, help='Seed random agar data bisa diulang')
+    parser.add_argument('--force', action='store_true', help='Timpa database yang sudah ada')
+    return parser.parse_args()
+
+def insert_batches(db, sql, rows):
+    """executemany per BATCH_SIZE baris dari generator, kembalikan jumlah baris"""
+    batch, total = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            db.executemany(sql, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        db.executemany(sql, batch)
+        total += len(batch)
+    return total
+
+def random_time(rng, start, days):
+    return start + timedelta(days=rng.randrange(days), seconds=rng.randrange(7 * 3600, 17 * 3600))
+
+def hasil_kerja_rows(rng, user_ids, harga, start, args):
+    """Input hasil kerja per karyawan per hari, rata-rata args.per_hari"""
+    for day in range(args.hari):
+        tanggal = start + timedelta(days=day)
+        for user_id in user_ids:
+            count = int(args.per_hari) + (rng.random() < args.per_hari % 1)
+            for _ in range(count):
+                harga_id, ukuran, jenis, harga_satuan = rng.choice(harga)
+                jumlah = rng.randint(1, 20)
+                created_at = tanggal + timedelta(seconds=rng.randrange(7 * 3600, 17 * 3600))
+                yield (user_id, harga_id, jumlah, jumlah * harga_satuan, rng.choice(STATUS_KERJA),
+                       created_at, created_at, ukuran, jenis, harga_satuan)
+
+def main():
+    args = parse_args()
+    if not is_postgres():
+        if not args.database:
+            sys.exit('--database wajib diisi untuk SQLite.')
+        if os.path.exists(args.database):
+            if not args.force:
+                sys.exit(f'{args.database} sudah ada. Pakai --force untuk menimpa.')
+            os.remove(args.database)
+        app.config['DATABASE'] = os.path.abspath(args.database)
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+
+    init_db()
+    with app.app_context():
+        db = get_db()
+        if not is_postgres():
+            # Data sintetis boleh hilang jika proses mati, jadi lewati fsync
+            db.execute('PRAGMA synchronous = OFF')
+
+        password_hash = hash_password(PASSWORD)
+        now = datetime.now()
+        start = (now - timedelta(days=args.hari)).replace(hour=0, minute=0, second=0, microsecond=0)
+        db.executemany('''
+            INSERT INTO users (username, password_hash, role, nama_lengkap, whatsapp, created_at)
+            VALUES (?, ?, 'karyawan', ?, ?, ?)
+        ''', [(f'karyawan{i:04d}', password_hash,
+               f'{rng.choice(NAMA_DEPAN)} {rng.choice(NAMA_BELAKANG)}',
+               f'08{rng.randrange(10**9, 10**10)}', start) for i in range(1, args.karyawan + 1)])
+        user_ids = [r['id'] for r in db.execute(
+            "SELECT id FROM users WHERE role = 'karyawan' ORDER BY id").fetchall()]
+        harga = [(r['id'], r['ukuran'], r['jenis'], r['harga'])
+                 for r in db.execute('SELECT id, ukuran, jenis, harga FROM harga').fetchall()]
+
+        kerja = insert_batches(db, '''
+            INSERT INTO hasil_kerja (user_id, harga_id, jumlah, total_harga, status, created_at, updated_at,
+                                     ukuran, jenis, harga_satuan)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', hasil_kerja_rows(rng, user_ids, harga, start, args))
+
+        hutang = insert_batches(db, '''
+            INSERT INTO hutang (user_id, nominal, keterangan, tanggal, status, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', ((user_id, rng.randrange(50, 500) * 1000, 'Kasbon', created_at.date().isoformat(),
+               'lunas' if rng.random() < 0.4 else 'aktif', created_at)
+              for user_id in user_ids for created_at in
+              (random_time(rng, start, args.hari) for _ in range(args.hutang))))
+
+        bonus = insert_batches(db, '''
+            INSERT INTO bonus (user_id, nominal, keterangan, created_at)
+            VALUES (?, ?, ?, ?)
+        ''', ((user_id, rng.randrange(10, 200) * 1000, 'Bonus target', random_time(rng, start, args.hari))
+              for user_id in user_ids for _ in range(args.bonus)))
+
+        rebuild_rollup(db)
+        rebuild_saldo(db)  # commit
+
+        # Satu slip per karyawan dari saldo, untuk benchmark download_slip
+        db.execute('''
+            INSERT INTO slip_gaji (user_id, periode, total_kerja, bonus, hutang, gaji_bersih, created_at)
+            SELECT user_id, ?, total_kerja, total_bonus, total_hutang,
+                   total_kerja + total_bonus - total_hutang, ?
+            FROM saldo
+            WHERE user_id IN (SELECT id FROM users WHERE role = 'karyawan')
+        ''', (f'{now:%B %Y}', now))
+        db.commit()
+
+    print(f'{len(user_ids)} karyawan, {kerja} hasil kerja, {hutang} hutang, {bonus} bonus '
+          f'dalam {time.perf_counter() - started:.1f} detik')
+
+if __name__ == '__main__':
+    main()
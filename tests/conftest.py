@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+
+# Test tidak pernah memakai DATABASE_URL produksi (string kosong juga mencegah .env mengisinya).
+# Untuk menguji backend PostgreSQL, isi TEST_DATABASE_URL dengan database khusus test:
+# skemanya dikosongkan di awal sesi.
+os.environ['DATABASE_URL'] = os.environ.get('TEST_DATABASE_URL', '')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+
+PASSWORD = 'rahasia123'
+
+def reset_postgres(url):
+    import psycopg2
+    conn = psycopg2.connect(url)
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute('DROP SCHEMA public CASCADE; CREATE SCHEMA public')
+    conn.close()
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """Aplikasi dengan database baru untuk satu sesi test; tiap test memakai username sendiri"""
+    tmp = tmp_path_factory.mktemp('gaji')
+    flask_app = app_module.app
+    if app_module.is_postgres():
+        reset_postgres(os.environ['DATABASE_URL'])
+    flask_app.config.update(
+        DATABASE=str(tmp / 'test.db'),
+        TESTING=True,
+        WTF_CSRF_ENABLED=False,
+        JOBS_INLINE=True,
+        UPLOAD_STAGING_DIR=str(tmp / 'incoming'),
+        SLIP_CACHE_DIR=str(tmp / 'slip_cache'),
+    )
+    app_module.init_db()
+    return flask_app
+
+@pytest.fixture
+def login(app):
+    """login(username) -> test client yang sudah login; karyawan baru didaftarkan dulu"""
+    def login(username, password=PASSWORD, register=True):
+        client = app.test_client()
+        if register:
+            client.post('/register', data={
+                'username': username, 'password': password, 'confirm_password': password,
+                'nama_lengkap': username.title(), 'whatsapp': '',
+            })
+        response = client.post('/login', data={'username': username, 'password': password})
+        assert response.status_code == 302
+        return client
+    return login
+
+@pytest.fixture
+def bos(login):
+    return login('bos', 'bos123', register=False)
+
+@pytest.fixture
+def query(app):
+    def query(sql, args=()):
+        with app.app_context():
+            return app_module.get_db().execute(sql, args).fetchall()
+    return query
@@ -0,0 +1,51 @@
+from collections import OrderedDict
+
+import app as app_module
+
+def test_change_password_logs_out_other_sessions(login, query):
+    c1 = login('ika')
+    c2 = login('ika', register=False)
+    response = c1.post('/profile/change-password', data={
+        'current_password': 'rahasia123', 'new_password': 'baru12345', 'confirm_password': 'baru12345'})
+    assert response.status_code == 302
+    assert query("SELECT session_version FROM users WHERE username = 'ika'")[0][0] == 2
+    assert c1.get('/dashboard').status_code == 200
+    response = c2.get('/dashboard')
+    assert response.status_code == 302 and '/login' in response.location
+
+def test_old_session_rejected_by_other_worker_cache(login, query, monkeypatch):
+    """Cache user per worker: worker lain harus langsung menolak sesi lama, bukan setelah TTL"""
+    c1 = login('joko')
+    c2 = login('joko', register=False)
+    user_id = query("SELECT id FROM users WHERE username = 'joko'")[0]['id']
+    worker_a = OrderedDict()
+    monkeypatch.setattr(app_module, '_user_cache', worker_a)
+    assert c2.get('/dashboard').status_code == 200
+    assert worker_a[user_id][0].session_version == 1
+
+    # Password diganti lewat worker B yang punya cache sendiri
+    monkeypatch.setattr(app_module, '_user_cache', OrderedDict())
+    response = c1.post('/profile/change-password', data={
+        'current_password': 'rahasia123', 'new_password': 'baru12345', 'confirm_password': 'baru12345'})
+    assert response.status_code == 302
+
+    # Kembali ke worker A: entri versi lama masih ada di cache, tetapi tidak dipakai lagi
+    monkeypatch.setattr(app_module, '_user_cache', worker_a)
+    response = c2.get('/dashboard')
+    assert response.status_code == 302 and '/login' in response.location
+    assert c1.get('/dashboard').status_code == 200
+
+def test_cached_user_costs_no_query(login, query, monkeypatch):
+    client = login('rina')
+    client.get('/dashboard')
+    statements = []
+    record_query = app_module.record_query
+    monkeypatch.setattr(app_module, 'record_query',
+                        lambda sql, elapsed: (statements.append(sql), record_query(sql, elapsed)))
+    assert client.get('/hasil-kerja').status_code == 200
+    assert not any('FROM users WHERE id' in sql for sql in statements), statements
+
+    # Edit profil tidak mengosongkan cache user di semua worker
+    generation = query("SELECT COALESCE(MAX(generation), 0) FROM cache_generation WHERE name = 'users'")[0][0]
+    client.post('/profile', data={'username': 'rina', 'nama_lengkap': 'Rina Baru', 'whatsapp': ''})
+    assert query("SELECT COALESCE(MAX(generation), 0) FROM cache_generation WHERE name = 'users'")[0][0] == generation
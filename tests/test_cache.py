@@ -0,0 +1,49 @@
+import app as app_module
+
+def recorded_statements(monkeypatch):
+    statements = []
+    record_query = app_module.record_query
+
+    def record(sql, elapsed):
+        statements.append(sql)
+        record_query(sql, elapsed)
+    monkeypatch.setattr(app_module, 'record_query', record)
+    return statements
+
+def test_cache_generation_read_once_per_request(login, bos, monkeypatch):
+    karyawan = login('lina')
+    bos.get('/bos/dashboard')
+    karyawan.get('/dashboard')
+    statements = recorded_statements(monkeypatch)
+    for client, url in ((bos, '/bos/dashboard'), (karyawan, '/dashboard'), (karyawan, '/hasil-kerja')):
+        statements.clear()
+        assert client.get(url).status_code == 200
+        assert sum('cache_generation' in sql for sql in statements) == 1, (url, statements)
+
+def assert_ranking_matches_rebuild(app):
+    with app.app_context():
+        cached = app_module._ranking
+        app_module._ranking = None
+        rebuilt = app_module.get_ranking()
+        assert cached.generation == rebuilt.generation
+        assert [dict(item) for item in cached.items] == [dict(item) for item in rebuilt.items]
+
+def test_ranking_patched_without_rebuild(app, login, bos, query, monkeypatch):
+    karyawan = login('rina')
+    user_id = query('SELECT id FROM users WHERE username = ?', ('rina',))[0]['id']
+    for jumlah in (5, 1):
+        karyawan.post('/hasil-kerja', data={'ukuran': 'besar', 'jenis': 'tipis', 'jumlah': jumlah})
+    first, second = [r['id'] for r in query('SELECT id FROM hasil_kerja WHERE user_id = ? ORDER BY id',
+                                            (user_id,))]
+    karyawan.get('/dashboard')
+
+    statements = recorded_statements(monkeypatch)
+    for url in (f'/bos/hasil-kerja/approve/{first}', f'/bos/hasil-kerja/approve/{second}',
+                f'/bos/hasil-kerja/reject/{second}', f'/bos/reset_gaji/{user_id}'):
+        bos.post(url)
+        statements.clear()
+        assert karyawan.get('/dashboard').status_code == 200
+        assert not any('ORDER BY total_gaji DESC' in sql for sql in statements), url
+        assert_ranking_matches_rebuild(app)
+    with app.app_context():
+        assert app_module.get_ranking().rank(user_id)['total_gaji'] == 0
@@ -0,0 +1,25 @@
+from datetime import date
+
+import app as app_module
+
+def test_health_check(app):
+    response = app.test_client().get('/health')
+    assert response.status_code == 200
+    assert response.json['status'] == 'ok'
+    assert response.json['backend'] == app.config['DB_BACKEND']
+    assert isinstance(response.json['pool_idle'], int)
+
+def test_rebuild_saldo(app, login, query):
+    login('sari')
+    user_id = query("SELECT id FROM users WHERE username = 'sari'")[0]['id']
+    with app.app_context():
+        db = app_module.get_db()
+        db.execute('INSERT INTO bonus (user_id, nominal, keterangan) VALUES (?, ?, ?)',
+                   (user_id, 5000, 'lembur'))
+        db.execute('INSERT INTO hutang (user_id, nominal, keterangan, tanggal) VALUES (?, ?, ?, ?)',
+                   (user_id, 2000, 'kasbon', date(2024, 1, 5)))
+        db.commit()
+        app_module.rebuild_saldo(db)
+        assert app_module.verify_saldo(db) == []
+    row = query('SELECT total_kerja, total_bonus, total_hutang FROM saldo WHERE user_id = ?', (user_id,))[0]
+    assert tuple(row) == (0, 5000, 2000)
@@ -0,0 +1,39 @@
+import csv
+import io
+import zipfile
+from xml.etree import ElementTree
+
+import app as app_module
+
+def test_export_csv_and_xlsx(app, login, bos, query):
+    login('intan')
+    user_id = query("SELECT id FROM users WHERE username = 'intan'")[0]['id']
+    with app.app_context():
+        db = app_module.get_db()
+        db.executemany('''INSERT INTO hutang (user_id, nominal, keterangan, tanggal, status, created_at)
+                          VALUES (?, ?, ?, '2024-01-01', ?, ?)''',
+                       [(user_id, i, f'cicilan intan {i}, "x"', 'aktif' if i % 2 else 'lunas',
+                         f'2024-01-01 00:{i // 60:02d}:{i % 60:02d}') for i in range(1200)])
+        app_module.rebuild_saldo(db)
+
+    response = bos.get('/bos/export/hutang', query_string={'format': 'csv', 'status': 'aktif', 'search': 'intan'})
+    assert response.status_code == 200 and response.mimetype == 'text/csv'
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True).lstrip('﻿'))))
+    assert rows[0][:3] == ['Tanggal', 'Karyawan', 'Keterangan']
+    assert len(rows) == 601
+    assert rows[1][2].startswith('cicilan intan') and rows[1][4] == 'aktif'
+
+    response = bos.get('/bos/export/hutang', query_string={'format': 'xlsx', 'search': 'intan'})
+    archive = zipfile.ZipFile(io.BytesIO(response.data))
+    assert archive.testzip() is None
+    sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+    ns = {'m': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+    assert len(sheet.findall('.//m:row', ns)) == 1201
+
+def test_export_datasets_and_access(login, bos):
+    for dataset in ('hasil-kerja', 'hutang', 'bonus', 'slip-gaji', 'riwayat-reset'):
+        for fmt in ('csv', 'xlsx'):
+            assert bos.get(f'/bos/export/{dataset}?format={fmt}').status_code == 200
+    assert bos.get('/bos/export/users?format=csv').status_code == 404
+    assert bos.get('/bos/export/hutang?format=pdf').status_code == 400
+    assert login('joni').get('/bos/export/hutang?format=csv').status_code == 302
@@ -0,0 +1,17 @@
+REMOTE = {'REMOTE_ADDR': '203.0.113.7'}
+
+def test_metrics_without_token_only_from_localhost(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', '')
+    client = app.test_client()
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert 'gaji_http_request_duration_seconds' in response.get_data(as_text=True)
+    assert client.get('/metrics', environ_base=REMOTE).status_code == 403
+
+def test_metrics_with_token(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 'rahasia')
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer salah'}).status_code == 403
+    response = client.get('/metrics', headers={'Authorization': 'Bearer rahasia'}, environ_base=REMOTE)
+    assert response.status_code == 200
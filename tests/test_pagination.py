@@ -0,0 +1,61 @@
+import sqlite3
+
+import pytest
+
+from app import (decode_cursor, encode_cursor, get_db, is_postgres, keyset_paginate,
+                 load_migrations, migrate_db)
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor('2024-01-05 08:00:00', 42)) == ('2024-01-05 08:00:00', 42)
+    assert decode_cursor(encode_cursor(1500.5, 7)) == (1500.5, 7)
+    assert decode_cursor(encode_cursor(None, 3)) == (None, 3)
+
+@pytest.mark.parametrize('value, row_id', [
+    ([1, 2], 3), ({'a': 1}, 3), (True, 3), ('x', '3'), ('x', 1.5), ('x', None),
+])
+def test_invalid_cursor_is_rejected(value, row_id):
+    assert decode_cursor(encode_cursor(value, row_id)) is None
+
+@pytest.mark.parametrize('token', ['garbage', '', '!!!', encode_cursor([1, 2], 3)])
+def test_invalid_cursor_shows_first_page(login, token):
+    bos = login('bos', 'bos123', register=False)
+    for url in ('/bos/hasil-kerja', '/bos/hutang', '/bos/bonus', '/bos/karyawan'):
+        assert bos.get(url, query_string={'after': token}).status_code == 200
+        assert bos.get(url, query_string={'before': token}).status_code == 200
+
+@pytest.mark.skipif(is_postgres(), reason='database lama dibuat dengan migrasi SQLite')
+def test_legacy_null_created_at_paginated(app, tmp_path, monkeypatch):
+    """Baris lama dengan created_at NULL diisi migrasi 0012 dan muncul di salah satu halaman"""
+    path = tmp_path / 'lama.db'
+    legacy = sqlite3.connect(path)
+    for version, name, sql in load_migrations():
+        if version < 12:
+            legacy.executescript(sql)
+    legacy.execute("INSERT INTO users (id, username, password_hash, nama_lengkap) VALUES (1, 'lama', 'x', 'Lama')")
+    legacy.execute("INSERT INTO harga (id, ukuran, jenis, harga) VALUES (1, 'besar', 'tipis', 1000)")
+    for i in range(1, 8):
+        created_at = None if i % 2 else f'2024-01-0{i} 08:00:00'
+        legacy.execute('INSERT INTO hasil_kerja (user_id, harga_id, jumlah, total_harga, created_at, updated_at) '
+                       'VALUES (1, 1, 1, 1000, ?, NULL)', (created_at,))
+    legacy.execute('CREATE TABLE schema_version (version INTEGER PRIMARY KEY, name TEXT NOT NULL, '
+                   'applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)')
+    legacy.executemany('INSERT INTO schema_version (version, name) VALUES (?, ?)',
+                       [(v, n) for v, n, _ in load_migrations() if v < 12])
+    legacy.commit()
+    legacy.close()
+
+    monkeypatch.setitem(app.config, 'DATABASE', str(path))
+    with app.app_context():
+        db = get_db()
+        assert migrate_db(db) == [12]
+        seen, token = [], ''
+        while token is not None:
+            with app.test_request_context(query_string={'after': token}):
+                page = keyset_paginate(db, 'SELECT hk.* FROM hasil_kerja hk WHERE hk.user_id = ?',
+                                       [1], 'hk', 3)
+            seen += [row['id'] for row in page.items]
+            token = page.next_cursor
+        assert seen == [6, 4, 2, 7, 5, 3, 1]
+        with pytest.raises(sqlite3.IntegrityError):
+            db.execute('UPDATE hasil_kerja SET created_at = NULL WHERE id = 1')
+        db.rollback()
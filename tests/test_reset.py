@@ -0,0 +1,41 @@
+from datetime import datetime
+
+import app as app_module
+
+class FixedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime(2024, 3, 1, 17, 0, 0)
+
+def test_reset_archives_to_its_own_reset_gaji(app, login, query, monkeypatch):
+    """Dua reset pada detik yang sama tidak boleh saling tertukar arsipnya"""
+    login('rudi')
+    user_id = query("SELECT id FROM users WHERE username = 'rudi'")[0]['id']
+    monkeypatch.setattr(app_module, 'datetime', FixedDatetime)
+    with app.app_context():
+        db = app_module.get_db()
+        reset_ids = []
+        for nominal in (1000, 2000):
+            db.execute('INSERT INTO bonus (user_id, nominal, keterangan) VALUES (?, ?, ?)',
+                       (user_id, nominal, 'bonus'))
+            assert app_module.reset_saldo(db, f'periode {nominal}', user_id) == 1
+            db.commit()
+            reset_ids.append(db.execute('SELECT MAX(id) FROM reset_gaji WHERE user_id = ?',
+                                        (user_id,)).fetchone()[0])
+    rows = query('SELECT nominal, reset_id FROM bonus_arsip WHERE user_id = ? ORDER BY nominal',
+                 (user_id,))
+    assert [tuple(row) for row in rows] == [(1000, reset_ids[0]), (2000, reset_ids[1])]
+    assert query('SELECT COUNT(*) FROM bonus WHERE user_id = ?', (user_id,))[0][0] == 0
+
+def test_reset_runs_without_job_worker(app, login, bos, query, monkeypatch):
+    """Reset gaji langsung selesai di request, juga saat job diserahkan ke worker terpisah"""
+    monkeypatch.setitem(app.config, 'JOBS_INLINE', False)
+    login('sinta')
+    user_id = query("SELECT id FROM users WHERE username = 'sinta'")[0]['id']
+    bos.post('/bos/bonus', data={'user_id': user_id, 'nominal': 7000, 'keterangan': 'insentif'})
+    response = bos.post(f'/bos/reset_gaji/{user_id}', data={'keterangan': 'Tutup April'},
+                        follow_redirects=True)
+    assert 'telah direset' in response.get_data(as_text=True)
+    assert query('SELECT total_bonus FROM saldo WHERE user_id = ?', (user_id,))[0][0] == 0
+    assert query("SELECT COUNT(*) FROM reset_gaji WHERE keterangan = 'Tutup April'")[0][0] == 1
+    assert query("SELECT COUNT(*) FROM jobs WHERE kind = 'reset_gaji'")[0][0] == 0
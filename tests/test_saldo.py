@@ -0,0 +1,157 @@
+import threading
+
+import app as app_module
+
+def assert_saldo_consistent(app):
+    with app.app_context():
+        assert app_module.verify_saldo(app_module.get_db()) == []
+
+def saldo(query, user_id):
+    rows = query('SELECT total_kerja, total_bonus, total_hutang FROM saldo WHERE user_id = ?', (user_id,))
+    return tuple(rows[0]) if rows else (0, 0, 0)
+
+def submit_kerja(client, query, user_id, jumlah=2):
+    """Input hasil kerja besar/tipis (33000 per unit) lewat form karyawan, kembalikan ID-nya"""
+    response = client.post('/hasil-kerja', data={'ukuran': 'besar', 'jenis': 'tipis', 'jumlah': jumlah})
+    assert response.status_code == 302
+    return query('SELECT MAX(id) FROM hasil_kerja WHERE user_id = ?', (user_id,))[0][0]
+
+def user_id_of(query, username):
+    return query('SELECT id FROM users WHERE username = ?', (username,))[0]['id']
+
+def test_approve_and_reject(app, login, bos, query):
+    karyawan = login('andi')
+    user_id = user_id_of(query, 'andi')
+    first = submit_kerja(karyawan, query, user_id)
+    second = submit_kerja(karyawan, query, user_id, jumlah=1)
+
+    bos.post(f'/bos/hasil-kerja/approve/{first}')
+    bos.post(f'/bos/hasil-kerja/approve/{first}')  # approve ganda tidak menambah saldo lagi
+    bos.post(f'/bos/hasil-kerja/reject/{second}')
+    assert saldo(query, user_id) == (66000, 0, 0)
+    assert_saldo_consistent(app)
+
+    bos.post(f'/bos/hasil-kerja/reject/{first}')
+    assert saldo(query, user_id) == (0, 0, 0)
+    assert_saldo_consistent(app)
+
+def test_hutang_and_lunasi(app, login, bos, query):
+    login('budi')
+    user_id = user_id_of(query, 'budi')
+    bos.post('/bos/hutang', data={'user_id': user_id, 'nominal': 15000, 'keterangan': 'kasbon',
+                                  'tanggal': '2024-02-01'})
+    assert saldo(query, user_id) == (0, 0, 15000)
+    assert_saldo_consistent(app)
+
+    hutang_id = query('SELECT id FROM hutang WHERE user_id = ?', (user_id,))[0][0]
+    bos.post(f'/bos/hutang/lunasi/{hutang_id}')
+    bos.post(f'/bos/hutang/lunasi/{hutang_id}')
+    assert saldo(query, user_id) == (0, 0, 0)
+    assert_saldo_consistent(app)
+
+def test_bonus_and_delete(app, login, bos, query):
+    login('citra')
+    user_id = user_id_of(query, 'citra')
+    bos.post('/bos/bonus', data={'user_id': user_id, 'nominal': 20000, 'keterangan': 'lembur'})
+    assert saldo(query, user_id) == (0, 20000, 0)
+    assert_saldo_consistent(app)
+
+    bonus_id = query('SELECT id FROM bonus WHERE user_id = ?', (user_id,))[0][0]
+    bos.post(f'/bos/bonus/delete/{bonus_id}')
+    bos.post(f'/bos/bonus/delete/{bonus_id}')
+    assert saldo(query, user_id) == (0, 0, 0)
+    assert_saldo_consistent(app)
+
+class PauseBeforeUpdate:
+    """Koneksi yang menunggu barrier sebelum UPDATE hasil_kerja, agar dua request
+    sama-sama sudah membaca status 'pending' sebelum salah satunya menulis"""
+    def __init__(self, db, barrier):
+        self.db = db
+        self.barrier = barrier
+
+    def pause(self, sql):
+        if sql.lstrip().startswith('UPDATE hasil_kerja'):
+            self.barrier.wait(timeout=10)
+
+    def execute(self, sql, *args):
+        self.pause(sql)
+        return self.db.execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        self.pause(sql)
+        return self.db.executemany(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+def test_concurrent_double_approval(app, login, query):
+    karyawan = login('dedi')
+    user_id = user_id_of(query, 'dedi')
+    kerja_id = submit_kerja(karyawan, query, user_id)
+    barrier = threading.Barrier(2)
+    errors = []
+
+    def approve():
+        try:
+            with app.app_context():
+                db = app_module.get_db()
+                app_module.set_kerja_status(PauseBeforeUpdate(db, barrier), kerja_id, 'approved')
+                db.commit()
+        except Exception as e:  # diperiksa di thread utama
+            errors.append(e)
+
+    threads = [threading.Thread(target=approve) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert saldo(query, user_id) == (66000, 0, 0)
+    assert query('SELECT SUM(total) FROM rollup_harian WHERE user_id = ?', (user_id,))[0][0] == 66000
+    assert_saldo_consistent(app)
+
+def test_bulk_approve_skips_rows_already_changed(app, login, bos, query):
+    karyawan = login('eko')
+    user_id = user_id_of(query, 'eko')
+    ids = [submit_kerja(karyawan, query, user_id, jumlah=n) for n in (1, 2, 3)]
+    bos.post(f'/bos/hasil-kerja/approve/{ids[0]}')
+    response = bos.post('/bos/hasil-kerja/bulk', data={'action': 'approve', 'kerja_ids': ids + [999999]},
+                        headers={'Accept': 'application/json'})
+    assert response.json['results'] == {str(ids[0]): 'skipped', str(ids[1]): 'approved',
+                                        str(ids[2]): 'approved', '999999': 'not_found'}
+    assert saldo(query, user_id) == (6 * 33000, 0, 0)
+    assert_saldo_consistent(app)
+
+    karyawan.post('/hasil-kerja', data={'ukuran': 'besar', 'jenis': 'tipis', 'jumlah': 1})
+    response = bos.post('/bos/hasil-kerja/bulk', data={'action': 'reject', 'user_id': user_id},
+                        headers={'Accept': 'application/json'})
+    assert response.json['changed'] == 1
+    assert saldo(query, user_id) == (6 * 33000, 0, 0)
+    assert_saldo_consistent(app)
+
+def test_bulk_approve_racing_single_approve(app, login, query):
+    karyawan = login('fajar')
+    user_id = user_id_of(query, 'fajar')
+    ids = [submit_kerja(karyawan, query, user_id, jumlah=1) for _ in range(3)]
+    barrier = threading.Barrier(2)
+    errors = []
+
+    def run(func, *args):
+        try:
+            with app.app_context():
+                db = app_module.get_db()
+                func(PauseBeforeUpdate(db, barrier), *args)
+                db.commit()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(app_module.set_kerja_status_bulk, ids, 'approved')),
+               threading.Thread(target=run, args=(app_module.set_kerja_status, ids[1], 'approved'))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert saldo(query, user_id) == (3 * 33000, 0, 0)
+    assert query('SELECT SUM(total) FROM rollup_harian WHERE user_id = ?', (user_id,))[0][0] == 3 * 33000
+    assert_saldo_consistent(app)
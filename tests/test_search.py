@@ -0,0 +1,38 @@
+import app as app_module
+
+def test_search_users_bonus_and_hutang(app, login, bos, query):
+    login('wulan')
+    user_id = query("SELECT id FROM users WHERE username = 'wulan'")[0]['id']
+    with app.app_context():
+        db = app_module.get_db()
+        db.execute("UPDATE users SET nama_lengkap = 'Wulandari Kusuma' WHERE id = ?", (user_id,))
+        db.execute("INSERT INTO bonus (user_id, nominal, keterangan) VALUES (?, 500, 'Insentif Ramadhan')",
+                   (user_id,))
+        db.execute('''INSERT INTO hutang (user_id, nominal, keterangan, tanggal, status)
+                      VALUES (?, 1000, 'Kasbon servis motor', '2024-01-01', 'aktif')''', (user_id,))
+        app_module.rebuild_saldo(db)
+
+    def search(text):
+        response = bos.get('/api/search', query_string={'q': text})
+        assert response.status_code == 200
+        return response.json
+
+    assert [k['username'] for k in search('wuland')['karyawan']] == ['wulan']
+    assert [b['keterangan'] for b in search('ramadh')['bonus']] == ['Insentif Ramadhan']
+    assert [h['keterangan'] for h in search('servis mot')['hutang']] == ['Kasbon servis motor']
+    assert search('"OR')['karyawan'] == []
+    assert 'Wulandari Kusuma' in bos.get('/bos/cari?q=kusuma').get_data(as_text=True)
+
+    # Index mengikuti perubahan nama dan arsip periode
+    with app.app_context():
+        db = app_module.get_db()
+        db.execute("UPDATE users SET nama_lengkap = 'Wulan Lestari' WHERE id = ?", (user_id,))
+        db.commit()
+    assert search('kusuma')['karyawan'] == []
+    assert [k['username'] for k in search('lestari')['karyawan']] == ['wulan']
+    bos.post(f'/bos/reset_gaji/{user_id}', data={'keterangan': 'Tutup periode Syawal'})
+    assert search('ramadh')['bonus'] == []
+    assert len(search('syawal')['reset_gaji']) == 1
+
+def test_search_requires_bos(login):
+    assert login('yuda').get('/api/search?q=a').status_code == 403
@@ -0,0 +1,60 @@
+import io
+import os
+import zipfile
+
+import app as app_module
+
+def test_payroll_zip(app, login, bos, query, monkeypatch, tmp_path):
+    monkeypatch.setitem(app.config, 'SLIP_CACHE_DIR', str(tmp_path / 'slip_cache'))
+    monkeypatch.setitem(app.config, 'SLIP_RENDER_WORKERS', 2)
+    start_methods = []
+    process_pool = app_module.ProcessPoolExecutor
+
+    def executor(*args, mp_context=None, **kwargs):
+        start_methods.append(mp_context.get_start_method() if mp_context else 'fork')
+        return process_pool(*args, mp_context=mp_context, **kwargs)
+    monkeypatch.setattr(app_module, 'ProcessPoolExecutor', executor)
+    for i in range(3):
+        login(f'slip{i}')
+    karyawan = query("SELECT COUNT(*) FROM users WHERE role = 'karyawan'")[0][0]
+
+    response = bos.post('/bos/slip-gaji/generate-all', data={'periode': 'Maret 2024'})
+    assert response.status_code == 200 and response.mimetype == 'application/zip'
+    assert response.headers['X-Slip-Created'] == str(karyawan)
+    archive = zipfile.ZipFile(io.BytesIO(response.data))
+    assert len(archive.namelist()) == karyawan
+    assert all(archive.read(name)[:4] == b'%PDF' for name in archive.namelist())
+    assert len(os.listdir(app.config['SLIP_CACHE_DIR'])) == karyawan
+    # Dirender paralel di proses spawn, bukan fork dari worker yang punya thread lain
+    assert start_methods == ['spawn']
+
+    # Periode yang sama tidak membuat slip baru, PDF diambil dari cache
+    response = bos.post('/bos/slip-gaji/generate-all', data={'periode': 'Maret 2024'})
+    assert response.headers['X-Slip-Created'] == '0'
+    assert len(zipfile.ZipFile(io.BytesIO(response.data)).namelist()) == karyawan
+    assert query("SELECT COUNT(*) FROM slip_gaji WHERE periode = 'Maret 2024'")[0][0] == karyawan
+
+def test_download_slip_etag(app, login, bos, query, monkeypatch, tmp_path):
+    monkeypatch.setitem(app.config, 'SLIP_CACHE_DIR', str(tmp_path / 'slip_cache'))
+    client = login('tari')
+    assert client.post('/slip-gaji/generate', data={'periode': 'April 2024'}).status_code == 302
+    slip_id = query("""SELECT sg.id FROM slip_gaji sg JOIN users u ON u.id = sg.user_id
+                       WHERE u.username = 'tari'""")[0][0]
+
+    response = client.get(f'/slip-gaji/download/{slip_id}')
+    assert response.status_code == 200 and response.data[:4] == b'%PDF'
+    etag = response.headers['ETag']
+    assert client.get(f'/slip-gaji/download/{slip_id}', headers={'If-None-Match': etag}).status_code == 304
+
+    # File cache sudah dibuang: ETag yang masih berlaku tetap dijawab 304 tanpa render ulang
+    for name in os.listdir(app.config['SLIP_CACHE_DIR']):
+        os.remove(os.path.join(app.config['SLIP_CACHE_DIR'], name))
+    jobs = query('SELECT COUNT(*) FROM jobs')[0][0]
+    response = client.get(f'/slip-gaji/download/{slip_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 304 and response.headers['ETag'] == etag
+    assert query('SELECT COUNT(*) FROM jobs')[0][0] == jobs
+    assert os.listdir(app.config['SLIP_CACHE_DIR']) == []
+
+def test_download_slip_not_found(login, bos):
+    assert bos.get('/slip-gaji/download/999999').status_code == 404
+    assert login('umar').get('/slip-gaji/download/999999').status_code == 302
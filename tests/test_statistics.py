@@ -0,0 +1,49 @@
+import app as app_module
+
+def insert_kerja(app, user_id, rows):
+    """rows: (created_at, jumlah, total_harga); semua pending dengan harga besar/tipis"""
+    with app.app_context():
+        db = app_module.get_db()
+        harga_id = db.execute("SELECT id FROM harga WHERE ukuran = 'besar' AND jenis = 'tipis'").fetchone()[0]
+        ids = [db.execute('''
+            INSERT INTO hasil_kerja (user_id, harga_id, jumlah, total_harga, status, created_at,
+                                     ukuran, jenis, harga_satuan)
+            VALUES (?, ?, ?, ?, 'pending', ?, 'besar', 'tipis', 1000) RETURNING id
+        ''', (user_id, harga_id, jumlah, total, created_at)).fetchone()[0]
+               for created_at, jumlah, total in rows]
+        db.commit()
+    return ids
+
+def test_rollup_follows_approve_reject_and_reset(app, login, bos, query):
+    login('gita')
+    user_id = query("SELECT id FROM users WHERE username = 'gita'")[0]['id']
+    ids = insert_kerja(app, user_id, [('2023-01-02 08:00:00', 2, 2000), ('2023-01-02 09:00:00', 1, 1000),
+                                      ('2023-01-09 08:00:00', 1, 500), ('2023-02-10 08:00:00', 4, 4000)])
+    bos.post('/bos/hasil-kerja/bulk', data={'action': 'approve', 'kerja_ids': ids[:3]})
+    bos.post(f'/bos/hasil-kerja/approve/{ids[3]}')
+    bos.post(f'/bos/hasil-kerja/reject/{ids[3]}')
+
+    def statistics(**params):
+        response = bos.get('/api/statistics', query_string={
+            'from': '2023-01-01', 'to': '2023-12-31', 'user_id': user_id, **params})
+        assert response.status_code == 200
+        return [(d['periode'], d['jumlah'], d['total']) for d in response.json['data']]
+
+    assert statistics() == [('2023-01', 4, 3500)]
+    assert statistics(granularity='week') == [('2023-01-02', 3, 3000), ('2023-01-09', 1, 500)]
+    assert statistics(granularity='day', to='2023-01-03') == [('2023-01-02', 3, 3000)]
+
+    # Rollup menyimpan riwayat walau periode ditutup, dan sama dengan hasil hitung ulang
+    bos.post(f'/bos/reset_gaji/{user_id}', data={'keterangan': 'Tutup Januari'})
+    assert statistics() == [('2023-01', 4, 3500)]
+    before = [tuple(r) for r in query('SELECT * FROM rollup_harian ORDER BY tanggal, user_id, harga_id')]
+    with app.app_context():
+        db = app_module.get_db()
+        app_module.rebuild_rollup(db)
+        db.commit()
+    assert [tuple(r) for r in query('SELECT * FROM rollup_harian ORDER BY tanggal, user_id, harga_id')] == before
+
+def test_statistics_rejects_bad_parameters(login, bos):
+    assert bos.get('/api/statistics?from=x').status_code == 400
+    assert bos.get('/api/statistics?granularity=year').status_code == 400
+    assert login('hadi').get('/api/statistics').status_code == 403